@@ -190,6 +190,42 @@ IMAGE_SEARCH_CONFIG = {
     'read_timeout': 45,     # Timeout específico para lectura
 }
 
+# Simulador Solar - Snapshot en memoria de las tablas de parámetros
+# Cada proceso recarga su snapshot tras este número de segundos (0 = solo por señales)
+SIMULADOR_SNAPSHOT_TTL = int(get_env_variable('SIMULADOR_SNAPSHOT_TTL', '300'))
+
+# Simulador Solar - Máximo de escenarios por petición en /simulador/batch/
+SIMULADOR_BATCH_MAX_ESCENARIOS = int(get_env_variable('SIMULADOR_BATCH_MAX_ESCENARIOS', '20000'))
+
+# Simulador Solar - Almacén mapeado en memoria de perfiles horarios (comando simulador_perfiles)
+SIMULADOR_PERFILES_PATH = BASE_DIR / 'data' / 'simulador' / 'perfiles_horarios.npy'
+
+# Simulador Solar - Límites provinciales (GeoJSON) para resolver coordenadas a provincia
+SIMULADOR_PROVINCIAS_PATH = BASE_DIR / 'data' / 'simulador' / 'provincias.geojson'
+
+# Simulador Solar - Muestras máximas por petición de las bandas Monte Carlo P10/P50/P90
+# (número fijo, no un tiempo, para que las bandas sean reproducibles)
+SIMULADOR_MONTECARLO_MAX_MUESTRAS = int(get_env_variable('SIMULADOR_MONTECARLO_MAX_MUESTRAS', '5000'))
+
+# Simulador Solar - Caché LRU de resultados por proceso (entradas y segundos de vida)
+SIMULADOR_CACHE_MAX_ENTRADAS = int(get_env_variable('SIMULADOR_CACHE_MAX_ENTRADAS', '2048'))
+SIMULADOR_CACHE_TTL = int(get_env_variable('SIMULADOR_CACHE_TTL', '600'))
+
+# Simulador Solar - Informes PDF/CSV guardados por hash (ruta relativa al storage por defecto)
+SIMULADOR_INFORMES_DIR = 'simulador/informes'
+
+# Simulador Solar - Enlaces permanentes: vaciado del buffer (segundos) y tamaño de lote de inserción
+SIMULADOR_PERMALINKS_INTERVALO = float(get_env_variable('SIMULADOR_PERMALINKS_INTERVALO', '2'))
+SIMULADOR_PERMALINKS_LOTE = int(get_env_variable('SIMULADOR_PERMALINKS_LOTE', '500'))
+
+# Simulador Solar - Analítica: vaciado de la cola de eventos (segundos), lote y spool si la base de datos no responde
+SIMULADOR_ANALITICA_INTERVALO = float(get_env_variable('SIMULADOR_ANALITICA_INTERVALO', '5'))
+SIMULADOR_ANALITICA_LOTE = int(get_env_variable('SIMULADOR_ANALITICA_LOTE', '200'))
+SIMULADOR_ANALITICA_SPOOL_DIR = BASE_DIR / 'logs' / 'simulador_spool'
+
+# Noticias - Tarjetas por página en las listas (paginación por cursor y scroll infinito)
+NOTICIAS_POR_PAGINA = int(get_env_variable('NOTICIAS_POR_PAGINA', '12'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
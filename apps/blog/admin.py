@@ -4,8 +4,10 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django import forms
+from django.db.models import Q
 from tinymce.widgets import TinyMCE
 from .models import Categoria, Noticia
+from .busqueda import filtro_busqueda
 from .utils import VideoURLValidator
 
 
@@ -64,12 +66,13 @@ class CategoriaAdmin(admin.ModelAdmin):
     
     def noticias_count_display(self, obj):
         """Muestra la cantidad de noticias activas"""
-        count = obj.noticias_count
+        count = obj.noticias_activas_count
         if count > 0:
             url = reverse('admin:blog_noticia_changelist') + f'?categoria__id__exact={obj.id}'
             return format_html('<a href="{}">{} noticias</a>', url, count)
         return '0 noticias'
     noticias_count_display.short_description = 'Noticias'
+    noticias_count_display.admin_order_field = 'noticias_activas_count'
     
     class Media:
         css = {
@@ -112,6 +115,7 @@ class NoticiaAdmin(admin.ModelAdmin):
         'fecha_publicacion',
         'autor'
     ]
+    # titulo, descripcion_corta y contenido se buscan con el índice de texto completo
     search_fields = ['titulo', 'descripcion_corta', 'contenido', 'autor']
     prepopulated_fields = {'slug': ('titulo',)}
     list_editable = ['destacada', 'activa']
@@ -264,6 +268,14 @@ class NoticiaAdmin(admin.ModelAdmin):
         
         return form
     
+    def get_search_results(self, request, queryset, search_term):
+        """Búsqueda de texto completo (sin ILIKE sobre el HTML) o por autor"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            filtro_busqueda(search_term, queryset.db) | Q(autor__icontains=search_term)
+        ), False
+    
     def save_model(self, request, obj, form, change):
         """Guarda el modelo con validaciones adicionales"""
         # Validar que no se use archivo y URL al mismo tiempo
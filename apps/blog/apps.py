@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.blog'
-    verbose_name = 'Blog y Noticias'
\ No newline at end of file
+    verbose_name = 'Blog y Noticias'
+
+    def ready(self):
+        # Conectar señales de la búsqueda de noticias
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Búsqueda de texto completo en noticias.
+
+En PostgreSQL cada noticia guarda `search_vector` (configuración 'spanish'):
+título con peso A, descripción corta con peso B y contenido con peso C. El
+contenido se pasa a texto plano en Python (`texto_plano`): TinyMCE guarda
+los acentos como entidades (`energ&iacute;a`) y la base de datos no sabe
+decodificarlas. La búsqueda usa el índice GIN y ordena con SearchRank. El
+vector se actualiza al guardar la noticia, en las operaciones en bloque de
+NoticiaQuerySet y con `manage.py noticias_indice_busqueda`.
+
+En otros motores (SQLite en desarrollo y pruebas) se usa un índice invertido
+en memoria del proceso con los mismos pesos. Se reconstruye al primer uso
+después de guardar o borrar una noticia (señales de `apps.blog.signals`).
+
+En ambos casos cada término de la consulta se busca como prefijo y tienen
+que aparecer todos, así que la búsqueda mientras se escribe de noticias.js
+encuentra las palabras a medio escribir.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from html import unescape
+
+from asgiref.sync import sync_to_async
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast
+
+
+CONFIG_BUSQUEDA = 'spanish'
+
+# Pesos de ts_rank por defecto para A, B y C (el índice en memoria usa los mismos)
+PESOS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Campos de Noticia que entran en la búsqueda
+CAMPOS_BUSQUEDA = {'titulo', 'descripcion_corta', 'contenido'}
+
+RE_TERMINO = re.compile(r'\w+')
+RE_ETIQUETA = re.compile(r'<[^>]*>')
+
+
+def texto_plano(html):
+    """Texto del contenido HTML sin etiquetas ni entidades"""
+    return unescape(RE_ETIQUETA.sub(' ', html or ''))
+
+
+def terminos(texto):
+    """Palabras en minúsculas de un texto (solo caracteres de palabra: seguras para tsquery)"""
+    return RE_TERMINO.findall(texto.lower())
+
+
+def usa_postgres(alias='default'):
+    return connections[alias].vendor == 'postgresql'
+
+
+def vector_busqueda(contenido):
+    """Expresión SQL del vector de una noticia con ese contenido HTML (update() por fila)"""
+    return (
+        SearchVector('titulo', weight='A', config=CONFIG_BUSQUEDA)
+        + SearchVector('descripcion_corta', weight='B', config=CONFIG_BUSQUEDA)
+        + SearchVector(Value(texto_plano(contenido)), weight='C', config=CONFIG_BUSQUEDA)
+    )
+
+
+def actualizar_vector(queryset):
+    """Recalcula search_vector de las noticias del queryset (solo PostgreSQL); devuelve las filas"""
+    if not usa_postgres(queryset.db):
+        return 0
+    filas = 0
+    with transaction.atomic(using=queryset.db):
+        for pk, contenido in queryset.order_by().values_list('pk', 'contenido').iterator():
+            filas += queryset.filter(pk=pk).update(search_vector=vector_busqueda(contenido))
+    return filas
+
+
+def reindexar(queryset):
+    """Tras cambiar noticias en bloque: vectores en PostgreSQL o índice en memoria al confirmar"""
+    if usa_postgres(queryset.db):
+        return actualizar_vector(queryset)
+    transaction.on_commit(invalidar_indice, using=queryset.db)
+    return 0
+
+
+def consulta_postgres(texto):
+    """tsquery con todos los términos como prefijo: 'panel:* & solar:*'"""
+    return SearchQuery(
+        ' & '.join(f'{termino}:*' for termino in terminos(texto)),
+        config=CONFIG_BUSQUEDA, search_type='raw'
+    )
+
+
+class IndiceInvertido:
+    """
+    Índice invertido en memoria: término -> {id de noticia: puntuación}.
+
+    Los términos se guardan ordenados para buscar por prefijo con bisect.
+    """
+
+    def __init__(self, filas):
+        puntuaciones = defaultdict(lambda: defaultdict(float))
+        for pk, titulo, descripcion, contenido in filas:
+            for peso, texto in ((PESOS['A'], titulo), (PESOS['B'], descripcion),
+                                (PESOS['C'], texto_plano(contenido))):
+                for termino, veces in Counter(terminos(texto or '')).items():
+                    puntuaciones[termino][pk] += peso * veces
+        self.puntuaciones = {termino: dict(docs) for termino, docs in puntuaciones.items()}
+        self.terminos = sorted(self.puntuaciones)
+        self.documentos = len({pk for docs in self.puntuaciones.values() for pk in docs})
+
+    def _prefijo(self, prefijo):
+        """{id: puntuación} de todos los términos que empiezan por `prefijo`"""
+        resultado = defaultdict(float)
+        posicion = bisect_left(self.terminos, prefijo)
+        while posicion < len(self.terminos) and self.terminos[posicion].startswith(prefijo):
+            for pk, puntuacion in self.puntuaciones[self.terminos[posicion]].items():
+                resultado[pk] += puntuacion
+            posicion += 1
+        return resultado
+
+    def buscar(self, texto):
+        """{id: puntuación} de las noticias que contienen todos los términos"""
+        consulta = terminos(texto)
+        if not consulta:
+            return {}
+        resultado = None
+        for termino in consulta:
+            encontrados = self._prefijo(termino)
+            if resultado is None:
+                resultado = dict(encontrados)
+            else:
+                resultado = {pk: p + encontrados[pk] for pk, p in resultado.items() if pk in encontrados}
+            if not resultado:
+                return {}
+        return resultado
+
+
+_lock = threading.Lock()
+_indice = None
+_generacion = 0
+
+
+def invalidar_indice():
+    """Descarta el índice en memoria: se reconstruye en la próxima búsqueda"""
+    global _indice, _generacion
+    with _lock:
+        _indice = None
+        _generacion += 1
+
+
+def get_indice():
+    """Índice invertido de todas las noticias (activas o no: el admin busca en todas)"""
+    global _indice
+    indice = _indice
+    if indice is not None:
+        return indice
+
+    from .models import Noticia
+
+    with _lock:
+        generacion = _generacion
+    indice = IndiceInvertido(
+        Noticia.objects.values_list('pk', 'titulo', 'descripcion_corta', 'contenido').iterator()
+    )
+    with _lock:
+        # Si se invalidó mientras se construía, se usa igual pero no se guarda
+        if generacion == _generacion:
+            _indice = indice
+    return indice
+
+
+def buscar_noticias(queryset, texto, ordenar=True):
+    """
+    Filtra el queryset por la búsqueda y anota `rango`.
+
+    Con `ordenar` las noticias más relevantes van primero (y luego las más
+    recientes); si no, se mantiene el orden del queryset.
+    """
+    if not terminos(texto):
+        return queryset.none()
+
+    if usa_postgres(queryset.db):
+        consulta = consulta_postgres(texto)
+        # ts_rank devuelve float4: como float8 el valor que lee psycopg2 vuelve
+        # idéntico en el cursor de paginación y los empates se comparan bien
+        queryset = queryset.filter(search_vector=consulta).annotate(
+            rango=Cast(SearchRank(F('search_vector'), consulta), FloatField())
+        )
+    else:
+        puntuaciones = get_indice().buscar(texto)
+        queryset = queryset.filter(pk__in=list(puntuaciones)).annotate(
+            rango=Case(
+                *[When(pk=pk, then=Value(puntuacion)) for pk, puntuacion in puntuaciones.items()],
+                default=Value(0.0), output_field=FloatField()
+            )
+        )
+
+    if ordenar:
+        queryset = queryset.order_by('-rango', '-fecha_publicacion')
+    return queryset
+
+
+async def abuscar_noticias(queryset, texto, ordenar=True):
+    """buscar_noticias() para vistas async: solo pasa a un hilo si hay que construir el índice en memoria"""
+    if usa_postgres(queryset.db) or _indice is not None:
+        return buscar_noticias(queryset, texto, ordenar)
+    return await sync_to_async(buscar_noticias)(queryset, texto, ordenar)
+
+
+def filtro_busqueda(texto, alias='default'):
+    """Q de las noticias que coinciden con la búsqueda (para combinar con otros filtros)"""
+    if not terminos(texto):
+        return Q(pk__in=[])
+    if usa_postgres(alias):
+        return Q(search_vector=consulta_postgres(texto))
+    return Q(pk__in=list(get_indice().buscar(texto)))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas de lectura de una noticia: palabras, minutos y extracto en texto plano.
+
+Se calculan una vez al guardar (Noticia.save, NoticiaQuerySet.bulk_create y
+update(contenido=...)) o en bloque con `manage.py noticias_lectura`, y se
+guardan en columnas: las listas no necesitan cargar `contenido`.
+"""
+from .busqueda import texto_plano
+
+
+PALABRAS_POR_MINUTO = 200
+LONGITUD_EXTRACTO = 280
+
+# Columnas de Noticia que se derivan de `contenido`
+CAMPOS_LECTURA = ('palabras', 'minutos_lectura', 'extracto')
+
+
+def recortar_por_palabras(texto, longitud):
+    """Recorta en el último espacio antes de `longitud` y añade '...' si se recortó"""
+    if len(texto) <= longitud:
+        return texto
+    recortado = texto[:longitud]
+    ultimo_espacio = recortado.rfind(' ')
+    if ultimo_espacio > 0:
+        recortado = recortado[:ultimo_espacio]
+    return f"{recortado}..."
+
+
+def metricas_lectura(contenido):
+    """{'palabras', 'minutos_lectura', 'extracto'} de un contenido HTML"""
+    palabras = texto_plano(contenido).split()
+    return {
+        'palabras': len(palabras),
+        'minutos_lectura': max(1, len(palabras) // PALABRAS_POR_MINUTO),
+        'extracto': recortar_por_palabras(' '.join(palabras), LONGITUD_EXTRACTO),
+    }
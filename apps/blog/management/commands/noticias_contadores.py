@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from apps.blog.models import Categoria, Noticia
+
+
+class Command(BaseCommand):
+    help = 'Noticias - Conciliar el contador de noticias activas de cada categoría'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--comprobar',
+            action='store_true',
+            help='Solo mostrar las diferencias, sin corregirlas'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Noticias - Contadores por categoría')
+        self.stdout.write('=' * 50)
+
+        with transaction.atomic():
+            # Bloquear antes de contar: un Noticia.save concurrente espera al bloqueo para
+            # mover el contador, así que no puede confirmarse entre el recuento y la corrección
+            categorias = list(Categoria.objects.select_for_update().order_by('pk'))
+            # Una sola consulta agrupada con los totales reales
+            totales = dict(
+                Noticia.objects.filter(activa=True, categoria__isnull=False)
+                .order_by().values_list('categoria').annotate(total=Count('pk'))
+            )
+
+            desajustadas = []
+            for categoria in categorias:
+                real = totales.get(categoria.pk, 0)
+                if categoria.noticias_activas_count != real:
+                    self.stdout.write(self.style.WARNING(
+                        f'  {categoria.nombre}: {categoria.noticias_activas_count} -> {real}'
+                    ))
+                    desajustadas.append(categoria)
+
+            if desajustadas and not options['comprobar']:
+                # El mismo recuento en un solo UPDATE que usan las operaciones en bloque
+                Categoria.objects.recalcular_contadores([categoria.pk for categoria in desajustadas])
+
+        if not desajustadas:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(categorias)} categorías: contadores correctos'))
+        elif options['comprobar']:
+            self.stdout.write(self.style.ERROR(f'❌ {len(desajustadas)} de {len(categorias)} categorías desajustadas'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(desajustadas)} de {len(categorias)} categorías corregidas'))
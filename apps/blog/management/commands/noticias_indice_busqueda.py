@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog.busqueda import actualizar_vector, get_indice, invalidar_indice, usa_postgres
+from apps.blog.models import Noticia
+
+
+class Command(BaseCommand):
+    help = 'Noticias - Recalcular el vector de búsqueda de texto completo en bloque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Noticias por transacción (default: 500)'
+        )
+        parser.add_argument(
+            '--solo-vacios',
+            action='store_true',
+            help='Solo las noticias sin vector (por ejemplo, cargadas con fixtures)'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser al menos 1')
+
+        self.stdout.write('Noticias - Índice de búsqueda')
+        self.stdout.write('=' * 50)
+        inicio = time.perf_counter()
+
+        if not usa_postgres():
+            # Sin PostgreSQL no hay columna que llenar: se comprueba el índice en memoria
+            invalidar_indice()
+            indice = get_indice()
+            self.stdout.write(self.style.WARNING(
+                'La base de datos no es PostgreSQL: la búsqueda usa el índice en memoria'
+            ))
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Índice en memoria: {indice.documentos:,} noticias, {len(indice.terminos):,} términos '
+                f'({time.perf_counter() - inicio:.2f} s)'
+            ))
+            return
+
+        noticias = Noticia.objects.all()
+        if options['solo_vacios']:
+            noticias = noticias.filter(search_vector__isnull=True)
+        ids = list(noticias.order_by('pk').values_list('pk', flat=True))
+
+        actualizadas = 0
+        for posicion in range(0, len(ids), options['lote']):
+            lote = ids[posicion:posicion + options['lote']]
+            actualizadas += actualizar_vector(Noticia.objects.filter(pk__in=lote))
+            self.stdout.write(f'  {actualizadas:,}/{len(ids):,}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {actualizadas:,} noticias indexadas ({time.perf_counter() - inicio:.2f} s)'
+        ))
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.blog.lectura import CAMPOS_LECTURA
+from apps.blog.models import Noticia
+
+
+class Command(BaseCommand):
+    help = 'Noticias - Recalcular palabras, minutos de lectura y extracto en bloque'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Noticias por bulk_update (default: 500)'
+        )
+        parser.add_argument(
+            '--solo-vacios',
+            action='store_true',
+            help='Solo las noticias sin métricas (palabras = 0)'
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser al menos 1')
+
+        self.stdout.write('Noticias - Métricas de lectura')
+        self.stdout.write('=' * 50)
+        inicio = time.perf_counter()
+
+        noticias = Noticia.objects.only('pk', 'contenido', *CAMPOS_LECTURA).order_by('pk')
+        if options['solo_vacios']:
+            noticias = noticias.filter(palabras=0)
+
+        total = actualizadas = 0
+        lote = []
+        for noticia in noticias.iterator(chunk_size=options['lote']):
+            total += 1
+            anteriores = [getattr(noticia, campo) for campo in CAMPOS_LECTURA]
+            noticia.actualizar_metricas_lectura()
+            if anteriores != [getattr(noticia, campo) for campo in CAMPOS_LECTURA]:
+                lote.append(noticia)
+            if len(lote) >= options['lote']:
+                actualizadas += Noticia.objects.bulk_update(lote, CAMPOS_LECTURA)
+                lote = []
+                self.stdout.write(f'  {total:,} revisadas')
+        if lote:
+            actualizadas += Noticia.objects.bulk_update(lote, CAMPOS_LECTURA)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {actualizadas:,} de {total:,} noticias actualizadas ({time.perf_counter() - inicio:.2f} s)'
+        ))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from apps.blog.busqueda import get_indice, invalidar_indice, terminos, usa_postgres
+from apps.blog.models import Categoria, Noticia
+
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+# Noticias de prueba: se crean dentro de una transacción que se revierte al terminar
+PREFIJO_PRUEBA = 'listas-ligeras-prueba'
+NOTICIAS_PRUEBA = 3
+
+
+class Command(BaseCommand):
+    help = (
+        'Noticias - Comprobar que las páginas de listas no cargan la columna contenido '
+        '(con noticias de prueba que se descartan al terminar)'
+    )
+
+    def sembrar(self):
+        """Categoría y noticias activas de prueba: la comprobación nunca corre sobre una lista vacía"""
+        categoria = Categoria.objects.create(nombre=f'{PREFIJO_PRUEBA} categoría', slug=PREFIJO_PRUEBA)
+        for numero in range(NOTICIAS_PRUEBA):
+            Noticia.objects.create(
+                titulo=f'Fotovoltaica prueba {numero}',
+                slug=f'{PREFIJO_PRUEBA}-{numero}',
+                descripcion_corta='Noticia de prueba de las listas ligeras',
+                contenido='<p>Contenido de prueba con <strong>energ&iacute;a</strong> solar.</p>' * 50,
+                categoria=categoria,
+                activa=True,
+                destacada=numero == 0,
+            )
+
+    def paginas(self):
+        """(nombre, url, cabeceras) de cada lista de noticias"""
+        lista = reverse('blog:lista')
+        paginas = [
+            ('Inicio (destacadas)', reverse('core:home'), {}),
+            ('Lista', lista, {}),
+            ('Filtro AJAX', reverse('blog:filtrar_ajax'), AJAX),
+            ('Página AJAX', reverse('blog:pagina_ajax'), AJAX),
+        ]
+
+        noticia = Noticia.objects.filter(activa=True).only('titulo').first()
+        if noticia is not None:
+            termino = next(iter(terminos(noticia.titulo)), '')
+            if termino:
+                paginas.append(('Búsqueda', f'{lista}?q={termino}', {}))
+                paginas.append(('Búsqueda AJAX', f"{reverse('blog:filtrar_ajax')}?q={termino}", AJAX))
+
+        categoria = Categoria.objects.filter(activa=True, noticias_activas_count__gt=0).first()
+        if categoria is not None:
+            paginas.append(('Categoría', categoria.get_absolute_url(), {}))
+        return paginas
+
+    def handle(self, *args, **options):
+        self.stdout.write('Noticias - Columnas cargadas por las listas')
+        self.stdout.write('=' * 50)
+
+        try:
+            with transaction.atomic():
+                self.sembrar()
+                fallidas = self.comprobar()
+                # Nada de lo creado queda en la base de datos configurada
+                transaction.set_rollback(True)
+        finally:
+            if not usa_postgres():
+                # El índice en memoria incluyó las noticias de prueba
+                invalidar_indice()
+
+        if fallidas:
+            raise CommandError(f'{len(fallidas)} listas cargan contenido: {", ".join(fallidas)}')
+        self.stdout.write(self.style.SUCCESS('✅ Ninguna lista carga contenido'))
+
+    def comprobar(self):
+        """Pide cada lista y devuelve los nombres de las que fallan"""
+        if not Noticia.objects.filter(activa=True).exists():
+            raise CommandError('Sin noticias activas: la comprobación no puede ejecutarse')
+
+        if not usa_postgres():
+            # El índice en memoria de SQLite lee contenido una vez por proceso, no por página
+            invalidar_indice()
+            get_indice()
+
+        # Columna prohibida tal como aparece en la lista del SELECT
+        columna = f"{connection.ops.quote_name(Noticia._meta.db_table)}.{connection.ops.quote_name('contenido')}"
+        cliente = Client(raise_request_exception=True)
+        fallidas = []
+
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for nombre, url, cabeceras in self.paginas():
+                with CaptureQueriesContext(connection) as consultas:
+                    respuesta = cliente.get(url, secure=True, **cabeceras)
+                if respuesta.status_code != 200:
+                    self.stdout.write(self.style.ERROR(f'❌ {nombre} ({url}): HTTP {respuesta.status_code}'))
+                    fallidas.append(nombre)
+                    continue
+
+                pesadas = [
+                    consulta['sql'] for consulta in consultas.captured_queries
+                    if columna in consulta['sql'].split(' FROM ', 1)[0]
+                ]
+                if pesadas:
+                    self.stdout.write(self.style.ERROR(f'❌ {nombre} ({url}): {len(pesadas)} consultas con contenido'))
+                    self.stdout.write(f'   {pesadas[0][:200]}...')
+                    fallidas.append(nombre)
+                else:
+                    self.stdout.write(f'✅ {nombre}: {len(consultas.captured_queries)} consultas sin contenido')
+        return fallidas
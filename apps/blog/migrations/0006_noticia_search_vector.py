@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 18:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.blog.busqueda import actualizar_vector
+
+
+INDICE_BUSQUEDA = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='blog_noticia_busqueda'
+)
+
+
+def crear_indice(apps, schema_editor):
+    """Índice GIN y vectores de las noticias existentes (los demás motores usan el índice en memoria)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Noticia = apps.get_model('blog', 'Noticia')
+    schema_editor.add_index(Noticia, INDICE_BUSQUEDA)
+    actualizar_vector(Noticia.objects.all())
+
+
+def borrar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(apps.get_model('blog', 'Noticia'), INDICE_BUSQUEDA)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_remove_noticia_imagen_noticia_archivo_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noticia',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='noticia', index=INDICE_BUSQUEDA),
+            ],
+            database_operations=[
+                migrations.RunPython(crear_indice, borrar_indice),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:10
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def contar_noticias(apps, schema_editor):
+    """Contadores iniciales con una consulta agrupada"""
+    Categoria = apps.get_model('blog', 'Categoria')
+    Noticia = apps.get_model('blog', 'Noticia')
+    totales = (
+        Noticia.objects.filter(activa=True, categoria__isnull=False)
+        .values('categoria').annotate(total=Count('pk'))
+    )
+    for fila in totales:
+        Categoria.objects.filter(pk=fila['categoria']).update(noticias_activas_count=fila['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_noticia_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoria',
+            name='noticias_activas_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(contar_noticias, migrations.RunPython.noop),
+    ]
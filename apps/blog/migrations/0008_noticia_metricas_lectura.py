@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-17 19:45
+
+from django.db import migrations, models
+
+from apps.blog.lectura import CAMPOS_LECTURA, metricas_lectura
+
+
+def calcular_metricas(apps, schema_editor):
+    """Métricas de lectura de las noticias existentes"""
+    Noticia = apps.get_model('blog', 'Noticia')
+    lote = []
+    for noticia in Noticia.objects.only('pk', 'contenido').iterator(chunk_size=500):
+        for campo, valor in metricas_lectura(noticia.contenido).items():
+            setattr(noticia, campo, valor)
+        lote.append(noticia)
+        if len(lote) >= 500:
+            Noticia.objects.bulk_update(lote, CAMPOS_LECTURA)
+            lote = []
+    if lote:
+        Noticia.objects.bulk_update(lote, CAMPOS_LECTURA)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_categoria_noticias_activas_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='noticia',
+            name='palabras',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='minutos_lectura',
+            field=models.PositiveSmallIntegerField(default=1, editable=False),
+        ),
+        migrations.AddField(
+            model_name='noticia',
+            name='extracto',
+            field=models.CharField(blank=True, editable=False, help_text='Inicio del contenido en texto plano', max_length=300),
+        ),
+        migrations.RunPython(calcular_metricas, migrations.RunPython.noop),
+    ]
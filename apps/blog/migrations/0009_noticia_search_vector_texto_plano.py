@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:10
+
+from django.db import migrations
+
+from apps.blog.busqueda import actualizar_vector
+
+
+def recalcular_vectores(apps, schema_editor):
+    """Vectores con el contenido en texto plano: los anteriores indexaban entidades HTML (&iacute;...)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    actualizar_vector(apps.get_model('blog', 'Noticia').objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_noticia_metricas_lectura'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_vectores, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.utils import timezone
 from django.urls import reverse
 from django.utils.text import slugify
 from django.core.exceptions import ValidationError
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from tinymce.models import HTMLField
 from .utils import VideoURLValidator, validate_public_video_url, clean_video_url
+from .lectura import CAMPOS_LECTURA, metricas_lectura
+from .busqueda import CAMPOS_BUSQUEDA, reindexar
 import re
 import os
 import logging
@@ -30,6 +36,43 @@ def validate_multimedia_file(archivo):
         )
 
 
+# Campos de Noticia que deciden en qué contador de Categoria cuenta
+CAMPOS_CONTADOR = {'activa', 'categoria', 'categoria_id'}
+
+# Columnas que pintan las tarjetas de noticias (NoticiaQuerySet.tarjetas): sin contenido,
+# SEO ni vector de búsqueda. Incluye lo que leen get_thumbnail_url y multimedia_type
+CAMPOS_TARJETA = (
+    'titulo', 'slug', 'descripcion_corta', 'extracto', 'autor', 'fecha_publicacion', 'destacada',
+    'minutos_lectura', 'tipo_multimedia', 'archivo', 'thumbnail_custom', 'video_url',
+    'video_platform', 'video_thumbnail_url', 'video_vimeo_url', 'video_vimeo_id', 'categoria',
+)
+CAMPOS_TARJETA_CATEGORIA = ('nombre', 'slug', 'icono', 'color')
+
+
+class CategoriaQuerySet(models.QuerySet):
+    """Mantenimiento de Categoria.noticias_activas_count"""
+    
+    def mover_contador(self, anterior, actual):
+        """Pasa una noticia activa del contador de `anterior` al de `actual` (None: no cuenta)"""
+        if anterior == actual:
+            return
+        if anterior is not None:
+            self.filter(pk=anterior).update(
+                noticias_activas_count=Greatest(F('noticias_activas_count') - 1, 0)
+            )
+        if actual is not None:
+            self.filter(pk=actual).update(noticias_activas_count=F('noticias_activas_count') + 1)
+    
+    def recalcular_contadores(self, pks=None):
+        """Recuenta las noticias activas de las categorías `pks` (None: todas) en un solo UPDATE"""
+        categorias = self if pks is None else self.filter(pk__in=pks)
+        activas = (
+            Noticia.objects.filter(categoria=OuterRef('pk'), activa=True)
+            .order_by().values('categoria').annotate(total=Count('pk')).values('total')
+        )
+        return categorias.update(noticias_activas_count=Coalesce(Subquery(activas), 0))
+
+
 class Categoria(models.Model):
     """Modelo para categorias del blog"""
     nombre = models.CharField(max_length=100, unique=True)
@@ -41,6 +84,11 @@ class Categoria(models.Model):
     activa = models.BooleanField(default=True, help_text="Si esta marcada, la categoria aparece en el sitio")
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Desnormalizado: lo mantienen Noticia.save/delete y NoticiaQuerySet (comando noticias_contadores)
+    noticias_activas_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = CategoriaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Categoria"
         verbose_name_plural = "Categorias"
@@ -63,7 +111,83 @@ class Categoria(models.Model):
     
     @property
     def noticias_count(self):
-        return self.noticia_set.filter(activa=True).count()
+        return self.noticias_activas_count
+
+
+class NoticiaQuerySet(models.QuerySet):
+    """Las operaciones en bloque recuentan los contadores de las categorías afectadas y reindexan la búsqueda"""
+    
+    def tarjetas(self):
+        """Solo las columnas de las tarjetas y de su categoría (las listas nunca cargan contenido)"""
+        return self.select_related('categoria').only(
+            *CAMPOS_TARJETA,
+            *(f'categoria__{campo}' for campo in CAMPOS_TARJETA_CATEGORIA)
+        )
+    
+    def _categorias(self):
+        return set(self.order_by().values_list('categoria_id', flat=True).distinct()) - {None}
+    
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('contenido'), str):
+            # Métricas de lectura del nuevo contenido (igual para todas las filas)
+            kwargs.update(metricas_lectura(kwargs['contenido']))
+        busqueda = bool(CAMPOS_BUSQUEDA & kwargs.keys())
+        if not busqueda and not CAMPOS_CONTADOR & kwargs.keys():
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            if busqueda:
+                # Antes de actualizar: el cambio puede sacar filas del filtro
+                ids = list(self.order_by().values_list('pk', flat=True))
+            filas = self._actualizar(kwargs)
+            if busqueda:
+                reindexar(self.model._base_manager.using(self.db).filter(pk__in=ids))
+        return filas
+    update.alters_data = True
+    
+    def _actualizar(self, kwargs):
+        """update() con el recuento de los contadores si cambia activa o categoría"""
+        if not CAMPOS_CONTADOR & kwargs.keys():
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            categorias = self._categorias()
+            filas = super().update(**kwargs)
+            nueva = kwargs.get('categoria', kwargs.get('categoria_id'))
+            if isinstance(nueva, models.Model):
+                nueva = nueva.pk
+            if nueva is None or isinstance(nueva, int):
+                categorias.add(nueva)
+                Categoria.objects.using(self.db).recalcular_contadores(categorias - {None})
+            else:
+                # Expresión: no se sabe a qué categorías van, se recuentan todas
+                Categoria.objects.using(self.db).recalcular_contadores()
+        return filas
+    
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            categorias = self._categorias()
+            resultado = super().delete()
+            Categoria.objects.using(self.db).recalcular_contadores(categorias)
+        return resultado
+    delete.alters_data = True
+    delete.queryset_only = True
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.actualizar_metricas_lectura()
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            categorias = {obj.categoria_id for obj in objs if obj.activa and obj.categoria_id}
+            if categorias:
+                Categoria.objects.using(self.db).recalcular_contadores(categorias)
+            # Sin señales post_save: el vector de búsqueda se calcula aquí
+            # (con ignore_conflicts las filas descartadas no traen pk)
+            ids = [obj.pk for obj in objs if obj.pk is not None]
+            if ids:
+                reindexar(self.model._base_manager.using(self.db).filter(pk__in=ids))
+        return objs
 
 
 class Noticia(models.Model):
@@ -205,6 +329,21 @@ class Noticia(models.Model):
         help_text="Orden manual (menor numero = mas arriba)"
     )
     
+    # Métricas de lectura derivadas de contenido (apps.blog.lectura): las listas no cargan el HTML
+    palabras = models.PositiveIntegerField(default=0, editable=False)
+    minutos_lectura = models.PositiveSmallIntegerField(default=1, editable=False)
+    extracto = models.CharField(
+        max_length=300,
+        blank=True,
+        editable=False,
+        help_text="Inicio del contenido en texto plano"
+    )
+    
+    # Búsqueda de texto completo (PostgreSQL): se mantiene desde apps.blog.signals
+    search_vector = SearchVectorField(null=True, editable=False)
+    
+    objects = NoticiaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = "Noticia"
         verbose_name_plural = "Noticias"
@@ -220,11 +359,40 @@ class Noticia(models.Model):
             models.Index(fields=['categoria', 'activa', '-fecha_publicacion'], name='blog_noticia_categoria'),
             # Índice compuesto para la query más común: activa + categoria + fecha
             models.Index(fields=['activa', 'categoria', '-fecha_publicacion'], name='blog_noticia_main_query'),
+            # Índice GIN para la búsqueda de texto completo (solo se crea en PostgreSQL)
+            GinIndex(fields=['search_vector'], name='blog_noticia_busqueda'),
         ]
     
     def __str__(self):
         return self.titulo
     
+    def actualizar_metricas_lectura(self):
+        """Recalcula palabras, minutos de lectura y extracto desde contenido"""
+        for campo, valor in metricas_lectura(self.contenido).items():
+            setattr(self, campo, valor)
+    
+    def categoria_contada(self):
+        """Categoría en cuyo contador de activas cuenta la noticia (None si no cuenta)"""
+        return self.categoria_id if self.activa else None
+    
+    def _categoria_contada_en_bd(self, using):
+        """
+        categoria_contada() de la fila guardada en `using` (None si todavía no existe).
+        
+        Se lee bloqueando la fila: dos guardados simultáneos no mueven el
+        contador desde el mismo estado.
+        """
+        if self.pk is None:
+            return None
+        fila = (
+            Noticia._base_manager.db_manager(using).select_for_update()
+            .filter(pk=self.pk).values_list('activa', 'categoria_id').first()
+        )
+        if fila is None:
+            return None
+        activa, categoria_id = fila
+        return categoria_id if activa else None
+    
     def save(self, *args, **kwargs):
         # Generar slug automaticamente si no existe
         if not self.slug:
@@ -264,7 +432,25 @@ class Noticia(models.Model):
         if not self.meta_descripcion and self.descripcion_corta:
             self.meta_descripcion = self.descripcion_corta[:160]
         
-        super().save(*args, **kwargs)
+        # Métricas de lectura (si el contenido está cargado y se va a guardar)
+        update_fields = kwargs.get('update_fields')
+        if 'contenido' not in self.get_deferred_fields() and (
+            update_fields is None or 'contenido' in update_fields
+        ):
+            self.actualizar_metricas_lectura()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(CAMPOS_LECTURA)
+        
+        # Contador de noticias activas de la categoría, en la misma transacción
+        if update_fields is not None and not CAMPOS_CONTADOR & set(update_fields):
+            super().save(*args, **kwargs)
+            return
+        # Misma base que elige Model.save/delete para la fila
+        using = kwargs.get('using') or router.db_for_write(Noticia, instance=self)
+        with transaction.atomic(using=using):
+            anterior = self._categoria_contada_en_bd(using)
+            super().save(*args, **kwargs)
+            Categoria.objects.using(using).mover_contador(anterior, self.categoria_contada())
     
     def get_absolute_url(self):
         return reverse('blog:detalle', kwargs={'slug': self.slug})
@@ -276,10 +462,8 @@ class Noticia(models.Model):
     
     @property
     def tiempo_lectura(self):
-        """Estima el tiempo de lectura en minutos"""
-        palabras = len(self.contenido.split())
-        minutos = max(1, palabras // 200)  # Asumiendo 200 palabras por minuto
-        return f"{minutos} min de lectura"
+        """Tiempo de lectura estimado (minutos_lectura se calcula al guardar)"""
+        return f"{self.minutos_lectura} min de lectura"
     
     @property
     def archivo_url(self):
@@ -459,8 +643,13 @@ class Noticia(models.Model):
             if total_archivos > 0:
                 logger.info(f'Encontrados {total_archivos} archivos EstefaniPUBLI para eliminar (imágenes: {len(archivos_encontrados)}, videos: {len(videos_encontrados)}, thumbnails: {len(thumbnails_encontrados)})')
         
-        # Eliminar la noticia de la base de datos primero
-        super().delete(*args, **kwargs)
+        # Eliminar la noticia de la base de datos primero (y descontarla de su categoría)
+        # Misma base que elige Model.save/delete para la fila
+        using = kwargs.get('using') or router.db_for_write(Noticia, instance=self)
+        with transaction.atomic(using=using):
+            anterior = self._categoria_contada_en_bd(using)
+            super().delete(*args, **kwargs)
+            Categoria.objects.using(using).mover_contador(anterior, None)
         
         # Ahora eliminar los archivos físicos
         archivos_eliminados = 0
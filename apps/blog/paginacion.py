@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Paginación por cursor (keyset) de las listas de noticias.
+
+Las noticias se ordenan por (fecha_publicacion, id) descendente y cada página
+pide las filas posteriores al último par de la anterior: sin OFFSET ni
+COUNT(*), así que una página profunda cuesta lo mismo que la primera (el
+rango sobre fecha_publicacion usa el índice blog_noticia_activa_fecha). Con
+búsqueda el orden empieza por la relevancia (`rango`) y el cursor la incluye.
+
+El cursor es opaco para el cliente: JSON en base64 url-safe.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+CAMPOS_ORDEN = ('fecha_publicacion', 'id')
+CAMPOS_ORDEN_BUSQUEDA = ('rango', 'fecha_publicacion', 'id')
+
+
+class CursorInvalido(ValueError):
+    """Cursor que no se puede decodificar o no corresponde al orden de la lista"""
+
+
+def tamano_pagina():
+    return getattr(settings, 'NOTICIAS_POR_PAGINA', 12)
+
+
+def campos_orden(queryset):
+    """Campos del cursor: con búsqueda (anotación `rango`) primero la relevancia"""
+    return CAMPOS_ORDEN_BUSQUEDA if 'rango' in queryset.query.annotations else CAMPOS_ORDEN
+
+
+def codificar_cursor(noticia, campos):
+    valores = []
+    for campo in campos:
+        valor = getattr(noticia, campo)
+        valores.append(valor.isoformat() if isinstance(valor, datetime) else valor)
+    return base64.urlsafe_b64encode(json.dumps(valores).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor, campos):
+    """Valores del cursor en el orden de `campos`; lanza CursorInvalido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        if not isinstance(valores, list) or len(valores) != len(campos):
+            raise ValueError('Longitud incorrecta')
+        decodificados = []
+        for campo, valor in zip(campos, valores):
+            if campo == 'fecha_publicacion':
+                valor = datetime.fromisoformat(valor)
+            elif campo == 'id':
+                valor = int(valor)
+            else:
+                valor = float(valor)
+            decodificados.append(valor)
+        return decodificados
+    except (ValueError, TypeError) as e:
+        raise CursorInvalido(f'Cursor inválido: {e}')
+
+
+def filtro_posteriores(campos, valores):
+    """
+    Filas que van después del cursor en orden descendente:
+    (a < va) OR (a = va AND b < vb) OR (a = va AND b = vb AND c < vc) ...
+    """
+    condicion = Q()
+    iguales = {}
+    for campo, valor in zip(campos, valores):
+        condicion |= Q(**iguales, **{f'{campo}__lt': valor})
+        iguales[campo] = valor
+    return condicion
+
+
+def _consulta_pagina(queryset, cursor, tamano):
+    """Queryset ordenado, filtrado tras el cursor y limitado a tamano + 1 filas"""
+    campos = campos_orden(queryset)
+    queryset = queryset.order_by(*(f'-{campo}' for campo in campos))
+    if cursor:
+        valores = decodificar_cursor(cursor, campos)
+        if campos[0] == 'fecha_publicacion':
+            # Condición redundante que acota el rango del índice sobre la fecha
+            queryset = queryset.filter(fecha_publicacion__lte=valores[0])
+        queryset = queryset.filter(filtro_posteriores(campos, valores))
+    return queryset[:tamano + 1], campos
+
+
+def _cortar(noticias, tamano, campos):
+    if len(noticias) > tamano:
+        noticias = noticias[:tamano]
+        return noticias, codificar_cursor(noticias[-1], campos)
+    return noticias, None
+
+
+def pagina_keyset(queryset, cursor=None, tamano=None):
+    """
+    (noticias de la página, cursor de la siguiente o None).
+
+    Se pide una fila de más para saber si hay otra página sin contar.
+    Lanza CursorInvalido si el cursor no es válido.
+    """
+    tamano = tamano or tamano_pagina()
+    consulta, campos = _consulta_pagina(queryset, cursor, tamano)
+    return _cortar(list(consulta), tamano, campos)
+
+
+async def apagina_keyset(queryset, cursor=None, tamano=None):
+    """pagina_keyset() con el ORM async"""
+    tamano = tamano or tamano_pagina()
+    consulta, campos = _consulta_pagina(queryset, cursor, tamano)
+    return _cortar([noticia async for noticia in consulta], tamano, campos)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Señales que mantienen la búsqueda de noticias al día
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .busqueda import (
+    CAMPOS_BUSQUEDA, actualizar_vector, invalidar_indice, usa_postgres, vector_busqueda
+)
+from .models import Noticia
+
+
+def noticia_guardada(sender, instance, **kwargs):
+    """Recalcula el vector de búsqueda (PostgreSQL) o invalida el índice en memoria"""
+    if kwargs.get('raw'):
+        return
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and not CAMPOS_BUSQUEDA & set(update_fields):
+        return
+    if usa_postgres(kwargs.get('using', 'default')):
+        noticia = sender.objects.using(kwargs.get('using', 'default')).filter(pk=instance.pk)
+        if 'contenido' in instance.get_deferred_fields():
+            actualizar_vector(noticia)
+        else:
+            # Contenido ya en memoria: el texto plano se calcula sin volver a leerlo
+            noticia.update(search_vector=vector_busqueda(instance.contenido))
+    else:
+        transaction.on_commit(invalidar_indice)
+
+
+def noticia_borrada(sender, **kwargs):
+    if not usa_postgres(kwargs.get('using', 'default')):
+        transaction.on_commit(invalidar_indice)
+
+
+post_save.connect(noticia_guardada, sender=Noticia, dispatch_uid='blog_busqueda_save')
+post_delete.connect(noticia_borrada, sender=Noticia, dispatch_uid='blog_busqueda_delete')
@@ -31,29 +31,6 @@ def trim(value):
     return str(value).strip()
 
 
-@register.filter
-def truncate_smart(value, length=100):
-    """
-    Trunca texto de manera inteligente, cortando por palabras
-    Uso: {{ descripcion|truncate_smart:150 }}
-    """
-    if not value:
-        return ''
-    
-    value = str(value)
-    if len(value) <= length:
-        return value
-    
-    # Buscar el último espacio antes del límite
-    truncated = value[:length]
-    last_space = truncated.rfind(' ')
-    
-    if last_space > 0:
-        truncated = truncated[:last_space]
-    
-    return f"{truncated}..."
-
-
 @register.filter
 def extract_video_id(url, platform='youtube'):
     """
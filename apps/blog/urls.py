@@ -10,6 +10,9 @@ urlpatterns = [
     # Filtrado AJAX de noticias
     path('filtrar/', views.filtrar_noticias_ajax, name='filtrar_ajax'),
     
+    # Siguiente página de noticias (scroll infinito)
+    path('pagina/', views.pagina_noticias_ajax, name='pagina_ajax'),
+    
     # Noticias por categoría
     path('categoria/<slug:categoria_slug>/', views.NoticiasPorCategoriaView.as_view(), name='por_categoria'),
     
@@ -1,53 +1,66 @@
 from django.shortcuts import render, get_object_or_404
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
 from django.http import JsonResponse
 from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+import datetime
 from .models import Noticia, Categoria
+from .busqueda import buscar_noticias, abuscar_noticias
+from .paginacion import pagina_keyset, apagina_keyset, CursorInvalido
 
 
-class NoticiasListView(ListView):
+def filtrar_por_parametros(queryset, parametros):
+    """Filtros de categoría y período de la lista de noticias (comunes a las vistas AJAX)"""
+    # Filtro por categoría
+    categoria_slug = parametros.get('categoria')
+    if categoria_slug and categoria_slug != 'todas':
+        queryset = queryset.filter(categoria__slug=categoria_slug)
+    
+    # Filtro por fecha
+    fecha_filtro = parametros.get('fecha')
+    if fecha_filtro == 'este-mes':
+        ahora = timezone.now()
+        inicio_mes = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        queryset = queryset.filter(fecha_publicacion__gte=inicio_mes)
+    elif fecha_filtro == 'ultimo-mes':
+        hace_un_mes = timezone.now() - datetime.timedelta(days=30)
+        queryset = queryset.filter(fecha_publicacion__gte=hace_un_mes)
+    
+    return queryset
+
+
+class PaginaCursorMixin:
+    """Primera página de la lista con paginación por cursor (la siguiente llega por AJAX)"""
+    
+    def get_context_data(self, **kwargs):
+        cursor = self.request.GET.get('cursor')
+        try:
+            noticias, siguiente = pagina_keyset(self.object_list, cursor)
+        except CursorInvalido:
+            noticias, siguiente = pagina_keyset(self.object_list)
+        context = super().get_context_data(object_list=noticias, **kwargs)
+        context['siguiente_cursor'] = siguiente
+        return context
+
+
+class NoticiasListView(PaginaCursorMixin, ListView):
     """Vista principal para la lista de noticias"""
     model = Noticia
     template_name = 'blog/noticias_lista.html'
     context_object_name = 'noticias'
-    paginate_by = None  # Sin paginación según requerimientos
+    paginate_by = None  # Paginación por cursor (PaginaCursorMixin): sin COUNT ni OFFSET
     
     def get_queryset(self):
-        """Filtra noticias activas con relaciones optimizadas"""
-        queryset = Noticia.objects.filter(
-            activa=True
-        ).select_related('categoria').order_by('-fecha_publicacion', 'orden')
-        
-        # Filtro por categoría
-        categoria_slug = self.request.GET.get('categoria')
-        if categoria_slug and categoria_slug != 'todas':
-            queryset = queryset.filter(categoria__slug=categoria_slug)
-        
-        # Filtro por fecha
-        fecha_filtro = self.request.GET.get('fecha')
-        if fecha_filtro and fecha_filtro != 'todas':
-            if fecha_filtro == 'este-mes':
-                from django.utils import timezone
-                import datetime
-                ahora = timezone.now()
-                inicio_mes = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                queryset = queryset.filter(fecha_publicacion__gte=inicio_mes)
-            elif fecha_filtro == 'ultimo-mes':
-                from django.utils import timezone
-                import datetime
-                ahora = timezone.now()
-                hace_un_mes = ahora - datetime.timedelta(days=30)
-                queryset = queryset.filter(fecha_publicacion__gte=hace_un_mes)
+        """Filtra noticias activas: solo las columnas de las tarjetas"""
+        queryset = Noticia.objects.filter(activa=True).tarjetas()
+        queryset = filtrar_por_parametros(queryset, self.request.GET)
         
-        # Búsqueda por texto
+        # Búsqueda de texto completo: las más relevantes primero
         busqueda = self.request.GET.get('q')
         if busqueda:
-            queryset = queryset.filter(
-                Q(titulo__icontains=busqueda) | 
-                Q(descripcion_corta__icontains=busqueda) |
-                Q(contenido__icontains=busqueda)
-            )
+            queryset = buscar_noticias(queryset, busqueda)
         
         return queryset
     
@@ -78,14 +91,10 @@ class NoticiasListView(ListView):
         context['noticias_destacadas'] = Noticia.objects.filter(
             destacada=True,
             activa=True
-        )[:3]
+        ).tarjetas()[:3]
         
-        # Categorías con conteo para sidebar
-        categorias_con_conteo = []
-        for categoria in context['categorias']:
-            categoria.noticias_count_activas = categoria.noticia_set.filter(activa=True).count()
-            categorias_con_conteo.append(categoria)
-        context['categorias_con_conteo'] = categorias_con_conteo
+        # Categorías con conteo para sidebar (contador desnormalizado: la misma consulta del filtro)
+        context['categorias_con_conteo'] = context['categorias']
         
         return context
 
@@ -111,7 +120,7 @@ class NoticiaDetailView(DetailView):
             context['noticias_relacionadas'] = Noticia.objects.filter(
                 categoria=self.object.categoria,
                 activa=True
-            ).exclude(pk=self.object.pk)[:3]
+            ).exclude(pk=self.object.pk).tarjetas()[:3]
         else:
             context['noticias_relacionadas'] = []
         
@@ -176,12 +185,12 @@ class NoticiaDetailView(DetailView):
         return json.dumps(schema, indent=2)
 
 
-class NoticiasPorCategoriaView(ListView):
+class NoticiasPorCategoriaView(PaginaCursorMixin, ListView):
     """Vista para noticias filtradas por categoría"""
     model = Noticia
     template_name = 'blog/noticias_categoria.html'
     context_object_name = 'noticias'
-    paginate_by = None
+    paginate_by = None  # Paginación por cursor (PaginaCursorMixin)
     
     def get_queryset(self):
         """Filtra noticias por categoría"""
@@ -194,7 +203,7 @@ class NoticiasPorCategoriaView(ListView):
         return Noticia.objects.filter(
             categoria=self.categoria,
             activa=True
-        ).select_related('categoria').order_by('-fecha_publicacion')
+        ).tarjetas()
     
     def get_context_data(self, **kwargs):
         """Añade contexto adicional"""
@@ -212,43 +221,20 @@ class NoticiasPorCategoriaView(ListView):
         return context
 
 
-def filtrar_noticias_ajax(request):
-    """Vista AJAX para filtrado dinámico de noticias"""
+async def filtrar_noticias_ajax(request):
+    """Vista AJAX para filtrado dinámico de noticias (async: consulta con el ORM async)"""
     if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
         return JsonResponse({'error': 'Solo peticiones AJAX'}, status=400)
     
-    # Obtener parámetros
-    categoria_slug = request.GET.get('categoria', 'todas')
-    fecha_filtro = request.GET.get('fecha', 'todas')
-    busqueda = request.GET.get('q', '')
-    
-    # Construir queryset
-    queryset = Noticia.objects.filter(activa=True).select_related('categoria')
-    
-    # Aplicar filtros
-    if categoria_slug != 'todas':
-        queryset = queryset.filter(categoria__slug=categoria_slug)
-    
-    if fecha_filtro != 'todas':
-        from django.utils import timezone
-        import datetime
-        ahora = timezone.now()
-        
-        if fecha_filtro == 'este-mes':
-            inicio_mes = ahora.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            queryset = queryset.filter(fecha_publicacion__gte=inicio_mes)
-        elif fecha_filtro == 'ultimo-mes':
-            hace_un_mes = ahora - datetime.timedelta(days=30)
-            queryset = queryset.filter(fecha_publicacion__gte=hace_un_mes)
+    # Construir queryset con los filtros (solo las columnas de las tarjetas)
+    queryset = Noticia.objects.filter(activa=True).tarjetas()
+    queryset = filtrar_por_parametros(queryset, request.GET)
     
+    # Búsqueda por relevancia; primera página por cursor (la siguiente la pide el scroll infinito)
+    busqueda = request.GET.get('q', '')
     if busqueda:
-        queryset = queryset.filter(
-            Q(titulo__icontains=busqueda) | 
-            Q(descripcion_corta__icontains=busqueda)
-        )
-    
-    # Ordenar y limitar
-    noticias = queryset.order_by('-fecha_publicacion')[:20]
+        queryset = await abuscar_noticias(queryset, busqueda)
+    noticias, siguiente = await apagina_keyset(queryset)
     
     # Serializar datos
     data = []
@@ -257,6 +243,8 @@ def filtrar_noticias_ajax(request):
             'id': noticia.id,
             'titulo': noticia.titulo,
             'descripcion_corta': noticia.descripcion_corta,
+            # Inicio del contenido en texto plano, recortado al guardar (noticias.js lo inserta como HTML)
+            'extracto': escape(noticia.extracto or noticia.descripcion_corta),
             'url': noticia.get_absolute_url(),
             'fecha': noticia.fecha_formateada,
             'categoria': {
@@ -269,7 +257,33 @@ def filtrar_noticias_ajax(request):
     
     return JsonResponse({
         'noticias': data,
-        'total': len(data)
+        'total': len(data),
+        'siguiente': siguiente
+    })
+
+
+async def pagina_noticias_ajax(request):
+    """Vista AJAX del scroll infinito: tarjetas de la página siguiente ya renderizadas"""
+    if request.headers.get('X-Requested-With') != 'XMLHttpRequest':
+        return JsonResponse({'error': 'Solo peticiones AJAX'}, status=400)
+    
+    queryset = Noticia.objects.filter(activa=True).tarjetas()
+    queryset = filtrar_por_parametros(queryset, request.GET)
+    busqueda = request.GET.get('q', '')
+    if busqueda:
+        queryset = await abuscar_noticias(queryset, busqueda)
+    
+    try:
+        noticias, siguiente = await apagina_keyset(queryset, request.GET.get('cursor'))
+    except CursorInvalido as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    # Misma plantilla de tarjeta que la primera página
+    html = render_to_string('blog/components/noticias_pagina.html', {'noticias': noticias})
+    return JsonResponse({
+        'html': html,
+        'cantidad': len(noticias),
+        'siguiente': siguiente
     })
 
 
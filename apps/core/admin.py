@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
-from django.contrib import admin
-from django.utils.html import format_html
+from django.contrib import admin, messages
+from django.contrib.admin.actions import delete_selected
+from django.contrib.admin.utils import unquote
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 from django.db import models
 from django.forms import TextInput, Textarea
+from apps.simulador.engine import validar_bandas
 from .models import (
     Project, HomePortada, SimuladorConfig, CostoInstalacion,
-    FactorUbicacion, FactorOrientacion, AnguloTejado
+    FactorUbicacion, FactorOrientacion, AnguloTejado, TarifaElectrica, EscalonTarifa,
+    SimulacionGuardada, EventoSimulacion, ResumenDiarioSimulaciones
+)
+from .forms import (
+    CostoInstalacionAdminForm, CostoInstalacionChangelistFormSet, EscalonTarifaInlineFormSet
 )
 
 
@@ -201,17 +210,21 @@ class HomePortadaAdmin(admin.ModelAdmin):
 
 @admin.register(SimuladorConfig)
 class SimuladorConfigAdmin(admin.ModelAdmin):
-    """Administrador para configuración del simulador"""
+    """Administrador para configuración del simulador (cada guardado crea una versión nueva)"""
     
     list_display = [
+        'version',
         'nombre', 
         'activa_display', 
         'precio_kwh', 
         'horas_sol_promedio',
         'eficiencia_panel_display',
-        'fecha_actualizacion'
+        'restaurada_de',
+        'fecha_creacion'
     ]
     
+    actions = ['restaurar_version', 'comparar_versiones']
+    
     list_filter = [
         'activa',
         'fecha_creacion'
@@ -223,6 +236,10 @@ class SimuladorConfigAdmin(admin.ModelAdmin):
         ('Información General', {
             'fields': ('nombre', 'activa')
         }),
+        ('Versión', {
+            'fields': ('version', 'restaurada_de', 'fecha_creacion', 'cambios_display'),
+            'description': 'Las versiones no se modifican: al guardar se crea y activa una versión nueva.'
+        }),
         ('Parámetros Técnicos', {
             'fields': (
                 'horas_sol_promedio', 
@@ -249,7 +266,7 @@ class SimuladorConfigAdmin(admin.ModelAdmin):
         }),
     ]
     
-    readonly_fields = ['fecha_creacion', 'fecha_actualizacion']
+    readonly_fields = ['version', 'restaurada_de', 'fecha_creacion', 'cambios_display']
     
     # Personalizar widgets para mejor UX
     formfield_overrides = {
@@ -257,6 +274,55 @@ class SimuladorConfigAdmin(admin.ModelAdmin):
         models.IntegerField: {'widget': TextInput(attrs={'size': '10'})},
     }
     
+    def has_delete_permission(self, request, obj=None):
+        # El historial de versiones es la referencia de resultados guardados
+        return False
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        estado = 'activa' if obj.activa else 'inactiva'
+        messages.info(request, f"Se creó la versión {obj.version} ({estado})")
+    
+    def cambios_display(self, obj):
+        if not obj or not obj.pk:
+            return '-'
+        anterior = obj.version_anterior()
+        if anterior is None:
+            return 'Primera versión'
+        diferencias = anterior.diferencias(obj)
+        if not diferencias:
+            return f'Sin cambios respecto a v{anterior.version}'
+        return format_html(
+            'Respecto a v{}:<ul>{}</ul>', anterior.version,
+            format_html_join('', '<li>{}: {} → {}</li>', diferencias)
+        )
+    cambios_display.short_description = 'Cambios'
+    
+    @admin.action(description='Restaurar la versión seleccionada (crea una versión nueva activa)')
+    def restaurar_version(self, request, queryset):
+        if queryset.count() != 1:
+            messages.error(request, 'Seleccione una sola versión para restaurar')
+            return
+        original = queryset.get()
+        nueva = original.restaurar()
+        messages.success(request, f'Versión {original.version} restaurada como versión {nueva.version}')
+    
+    @admin.action(description='Comparar las dos versiones seleccionadas')
+    def comparar_versiones(self, request, queryset):
+        versiones = list(queryset.order_by('version'))
+        if len(versiones) != 2:
+            messages.error(request, 'Seleccione exactamente dos versiones para comparar')
+            return
+        anterior, posterior = versiones
+        diferencias = anterior.diferencias(posterior)
+        if not diferencias:
+            messages.info(request, f'v{anterior.version} y v{posterior.version} tienen los mismos valores')
+            return
+        messages.info(request, format_html(
+            'Cambios de v{} a v{}:<ul>{}</ul>', anterior.version, posterior.version,
+            format_html_join('', '<li>{}: {} → {}</li>', diferencias)
+        ))
+    
     def activa_display(self, obj):
         if obj.activa:
             return format_html('<span style="color: green; font-weight: bold;">✓ ACTIVA</span>')
@@ -275,8 +341,12 @@ class SimuladorConfigAdmin(admin.ModelAdmin):
 class CostoInstalacionAdmin(admin.ModelAdmin):
     """Administrador para costos de instalación"""
     
+    form = CostoInstalacionAdminForm
+    
     list_display = [
         'rango_potencia_display',
+        'potencia_min',
+        'potencia_max',
         'costo_por_kw_display',
         'costo_bateria_por_kw_display',
         'activo'
@@ -294,7 +364,41 @@ class CostoInstalacionAdmin(admin.ModelAdmin):
         'activo'
     ]
     
-    list_editable = ['activo']
+    # Mover un borde compartido requiere editar dos bandas a la vez: se hace desde el listado
+    list_editable = ['potencia_min', 'potencia_max', 'activo']
+    
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs['formset'] = CostoInstalacionChangelistFormSet
+        return super().get_changelist_formset(request, **kwargs)
+    
+    # Eliminar una banda intermedia deja un hueco: se comprueba antes de confirmar y
+    # de llamar a delete_model/delete_queryset (que no pueden evitar el mensaje de éxito)
+    def eliminacion_rechazada(self, request, pks):
+        """True (con los errores como mensajes) si las bandas activas que quedan tendrían huecos"""
+        restantes = CostoInstalacion.objects.filter(activo=True).exclude(pk__in=pks)
+        errores = validar_bandas([costo.as_banda() for costo in restantes])
+        for error in errores:
+            messages.error(request, f'No se puede eliminar: {error}')
+        return bool(errores)
+    
+    def delete_view(self, request, object_id, extra_context=None):
+        costo = self.get_object(request, unquote(object_id))
+        if costo is not None and self.eliminacion_rechazada(request, [costo.pk]):
+            return HttpResponseRedirect(reverse('admin:core_costoinstalacion_changelist'))
+        return super().delete_view(request, object_id, extra_context)
+    
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if 'delete_selected' in actions:
+            _, nombre, descripcion = actions['delete_selected']
+            actions['delete_selected'] = (type(self).eliminar_seleccionadas, nombre, descripcion)
+        return actions
+    
+    def eliminar_seleccionadas(self, request, queryset):
+        """Acción "Eliminar seleccionados" de Django, si no deja huecos entre las bandas activas"""
+        if self.eliminacion_rechazada(request, list(queryset.values_list('pk', flat=True))):
+            return None
+        return delete_selected(self, request, queryset)
     
     def rango_potencia_display(self, obj):
         if obj.potencia_max:
@@ -440,6 +544,119 @@ class AnguloTejadoAdmin(admin.ModelAdmin):
     ordering = ['angulo']
 
 
+class EscalonTarifaInline(admin.TabularInline):
+    """Escalones de consumo mensual de una tarifa"""
+    
+    model = EscalonTarifa
+    formset = EscalonTarifaInlineFormSet
+    fields = ['limite_kwh', 'precio_kwh', 'cargo_fijo']
+    extra = 1
+
+
+@admin.register(TarifaElectrica)
+class TarifaElectricaAdmin(admin.ModelAdmin):
+    """Administrador para tarifas eléctricas escalonadas"""
+    
+    list_display = [
+        'nombre',
+        'provincia_display',
+        'categoria',
+        'modo',
+        'escalones_display',
+        'activo'
+    ]
+    
+    list_filter = ['activo', 'categoria', 'modo']
+    search_fields = ['nombre', 'provincia']
+    
+    fields = [
+        'nombre',
+        'provincia',
+        'categoria',
+        'modo',
+        'precio_excedente',
+        'impuestos',
+        'activo'
+    ]
+    
+    inlines = [EscalonTarifaInline]
+    list_editable = ['activo']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('escalones')
+    
+    def provincia_display(self, obj):
+        return obj.get_provincia_display()
+    provincia_display.short_description = 'Provincia'
+    
+    def escalones_display(self, obj):
+        return len(obj.escalones.all())
+    escalones_display.short_description = 'Escalones'
+    
+    ordering = ['provincia', 'categoria']
+
+
+@admin.register(SimulacionGuardada)
+class SimulacionGuardadaAdmin(admin.ModelAdmin):
+    """Simulaciones compartidas por enlace permanente (solo lectura: son inmutables)"""
+    
+    list_display = [
+        'id', 'ubicacion_display', 'version_parametros', 'version_config', 'fecha_creacion', 'permalink_display'
+    ]
+    list_filter = ['version_parametros', 'version_config']
+    search_fields = ['id']
+    date_hierarchy = 'fecha_creacion'
+    readonly_fields = ['id', 'entradas', 'version_parametros', 'version_config', 'resultados', 'fecha_creacion']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def ubicacion_display(self, obj):
+        return obj.entradas.get('ubicacion', '')
+    ubicacion_display.short_description = 'Ubicación'
+    
+    def permalink_display(self, obj):
+        return format_html('<a href="{}" target="_blank">Ver</a>', obj.get_absolute_url())
+    permalink_display.short_description = 'Enlace'
+
+
+class SoloLecturaAdmin(admin.ModelAdmin):
+    """Registros generados por el simulador: se consultan, no se editan"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EventoSimulacion)
+class EventoSimulacionAdmin(SoloLecturaAdmin):
+    """Registro de eventos de analítica del simulador"""
+    
+    list_display = [
+        'fecha', 'ubicacion', 'modo', 'perfil_consumo', 'potencia_instalada',
+        'periodo_retorno', 'ahorro_total_anual', 'incluye_bateria', 'optimizado'
+    ]
+    list_filter = ['ubicacion', 'modo', 'perfil_consumo', 'rango_potencia', 'incluye_bateria', 'version_config']
+    search_fields = ['id_simulacion']
+    date_hierarchy = 'fecha'
+
+
+@admin.register(ResumenDiarioSimulaciones)
+class ResumenDiarioSimulacionesAdmin(SoloLecturaAdmin):
+    """Resúmenes diarios (se generan con manage.py simulador_analitica)"""
+    
+    list_display = [
+        'fecha', 'ubicacion', 'rango_potencia', 'simulaciones', 'con_bateria',
+        'potencia_media', 'ahorro_medio', 'retorno_medio', 'retorno_minimo', 'retorno_maximo'
+    ]
+    list_filter = ['ubicacion', 'rango_potencia']
+    date_hierarchy = 'fecha'
+
 
 
 # Personalización del sitio admin
@@ -472,4 +689,16 @@ FactorOrientacion._meta.verbose_name_plural = "SIMULADOR - Factores de Orientaci
 # TipoTejado eliminado del admin
 
 AnguloTejado._meta.verbose_name = "SIMULADOR - Angulo de Inclinacion"
-AnguloTejado._meta.verbose_name_plural = "SIMULADOR - Angulos de Tejado"
\ No newline at end of file
+AnguloTejado._meta.verbose_name_plural = "SIMULADOR - Angulos de Tejado"
+
+TarifaElectrica._meta.verbose_name = "SIMULADOR - Tarifa Electrica"
+TarifaElectrica._meta.verbose_name_plural = "SIMULADOR - Tarifas Electricas"
+
+SimulacionGuardada._meta.verbose_name = "SIMULADOR - Simulacion Guardada"
+SimulacionGuardada._meta.verbose_name_plural = "SIMULADOR - Simulaciones Guardadas"
+
+EventoSimulacion._meta.verbose_name = "SIMULADOR - Evento de Simulacion"
+EventoSimulacion._meta.verbose_name_plural = "SIMULADOR - Eventos de Simulacion"
+
+ResumenDiarioSimulaciones._meta.verbose_name = "SIMULADOR - Resumen Diario"
+ResumenDiarioSimulaciones._meta.verbose_name_plural = "SIMULADOR - Resumenes Diarios"
\ No newline at end of file
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Formularios del admin de core: validación de las bandas de CostoInstalacion
+y de los escalones de TarifaElectrica
+"""
+from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseModelFormSet, BaseInlineFormSet
+
+from apps.simulador.engine import BandaCosto, validar_bandas
+from .models import CostoInstalacion
+
+
+class CostoInstalacionAdminForm(forms.ModelForm):
+    """Formulario de una banda: con las demás bandas activas no puede dejar huecos ni solapamientos"""
+    
+    class Meta:
+        model = CostoInstalacion
+        fields = '__all__'
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        potencia_min = cleaned_data.get('potencia_min')
+        if potencia_min is None:
+            return cleaned_data
+        
+        otras = CostoInstalacion.objects.filter(activo=True)
+        if self.instance.pk:
+            otras = otras.exclude(pk=self.instance.pk)
+        bandas = [otra.as_banda() for otra in otras]
+        
+        # Desactivar una banda también puede dejar un hueco
+        if cleaned_data.get('activo'):
+            bandas.append(BandaCosto(
+                potencia_min,
+                cleaned_data.get('potencia_max'),
+                cleaned_data.get('costo_por_kw'),
+                cleaned_data.get('costo_bateria_por_kw'),
+            ))
+        # IndiceBandas no resuelve ninguna banda dentro de un hueco: se rechaza como en el listado
+        errores = validar_bandas(bandas)
+        if errores:
+            raise ValidationError(errores + [
+                "Para mover un borde compartido entre dos bandas, edítelas a la vez desde el listado"
+            ])
+        return cleaned_data
+
+
+class CostoInstalacionChangelistFormSet(BaseModelFormSet):
+    """Edición en bloque desde el listado: el conjunto de bandas activas debe quedar sin huecos ni solapamientos"""
+    
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        
+        # Las instancias de los formularios ya tienen los valores editados
+        editadas = {
+            form.instance.pk: form.instance
+            for form in self.forms
+            if form.instance.pk is not None
+        }
+        bandas = [
+            editadas.get(costo.pk, costo).as_banda()
+            for costo in CostoInstalacion.objects.all()
+            if editadas.get(costo.pk, costo).activo
+        ]
+        errores = validar_bandas(bandas)
+        if errores:
+            raise ValidationError(errores)
+
+
+class EscalonTarifaInlineFormSet(BaseInlineFormSet):
+    """Escalones de una tarifa: límites distintos y un único escalón abierto (el último)"""
+    
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        
+        limites = [
+            form.cleaned_data.get('limite_kwh')
+            for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get('DELETE')
+        ]
+        if not limites:
+            raise ValidationError("La tarifa necesita al menos un escalón")
+        
+        cerrados = [limite for limite in limites if limite is not None]
+        if len(limites) - len(cerrados) > 1:
+            raise ValidationError("Solo el último escalón puede quedar sin límite")
+        if any(limite <= 0 for limite in cerrados):
+            raise ValidationError("Los límites de los escalones deben ser positivos")
+        if len(set(cerrados)) != len(cerrados):
+            raise ValidationError("Hay escalones con el mismo límite")
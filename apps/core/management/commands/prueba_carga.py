@@ -0,0 +1,485 @@
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga del simulador y de las páginas públicas.
+
+Ejecuta peticiones aleatorias contra la aplicación en el mismo proceso
+(handler WSGI de Django vía `django.test.Client`, con conteo de consultas por
+petición) o contra un servidor local (`--url`), y guarda un informe JSON con
+throughput y latencias p50/p95/p99 por escenario para comparar corridas.
+
+    python manage.py prueba_carga --sembrar              # datos de prueba en la BD local
+    python manage.py prueba_carga --peticiones 1000 --concurrencia 8
+    python manage.py prueba_carga --comparar logs/carga/anterior.json
+    python manage.py prueba_carga --limpiar              # borra los datos sembrados
+"""
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.test import Client
+from django.utils import timezone
+from django.utils.text import slugify
+
+from apps.blog.models import Categoria, Noticia
+from apps.core.models import Project
+from apps.simulador.perfiles import COORDENADAS_PROVINCIAS, PERFILES_CONSUMO
+
+
+# Marca de los datos sembrados (para poder borrarlos sin tocar los reales)
+AUTOR_CARGA = 'Prueba de Carga'
+PREFIJO_SLUG = 'carga-'
+
+ESCENARIOS = ('simulador', 'home', 'noticias', 'sesion')
+
+PALABRAS = (
+    'energía solar paneles fotovoltaicos instalación inversor batería red eléctrica '
+    'autoconsumo ahorro tarifa kilovatio producción eficiencia tejado orientación '
+    'inclinación provincia consumo residencial comercial industrial proyecto mantenimiento '
+    'monitorización transición renovable sostenibilidad subsidio regulación distribuidora '
+    'medidor bidireccional excedentes compensación irradiación radiación verano invierno'
+).split()
+
+BUSQUEDAS = ('solar', 'paneles', 'ahorro', 'baterías', 'tarifa', 'inversor', 'eficiencia', 'xyz')
+
+
+def texto(rng, palabras):
+    return ' '.join(rng.choice(PALABRAS) for _ in range(palabras))
+
+
+def percentil(valores, porcentaje):
+    return round(float(np.percentile(valores, porcentaje)), 2) if valores else None
+
+
+class Command(BaseCommand):
+    help = 'Prueba de carga del simulador y las páginas públicas (throughput, latencias y consultas por petición)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--escenarios',
+            nargs='+',
+            choices=ESCENARIOS,
+            default=list(ESCENARIOS),
+            help='Escenarios a ejecutar (default: todos)'
+        )
+        parser.add_argument(
+            '--peticiones',
+            type=int,
+            default=300,
+            help='Peticiones (o sesiones) por escenario (default: 300)'
+        )
+        parser.add_argument(
+            '--calentamiento',
+            type=int,
+            default=3,
+            help='Unidades secuenciales sin medir antes de cada escenario (default: 3)'
+        )
+        parser.add_argument(
+            '--concurrencia',
+            type=int,
+            default=4,
+            help='Hilos que envían peticiones en paralelo (default: 4)'
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=0,
+            help='Semilla de las entradas aleatorias (default: 0)'
+        )
+        parser.add_argument(
+            '--url',
+            help='Servidor local a probar (ej: http://127.0.0.1:8000); sin él se usa el handler en proceso'
+        )
+        parser.add_argument(
+            '--salida',
+            help='Archivo JSON del informe (default: logs/carga/carga-<fecha>.json)'
+        )
+        parser.add_argument(
+            '--comparar',
+            help='Informe JSON anterior con el que comparar los resultados'
+        )
+        parser.add_argument(
+            '--sembrar',
+            action='store_true',
+            help='Crear datos de prueba (noticias, categorías y proyectos) antes de medir'
+        )
+        parser.add_argument(
+            '--noticias',
+            type=int,
+            default=2000,
+            help='Noticias a sembrar (default: 2000)'
+        )
+        parser.add_argument(
+            '--limpiar',
+            action='store_true',
+            help='Borrar los datos sembrados y salir'
+        )
+        parser.add_argument(
+            '--permitir-produccion',
+            action='store_true',
+            help='Permitir sembrar o limpiar con DEBUG=False'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('INGLAT - Prueba de carga')
+        self.stdout.write('=' * 50)
+
+        if (options['sembrar'] or options['limpiar']) and not settings.DEBUG and not options['permitir_produccion']:
+            raise CommandError('DEBUG=False: use una base de datos local o --permitir-produccion')
+
+        if options['limpiar']:
+            self.limpiar()
+            return
+        if options['sembrar']:
+            self.sembrar(options['noticias'], options['semilla'])
+
+        if options['peticiones'] < 1 or options['concurrencia'] < 1:
+            raise CommandError('--peticiones y --concurrencia deben ser al menos 1')
+
+        self.datos = {
+            'slugs_noticias': list(
+                Noticia.objects.filter(activa=True).values_list('slug', flat=True)[:500]
+            ),
+            'slugs_categorias': list(Categoria.objects.filter(activa=True).values_list('slug', flat=True)),
+        }
+        if not self.datos['slugs_noticias']:
+            self.stdout.write(self.style.WARNING('Sin noticias activas: ejecute con --sembrar para datos realistas'))
+
+        informe = {
+            'fecha': timezone.now().isoformat(),
+            'objetivo': options['url'] or 'en proceso',
+            'base_datos': connection.vendor,
+            'noticias_activas': Noticia.objects.filter(activa=True).count(),
+            'peticiones': options['peticiones'],
+            'concurrencia': options['concurrencia'],
+            'semilla': options['semilla'],
+            'escenarios': {},
+        }
+        for escenario in options['escenarios']:
+            resultado = self.ejecutar(escenario, options)
+            informe['escenarios'][escenario] = resultado
+            self.mostrar(escenario, resultado)
+
+        salida = Path(options['salida'] or Path(settings.BASE_DIR) / 'logs' / 'carga' /
+                      f'carga-{time.strftime("%Y%m%d-%H%M%S")}.json')
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        salida.write_text(json.dumps(informe, indent=2, ensure_ascii=False), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f'✅ Informe guardado en {salida}'))
+
+        if options['comparar']:
+            self.comparar(informe, options['comparar'])
+
+    # ------------------------------------------------------------------
+    # Datos de prueba
+    # ------------------------------------------------------------------
+
+    def sembrar(self, total_noticias, semilla):
+        """Categorías, proyectos y noticias con volúmenes y tamaños realistas (bulk_create)"""
+        rng = random.Random(semilla)
+        ahora = timezone.now()
+
+        with transaction.atomic():
+            categorias = []
+            for nombre in ('Energía Solar', 'Baterías', 'Regulación', 'Proyectos', 'Mercado', 'Tecnología'):
+                categoria, _ = Categoria.objects.get_or_create(
+                    slug=f'{PREFIJO_SLUG}{slugify(nombre)}',
+                    defaults={'nombre': f'{nombre} (carga)'}
+                )
+                categorias.append(categoria)
+
+            existentes = Noticia.objects.filter(autor=AUTOR_CARGA).count()
+            noticias = []
+            for numero in range(existentes, existentes + total_noticias):
+                titulo = f'{texto(rng, 6).capitalize()} {numero}'
+                descripcion = texto(rng, 30)[:300]
+                # Artículos de 600 a 2500 palabras en párrafos HTML
+                contenido = ''.join(f'<p>{texto(rng, 80)}</p>' for _ in range(rng.randint(8, 30)))
+                noticias.append(Noticia(
+                    titulo=titulo,
+                    slug=f'{PREFIJO_SLUG}{numero}-{slugify(titulo)}'[:250],
+                    descripcion_corta=descripcion,
+                    contenido=contenido,
+                    tipo_multimedia='ninguno',
+                    autor=AUTOR_CARGA,
+                    categoria=rng.choice(categorias),
+                    fecha_publicacion=ahora - timedelta(hours=rng.randint(0, 24 * 730)),
+                    meta_descripcion=descripcion[:160],
+                    destacada=rng.random() < 0.05,
+                    activa=rng.random() < 0.95,
+                ))
+            Noticia.objects.bulk_create(noticias, batch_size=500)
+
+            proyectos = [
+                Project(
+                    title=f'Instalación {texto(rng, 3)} {numero}',
+                    slug=f'{PREFIJO_SLUG}proyecto-{numero}',
+                    location=rng.choice(list(COORDENADAS_PROVINCIAS)).replace('_', ' ').title(),
+                    date_completed=date.today() - timedelta(days=rng.randint(0, 1500)),
+                    description_short=texto(rng, 25)[:300],
+                    description_full=texto(rng, 300),
+                    featured_image='projects/images/carga.jpg',
+                    power_capacity=f'{rng.randint(3, 500)}kW',
+                    client_type=rng.choice(['Residencial', 'Comercial', 'Industrial']),
+                    is_featured=numero < 6,
+                )
+                for numero in range(Project.objects.filter(slug__startswith=PREFIJO_SLUG).count(), 30)
+            ]
+            Project.objects.bulk_create(proyectos)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Sembrado: {len(categorias)} categorías, {len(noticias)} noticias, {len(proyectos)} proyectos'
+        ))
+
+    def limpiar(self):
+        with transaction.atomic():
+            noticias, _ = Noticia.objects.filter(autor=AUTOR_CARGA).delete()
+            proyectos, _ = Project.objects.filter(slug__startswith=PREFIJO_SLUG).delete()
+            categorias, _ = Categoria.objects.filter(slug__startswith=PREFIJO_SLUG).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Eliminados: {noticias} noticias, {proyectos} proyectos, {categorias} categorías'
+        ))
+
+    # ------------------------------------------------------------------
+    # Peticiones
+    # ------------------------------------------------------------------
+
+    def payload_simulador(self, rng):
+        """Entradas del simulador con la mezcla esperada en producción"""
+        payload = {
+            'consumo_anual': rng.choice([rng.randint(1500, 9000), rng.randint(9000, 60000)]),
+            'ubicacion': rng.choice(list(COORDENADAS_PROVINCIAS)),
+            'orientacion': rng.choice(['N', 'NE', 'E', 'SE', 'S', 'SO', 'O', 'NO']),
+            'inclinacion': rng.choice([0, 15, 30, 45, 60]),
+            'superficie': rng.randint(10, 400),
+            'perfil_consumo': rng.choice(PERFILES_CONSUMO),
+        }
+        sorteo = rng.random()
+        if sorteo < 0.10:
+            payload['modo'] = 'horario'
+        elif sorteo < 0.15:
+            payload['bateria'] = True
+        elif sorteo < 0.20:
+            payload['optimizar'] = rng.choice(['van', 'retorno'])
+        elif sorteo < 0.25:
+            latitud, longitud = COORDENADAS_PROVINCIAS[payload['ubicacion']]
+            payload['latitud'] = latitud + rng.uniform(-0.5, 0.5)
+            payload['longitud'] = longitud + rng.uniform(-0.5, 0.5)
+        return payload
+
+    def url_noticias(self, rng):
+        """Lista, filtros, búsqueda, AJAX o detalle de noticias"""
+        sorteo = rng.random()
+        categorias = self.datos['slugs_categorias'] or ['todas']
+        if sorteo < 0.35:
+            return '/noticias/', {}
+        if sorteo < 0.50:
+            return f'/noticias/?q={rng.choice(BUSQUEDAS)}', {}
+        if sorteo < 0.65:
+            return f'/noticias/categoria/{rng.choice(categorias)}/', {}
+        if sorteo < 0.85:
+            consulta = f'categoria={rng.choice(categorias)}&fecha={rng.choice(["todas", "ultimo-mes"])}'
+            if rng.random() < 0.5:
+                consulta += f'&q={rng.choice(BUSQUEDAS)}'
+            return f'/noticias/filtrar/?{consulta}', {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+        if self.datos['slugs_noticias']:
+            return f'/noticias/{rng.choice(self.datos["slugs_noticias"])}/', {}
+        return '/noticias/', {}
+
+    def peticiones(self, escenario, rng):
+        """Peticiones de una unidad de trabajo: (etiqueta, método, ruta, cuerpo, cabeceras)"""
+        if escenario == 'simulador':
+            return [('simulador', 'POST', '/simulador/', self.payload_simulador(rng), {})]
+        if escenario == 'home':
+            return [('home', 'GET', '/', None, {})]
+        if escenario == 'noticias':
+            ruta, cabeceras = self.url_noticias(rng)
+            return [('noticias', 'GET', ruta, None, cabeceras)]
+
+        # Sesión de navegación: portada, noticias, simulador y cálculo
+        sesion = [('home', 'GET', '/', None, {})]
+        for _ in range(rng.randint(1, 3)):
+            ruta, cabeceras = self.url_noticias(rng)
+            sesion.append(('noticias', 'GET', ruta, None, cabeceras))
+        sesion.append(('simulador_pagina', 'GET', '/simulador/', None, {}))
+        sesion.extend(
+            ('simulador', 'POST', '/simulador/', self.payload_simulador(rng), {})
+            for _ in range(rng.randint(1, 2))
+        )
+        return sesion
+
+    def ejecutar(self, escenario, options):
+        """Ejecuta un escenario con N hilos y devuelve las métricas"""
+        total = options['peticiones']
+        concurrencia = min(options['concurrencia'], total)
+        muestras = defaultdict(list)
+        errores = defaultdict(int)
+        lock = threading.Lock()
+        siguiente = iter(range(total))
+
+        def trabajador(numero):
+            rng = random.Random(f'{options["semilla"]}-{escenario}-{numero}')
+            enviar = self.cliente_remoto(options['url']) if options['url'] else self.cliente_local()
+            try:
+                while True:
+                    with lock:
+                        unidad = next(siguiente, None)
+                    if unidad is None:
+                        return
+                    for etiqueta, metodo, ruta, cuerpo, cabeceras in self.peticiones(escenario, rng):
+                        estado, segundos, consultas = enviar(metodo, ruta, cuerpo, cabeceras)
+                        with lock:
+                            muestras[etiqueta].append((segundos, consultas))
+                            if estado >= 400:
+                                errores[etiqueta] += 1
+            finally:
+                if not options['url']:
+                    connections.close_all()
+
+        # Calentamiento secuencial: cargas perezosas (snapshot, perfiles, filas por defecto) fuera de la medición
+        enviar = self.cliente_remoto(options['url']) if options['url'] else self.cliente_local()
+        rng = random.Random(f'{options["semilla"]}-{escenario}-calentamiento')
+        for _ in range(options['calentamiento']):
+            for _, metodo, ruta, cuerpo, cabeceras in self.peticiones(escenario, rng):
+                enviar(metodo, ruta, cuerpo, cabeceras)
+
+        inicio = time.perf_counter()
+        hilos = [threading.Thread(target=trabajador, args=(numero,)) for numero in range(concurrencia)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - inicio
+
+        total_peticiones = sum(len(valores) for valores in muestras.values())
+        return {
+            'duracion_s': round(duracion, 3),
+            'peticiones': total_peticiones,
+            'throughput_rps': round(total_peticiones / duracion, 1) if duracion else None,
+            'rutas': {
+                etiqueta: self.metricas(valores, errores[etiqueta], duracion)
+                for etiqueta, valores in sorted(muestras.items())
+            },
+        }
+
+    @staticmethod
+    def metricas(valores, errores, duracion):
+        latencias = [segundos * 1000 for segundos, _ in valores]
+        consultas = [numero for _, numero in valores if numero is not None]
+        return {
+            'peticiones': len(valores),
+            'errores': errores,
+            'throughput_rps': round(len(valores) / duracion, 1) if duracion else None,
+            'p50_ms': percentil(latencias, 50),
+            'p95_ms': percentil(latencias, 95),
+            'p99_ms': percentil(latencias, 99),
+            'max_ms': round(max(latencias), 2) if latencias else None,
+            'consultas_media': round(sum(consultas) / len(consultas), 2) if consultas else None,
+            'consultas_max': max(consultas) if consultas else None,
+        }
+
+    def cliente_local(self):
+        """Envía peticiones por el handler WSGI en este hilo, contando consultas SQL"""
+        # Los errores 500 se cuentan como errores en lugar de cortar el hilo
+        cliente = Client(raise_request_exception=False)
+        contador = [0]
+
+        def contar(ejecutar, sql, params, many, context):
+            contador[0] += 1
+            return ejecutar(sql, params, many, context)
+
+        def enviar(metodo, ruta, cuerpo, cabeceras):
+            contador[0] = 0
+            # secure=True: las rutas no pasan por la redirección a HTTPS de producción
+            with connection.execute_wrapper(contar):
+                inicio = time.perf_counter()
+                if metodo == 'POST':
+                    respuesta = cliente.post(ruta, json.dumps(cuerpo), content_type='application/json',
+                                             secure=True, **cabeceras)
+                else:
+                    respuesta = cliente.get(ruta, secure=True, **cabeceras)
+                segundos = time.perf_counter() - inicio
+            return respuesta.status_code, segundos, contador[0]
+
+        return enviar
+
+    @staticmethod
+    def cliente_remoto(base):
+        """Envía peticiones HTTP a un servidor local (sin conteo de consultas)"""
+        base = base.rstrip('/')
+
+        def enviar(metodo, ruta, cuerpo, cabeceras):
+            headers = {
+                nombre[5:].replace('_', '-').title(): valor
+                for nombre, valor in cabeceras.items() if nombre.startswith('HTTP_')
+            }
+            data = None
+            if metodo == 'POST':
+                data = json.dumps(cuerpo).encode('utf-8')
+                headers['Content-Type'] = 'application/json'
+            peticion = urllib.request.Request(base + ruta, data=data, headers=headers, method=metodo)
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(peticion, timeout=30) as respuesta:
+                    respuesta.read()
+                    estado = respuesta.status
+            except urllib.error.HTTPError as e:
+                estado = e.code
+            except OSError:
+                estado = 599
+            return estado, time.perf_counter() - inicio, None
+
+        return enviar
+
+    # ------------------------------------------------------------------
+    # Informe
+    # ------------------------------------------------------------------
+
+    def mostrar(self, escenario, resultado):
+        self.stdout.write('-' * 50)
+        self.stdout.write(
+            f'{escenario}: {resultado["peticiones"]} peticiones en {resultado["duracion_s"]} s '
+            f'({resultado["throughput_rps"]} req/s)'
+        )
+        for etiqueta, metricas in resultado['rutas'].items():
+            linea = (
+                f'  {etiqueta:<17} p50 {metricas["p50_ms"]} ms  p95 {metricas["p95_ms"]} ms  '
+                f'p99 {metricas["p99_ms"]} ms  consultas {metricas["consultas_media"]}'
+            )
+            if metricas['errores']:
+                self.stdout.write(self.style.ERROR(f'{linea}  ❌ {metricas["errores"]} errores'))
+            else:
+                self.stdout.write(linea)
+
+    def comparar(self, informe, ruta_anterior):
+        """Diferencias de throughput, p95 y consultas con un informe anterior"""
+        if not os.path.exists(ruta_anterior):
+            raise CommandError(f'No existe el informe {ruta_anterior}')
+        with open(ruta_anterior, encoding='utf-8') as archivo:
+            anterior = json.load(archivo)
+
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'Comparación con {ruta_anterior} ({anterior.get("fecha", "?")})')
+        for escenario, resultado in informe['escenarios'].items():
+            previo = anterior.get('escenarios', {}).get(escenario)
+            if previo is None:
+                continue
+            for etiqueta, metricas in resultado['rutas'].items():
+                antes = previo['rutas'].get(etiqueta)
+                if antes is None:
+                    continue
+                cambios = []
+                for campo in ('throughput_rps', 'p95_ms', 'consultas_media'):
+                    if metricas[campo] is not None and antes.get(campo):
+                        variacion = (metricas[campo] - antes[campo]) / antes[campo] * 100
+                        cambios.append(f'{campo} {antes[campo]} → {metricas[campo]} ({variacion:+.0f}%)')
+                self.stdout.write(f'  {escenario}/{etiqueta}: ' + ', '.join(cambios))
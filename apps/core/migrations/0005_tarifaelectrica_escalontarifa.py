@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_homeportada_video_archivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TarifaElectrica',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text="Nombre del cuadro tarifario (ej: 'EPEC Residencial 2025')", max_length=100, verbose_name='Nombre')),
+                ('provincia', models.CharField(choices=[('caba', 'Ciudad Autónoma de Buenos Aires'), ('buenos_aires', 'Buenos Aires'), ('catamarca', 'Catamarca'), ('chaco', 'Chaco'), ('chubut', 'Chubut'), ('cordoba', 'Córdoba'), ('corrientes', 'Corrientes'), ('entre_rios', 'Entre Ríos'), ('formosa', 'Formosa'), ('jujuy', 'Jujuy'), ('la_pampa', 'La Pampa'), ('la_rioja', 'La Rioja'), ('mendoza', 'Mendoza'), ('misiones', 'Misiones'), ('neuquen', 'Neuquén'), ('rio_negro', 'Río Negro'), ('salta', 'Salta'), ('san_juan', 'San Juan'), ('san_luis', 'San Luis'), ('santa_cruz', 'Santa Cruz'), ('santa_fe', 'Santa Fe'), ('santiago_del_estero', 'Santiago del Estero'), ('tierra_del_fuego', 'Tierra del Fuego'), ('tucuman', 'Tucumán')], max_length=50, verbose_name='Provincia')),
+                ('categoria', models.CharField(choices=[('residencial', 'Residencial'), ('comercial', 'Comercial')], default='residencial', help_text='Coincide con el perfil de consumo elegido en el simulador', max_length=20, verbose_name='Categoría')),
+                ('modo', models.CharField(choices=[('bloques', 'Por bloques (cada kWh al precio de su bloque)'), ('categoria', 'Por categoría (todo el consumo al precio del escalón)')], default='bloques', max_length=20, verbose_name='Modo de Escalonamiento')),
+                ('precio_excedente', models.FloatField(default=0.06, help_text='Crédito por kWh inyectado a la red (balance neto)', verbose_name='Precio Excedentes (USD/kWh)')),
+                ('impuestos', models.FloatField(default=0.21, help_text='Recargo sobre el total de la factura (0.21 = 21%)', verbose_name='Impuestos y Tasas (%)')),
+                ('activo', models.BooleanField(default=True, verbose_name='Activo')),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, verbose_name='Última Actualización')),
+            ],
+            options={
+                'verbose_name': 'Tarifa Eléctrica',
+                'verbose_name_plural': 'Tarifas Eléctricas',
+                'ordering': ['provincia', 'categoria'],
+                'unique_together': {('provincia', 'categoria')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EscalonTarifa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('limite_kwh', models.FloatField(blank=True, help_text='Límite superior del escalón (dejar vacío en el último)', null=True, verbose_name='Hasta (kWh/mes)')),
+                ('precio_kwh', models.FloatField(help_text='Precio de la energía en este escalón', verbose_name='Precio kWh (USD)')),
+                ('cargo_fijo', models.FloatField(default=0, help_text='Cargo fijo mensual cuando el consumo cae en este escalón', verbose_name='Cargo Fijo (USD/mes)')),
+                ('tarifa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='escalones', to='core.tarifaelectrica', verbose_name='Tarifa')),
+            ],
+            options={
+                'verbose_name': 'Escalón de Tarifa',
+                'verbose_name_plural': 'Escalones de Tarifa',
+                'ordering': ['tarifa', models.OrderBy(models.F('limite_kwh'), nulls_last=True)],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_tarifaelectrica_escalontarifa'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulacionGuardada',
+            fields=[
+                ('id', models.CharField(help_text='Hash corto de las entradas y la versión de parámetros', max_length=16, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entradas', models.JSONField(help_text='Entradas normalizadas del simulador', verbose_name='Entradas')),
+                ('version_parametros', models.CharField(max_length=12, verbose_name='Versión de Parámetros')),
+                ('resultados', models.JSONField(verbose_name='Resultados')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Simulación Guardada',
+                'verbose_name_plural': 'Simulaciones Guardadas',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
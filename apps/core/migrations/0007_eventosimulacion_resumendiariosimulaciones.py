@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-17 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_simulacionguardada'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoSimulacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(db_index=True, verbose_name='Fecha')),
+                ('id_simulacion', models.CharField(blank=True, max_length=16, verbose_name='ID de Simulación')),
+                ('ubicacion', models.CharField(max_length=50, verbose_name='Ubicación')),
+                ('modo', models.CharField(max_length=20, verbose_name='Modo')),
+                ('perfil_consumo', models.CharField(max_length=20, verbose_name='Perfil de Consumo')),
+                ('consumo_anual', models.FloatField(verbose_name='Consumo Anual (kWh)')),
+                ('superficie', models.FloatField(verbose_name='Superficie (m²)')),
+                ('potencia_instalada', models.FloatField(verbose_name='Potencia Instalada (kW)')),
+                ('rango_potencia', models.CharField(choices=[('0-3', '0 a 3 kW'), ('3-5', '3 a 5 kW'), ('5-10', '5 a 10 kW'), ('10+', 'Más de 10 kW')], max_length=10, verbose_name='Rango de Potencia')),
+                ('num_paneles', models.PositiveIntegerField(verbose_name='Número de Paneles')),
+                ('ahorro_total_anual', models.FloatField(verbose_name='Ahorro Anual (€)')),
+                ('costo_instalacion', models.FloatField(verbose_name='Costo de Instalación (€)')),
+                ('periodo_retorno', models.FloatField(verbose_name='Periodo de Retorno (años)')),
+                ('incluye_bateria', models.BooleanField(default=False, verbose_name='Incluye Batería')),
+                ('optimizado', models.BooleanField(default=False, verbose_name='Optimizado')),
+            ],
+            options={
+                'verbose_name': 'Evento de Simulación',
+                'verbose_name_plural': 'Eventos de Simulación',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioSimulaciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('ubicacion', models.CharField(max_length=50, verbose_name='Ubicación')),
+                ('rango_potencia', models.CharField(choices=[('0-3', '0 a 3 kW'), ('3-5', '3 a 5 kW'), ('5-10', '5 a 10 kW'), ('10+', 'Más de 10 kW')], max_length=10, verbose_name='Rango de Potencia')),
+                ('simulaciones', models.PositiveIntegerField(verbose_name='Simulaciones')),
+                ('con_bateria', models.PositiveIntegerField(default=0, verbose_name='Con Batería')),
+                ('potencia_media', models.FloatField(verbose_name='Potencia Media (kW)')),
+                ('consumo_medio', models.FloatField(verbose_name='Consumo Medio (kWh)')),
+                ('ahorro_medio', models.FloatField(verbose_name='Ahorro Medio (€)')),
+                ('retorno_medio', models.FloatField(verbose_name='Retorno Medio (años)')),
+                ('retorno_minimo', models.FloatField(verbose_name='Retorno Mínimo (años)')),
+                ('retorno_maximo', models.FloatField(verbose_name='Retorno Máximo (años)')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Simulaciones',
+                'verbose_name_plural': 'Resúmenes Diarios de Simulaciones',
+                'ordering': ['-fecha', 'ubicacion', 'rango_potencia'],
+                'unique_together': {('fecha', 'ubicacion', 'rango_potencia')},
+            },
+        ),
+    ]
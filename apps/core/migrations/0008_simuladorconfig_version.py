@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+def numerar_versiones(apps, schema_editor):
+    """Numera las configuraciones existentes por orden de creación"""
+    SimuladorConfig = apps.get_model('core', 'SimuladorConfig')
+    for numero, config in enumerate(SimuladorConfig.objects.order_by('fecha_creacion', 'pk'), start=1):
+        SimuladorConfig.objects.filter(pk=config.pk).update(version=numero)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_eventosimulacion_resumendiariosimulaciones'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='simuladorconfig',
+            options={'ordering': ['-version'], 'verbose_name': 'Configuración del Simulador', 'verbose_name_plural': 'Configuraciones del Simulador'},
+        ),
+        migrations.AddField(
+            model_name='simuladorconfig',
+            name='version',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Versión'),
+        ),
+        migrations.RunPython(numerar_versiones, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='simuladorconfig',
+            name='version',
+            field=models.PositiveIntegerField(editable=False, help_text='Número de versión (creciente, asignado al guardar)', unique=True, verbose_name='Versión'),
+        ),
+        migrations.AddField(
+            model_name='simuladorconfig',
+            name='restaurada_de',
+            field=models.PositiveIntegerField(blank=True, editable=False, help_text='Versión de la que se copiaron los valores al restaurar', null=True, verbose_name='Restaurada de'),
+        ),
+        migrations.AddField(
+            model_name='eventosimulacion',
+            name='version_config',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Versión de Configuración'),
+        ),
+        migrations.AddField(
+            model_name='simulacionguardada',
+            name='version_config',
+            field=models.PositiveIntegerField(blank=True, help_text='Versión de SimuladorConfig usada en el cálculo', null=True, verbose_name='Versión de Configuración'),
+        ),
+    ]
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.utils.text import slugify
 from django.urls import reverse
 from django.core.exceptions import ValidationError
 import re
 from urllib.parse import urlparse, parse_qs
 
+from apps.simulador.engine import BandaCosto, IndiceBandas
+from apps.simulador.tarifas import EscalonTarifa as Escalon, Tarifa, MODO_BLOQUES, MODO_CATEGORIA
+
 
 class Project(models.Model):
     """Modelo para gestionar proyectos de INGLAT desde el panel de administracion"""
@@ -405,7 +408,46 @@ class HomePortada(models.Model):
 # ===========================
 
 class SimuladorConfig(models.Model):
-    """Configuración global del simulador solar"""
+    """
+    Configuración global del simulador solar, versionada.
+    
+    Cada fila es una versión inmutable: guardar cambios crea una versión nueva
+    con número creciente y la activa, así que los resultados, cachés e informes
+    pueden referirse a la versión exacta de parámetros con la que se calcularon.
+    Volver atrás es restaurar una versión anterior (otra versión nueva con sus valores).
+    """
+    
+    # Campos que definen una versión (se copian al restaurar y se comparan en los diffs)
+    CAMPOS_VERSIONADOS = (
+        'nombre',
+        'horas_sol_promedio',
+        'eficiencia_panel',
+        'potencia_panel',
+        'precio_kwh',
+        'consumo_coche_electrico',
+        'autoconsumo_con_bateria',
+        'autoconsumo_sin_bateria',
+        'compensacion_excedentes',
+        'degradacion_anual',
+    )
+    
+    # Intentos de asignar número de versión ante guardados concurrentes
+    INTENTOS_VERSION = 5
+    
+    version = models.PositiveIntegerField(
+        unique=True,
+        editable=False,
+        verbose_name="Versión",
+        help_text="Número de versión (creciente, asignado al guardar)"
+    )
+    
+    restaurada_de = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Restaurada de",
+        help_text="Versión de la que se copiaron los valores al restaurar"
+    )
     
     nombre = models.CharField(
         max_length=100,
@@ -490,24 +532,64 @@ class SimuladorConfig(models.Model):
     class Meta:
         verbose_name = "Configuración del Simulador"
         verbose_name_plural = "Configuraciones del Simulador"
-        ordering = ['-activa', '-fecha_actualizacion']
+        ordering = ['-version']
     
     def __str__(self):
         estado = "ACTIVA" if self.activa else "Inactiva"
-        return f"{self.nombre} ({estado})"
+        return f"v{self.version} {self.nombre} ({estado})"
     
-    def clean(self):
-        """Validar que solo hay una configuración activa"""
+    def save(self, *args, **kwargs):
+        """Guarda siempre como versión nueva; si queda activa, desactiva las demás"""
+        kwargs.pop('force_update', None)
+        kwargs.pop('update_fields', None)
+        with transaction.atomic():
+            ultima = SimuladorConfig.objects.select_for_update().order_by('-version').first()
+            version = ultima.version + 1 if ultima else 1
+            for intento in range(self.INTENTOS_VERSION):
+                self.pk = None
+                self._state.adding = True
+                self.version = version
+                try:
+                    # Con la tabla vacía (o en SQLite) el bloqueo no serializa dos
+                    # guardados: el que pierde la carrera reintenta con la versión siguiente
+                    with transaction.atomic():
+                        super().save(*args, **kwargs)
+                    break
+                except IntegrityError:
+                    ultima = SimuladorConfig.objects.order_by('-version').first()
+                    if intento == self.INTENTOS_VERSION - 1 or ultima is None or ultima.version < version:
+                        raise
+                    version = ultima.version + 1
+            if self.activa:
+                # update() no modifica ninguna versión: solo mueve la marca de activa
+                SimuladorConfig.objects.filter(activa=True).exclude(pk=self.pk).update(activa=False)
+    
+    def delete(self, *args, **kwargs):
         if self.activa:
-            otras_activas = SimuladorConfig.objects.filter(activa=True)
-            if self.pk:
-                otras_activas = otras_activas.exclude(pk=self.pk)
-            if otras_activas.exists():
-                raise ValidationError("Solo puede haber una configuración activa a la vez")
+            raise ValidationError("No se puede eliminar la configuración activa")
+        return super().delete(*args, **kwargs)
+    
+    def restaurar(self):
+        """Crea y activa una versión nueva con los valores de esta"""
+        nueva = SimuladorConfig(
+            restaurada_de=self.version,
+            activa=True,
+            **{campo: getattr(self, campo) for campo in self.CAMPOS_VERSIONADOS}
+        )
+        nueva.save()
+        return nueva
+    
+    def diferencias(self, otra):
+        """Campos que cambian de esta versión a `otra`: [(etiqueta, valor_esta, valor_otra)]"""
+        return [
+            (self._meta.get_field(campo).verbose_name, getattr(self, campo), getattr(otra, campo))
+            for campo in self.CAMPOS_VERSIONADOS
+            if getattr(self, campo) != getattr(otra, campo)
+        ]
     
-    def save(self, *args, **kwargs):
-        self.clean()
-        super().save(*args, **kwargs)
+    def version_anterior(self):
+        """Versión inmediatamente anterior o None"""
+        return SimuladorConfig.objects.filter(version__lt=self.version).order_by('-version').first()
     
     @classmethod
     def get_activa(cls):
@@ -584,21 +666,25 @@ class CostoInstalacion(models.Model):
         else:
             return f"+{self.potencia_min} kW: ${self.costo_por_kw}/kW"
     
+    def clean(self):
+        """Validar que el rango de potencia está bien formado"""
+        if self.potencia_max and self.potencia_max < self.potencia_min:
+            raise ValidationError({
+                'potencia_max': "La potencia máxima no puede ser menor que la mínima"
+            })
+    
+    def as_banda(self):
+        """Banda de costo para el índice de intervalos del simulador"""
+        return BandaCosto(self.potencia_min, self.potencia_max, self.costo_por_kw, self.costo_bateria_por_kw)
+    
     @classmethod
     def get_costo_para_potencia(cls, potencia_kw):
         """Obtener el costo por kW para una potencia específica"""
-        costos = cls.objects.filter(activo=True).order_by('potencia_min')
+        costos = list(cls.objects.filter(activo=True).order_by('potencia_min'))
         
-        for costo in costos:
-            if costo.potencia_max:
-                if costo.potencia_min <= potencia_kw <= costo.potencia_max:
-                    return costo
-            else:
-                if potencia_kw >= costo.potencia_min:
-                    return costo
-        
-        # Si no se encuentra, devolver el primer rango
-        return costos.first()
+        # Búsqueda por bisect en el índice de bandas (una sola consulta)
+        posicion = IndiceBandas(costo.as_banda() for costo in costos).buscar(potencia_kw)
+        return costos[posicion] if posicion >= 0 else None
 
 
 class FactorUbicacion(models.Model):
@@ -844,4 +930,325 @@ class AnguloTejado(models.Model):
         diferencia = abs(self.angulo - angulo_optimo)
         # Factor decrece 1% por cada grado de diferencia
         factor = max(0.7, 1.0 - (diferencia * 0.01))
-        return factor
\ No newline at end of file
+        return factor
+
+
+class TarifaElectrica(models.Model):
+    """Tarifa eléctrica escalonada por provincia y categoría de cliente"""
+    
+    CATEGORIAS = [
+        ('residencial', 'Residencial'),
+        ('comercial', 'Comercial'),
+    ]
+    
+    MODOS = [
+        (MODO_BLOQUES, 'Por bloques (cada kWh al precio de su bloque)'),
+        (MODO_CATEGORIA, 'Por categoría (todo el consumo al precio del escalón)'),
+    ]
+    
+    nombre = models.CharField(
+        max_length=100,
+        verbose_name="Nombre",
+        help_text="Nombre del cuadro tarifario (ej: 'EPEC Residencial 2025')"
+    )
+    
+    provincia = models.CharField(
+        max_length=50,
+        choices=FactorUbicacion.PROVINCIAS_ARGENTINA,
+        verbose_name="Provincia"
+    )
+    
+    categoria = models.CharField(
+        max_length=20,
+        choices=CATEGORIAS,
+        default='residencial',
+        verbose_name="Categoría",
+        help_text="Coincide con el perfil de consumo elegido en el simulador"
+    )
+    
+    modo = models.CharField(
+        max_length=20,
+        choices=MODOS,
+        default=MODO_BLOQUES,
+        verbose_name="Modo de Escalonamiento"
+    )
+    
+    precio_excedente = models.FloatField(
+        default=0.06,
+        verbose_name="Precio Excedentes (USD/kWh)",
+        help_text="Crédito por kWh inyectado a la red (balance neto)"
+    )
+    
+    impuestos = models.FloatField(
+        default=0.21,
+        verbose_name="Impuestos y Tasas (%)",
+        help_text="Recargo sobre el total de la factura (0.21 = 21%)"
+    )
+    
+    activo = models.BooleanField(
+        default=True,
+        verbose_name="Activo"
+    )
+    
+    fecha_actualizacion = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Última Actualización"
+    )
+    
+    class Meta:
+        verbose_name = "Tarifa Eléctrica"
+        verbose_name_plural = "Tarifas Eléctricas"
+        ordering = ['provincia', 'categoria']
+        unique_together = ['provincia', 'categoria']
+    
+    def __str__(self):
+        return f"{self.nombre} ({self.get_provincia_display()} - {self.get_categoria_display()})"
+    
+    def as_tarifa(self, escalones=None):
+        """Tarifa compacta para el simulador (None si no tiene escalones)"""
+        if escalones is None:
+            escalones = self.escalones.all()
+        escalones = [escalon.as_escalon() for escalon in escalones]
+        if not escalones:
+            return None
+        return Tarifa(self.nombre, self.modo, escalones, self.precio_excedente, self.impuestos)
+
+
+class EscalonTarifa(models.Model):
+    """Escalón de consumo mensual de una tarifa eléctrica"""
+    
+    tarifa = models.ForeignKey(
+        TarifaElectrica,
+        on_delete=models.CASCADE,
+        related_name='escalones',
+        verbose_name="Tarifa"
+    )
+    
+    limite_kwh = models.FloatField(
+        null=True,
+        blank=True,
+        verbose_name="Hasta (kWh/mes)",
+        help_text="Límite superior del escalón (dejar vacío en el último)"
+    )
+    
+    precio_kwh = models.FloatField(
+        verbose_name="Precio kWh (USD)",
+        help_text="Precio de la energía en este escalón"
+    )
+    
+    cargo_fijo = models.FloatField(
+        default=0,
+        verbose_name="Cargo Fijo (USD/mes)",
+        help_text="Cargo fijo mensual cuando el consumo cae en este escalón"
+    )
+    
+    class Meta:
+        verbose_name = "Escalón de Tarifa"
+        verbose_name_plural = "Escalones de Tarifa"
+        ordering = ['tarifa', models.F('limite_kwh').asc(nulls_last=True)]
+    
+    def __str__(self):
+        if self.limite_kwh is None:
+            return f"Resto: ${self.precio_kwh}/kWh"
+        return f"Hasta {self.limite_kwh:g} kWh: ${self.precio_kwh}/kWh"
+    
+    def as_escalon(self):
+        """Escalón para el cálculo vectorizado de facturas"""
+        return Escalon(self.limite_kwh, self.precio_kwh, self.cargo_fijo)
+
+
+class SimulacionGuardada(models.Model):
+    """Simulación inmutable servida por enlace permanente (/simulador/r/<id>/)"""
+    
+    id = models.CharField(
+        max_length=16,
+        primary_key=True,
+        verbose_name="ID",
+        help_text="Hash corto de las entradas y la versión de parámetros"
+    )
+    
+    entradas = models.JSONField(
+        verbose_name="Entradas",
+        help_text="Entradas normalizadas del simulador"
+    )
+    
+    version_parametros = models.CharField(
+        max_length=12,
+        verbose_name="Versión de Parámetros"
+    )
+    
+    version_config = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Versión de Configuración",
+        help_text="Versión de SimuladorConfig usada en el cálculo"
+    )
+    
+    resultados = models.JSONField(
+        verbose_name="Resultados"
+    )
+    
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Fecha de Creación"
+    )
+    
+    class Meta:
+        verbose_name = "Simulación Guardada"
+        verbose_name_plural = "Simulaciones Guardadas"
+        ordering = ['-fecha_creacion']
+    
+    def __str__(self):
+        return f"{self.id} ({self.entradas.get('ubicacion', '')})"
+    
+    def get_absolute_url(self):
+        return reverse('core:simulador_permalink', args=[self.id])
+
+
+class EventoSimulacion(models.Model):
+    """Evento de analítica por simulación (registro de solo inserción)"""
+    
+    fecha = models.DateTimeField(
+        db_index=True,
+        verbose_name="Fecha"
+    )
+    
+    id_simulacion = models.CharField(
+        max_length=16,
+        blank=True,
+        verbose_name="ID de Simulación"
+    )
+    
+    version_config = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Versión de Configuración"
+    )
+    
+    ubicacion = models.CharField(
+        max_length=50,
+        verbose_name="Ubicación"
+    )
+    
+    modo = models.CharField(
+        max_length=20,
+        verbose_name="Modo"
+    )
+    
+    perfil_consumo = models.CharField(
+        max_length=20,
+        verbose_name="Perfil de Consumo"
+    )
+    
+    consumo_anual = models.FloatField(
+        verbose_name="Consumo Anual (kWh)"
+    )
+    
+    superficie = models.FloatField(
+        verbose_name="Superficie (m²)"
+    )
+    
+    potencia_instalada = models.FloatField(
+        verbose_name="Potencia Instalada (kW)"
+    )
+    
+    rango_potencia = models.CharField(
+        max_length=10,
+        choices=CostoInstalacion.RANGOS_POTENCIA,
+        verbose_name="Rango de Potencia"
+    )
+    
+    num_paneles = models.PositiveIntegerField(
+        verbose_name="Número de Paneles"
+    )
+    
+    ahorro_total_anual = models.FloatField(
+        verbose_name="Ahorro Anual (€)"
+    )
+    
+    costo_instalacion = models.FloatField(
+        verbose_name="Costo de Instalación (€)"
+    )
+    
+    periodo_retorno = models.FloatField(
+        verbose_name="Periodo de Retorno (años)"
+    )
+    
+    incluye_bateria = models.BooleanField(
+        default=False,
+        verbose_name="Incluye Batería"
+    )
+    
+    optimizado = models.BooleanField(
+        default=False,
+        verbose_name="Optimizado"
+    )
+    
+    class Meta:
+        verbose_name = "Evento de Simulación"
+        verbose_name_plural = "Eventos de Simulación"
+        ordering = ['-fecha']
+    
+    def __str__(self):
+        return f"{self.fecha:%Y-%m-%d %H:%M} - {self.ubicacion} ({self.potencia_instalada} kW)"
+
+
+class ResumenDiarioSimulaciones(models.Model):
+    """Resumen diario de simulaciones por provincia y rango de potencia"""
+    
+    fecha = models.DateField(
+        verbose_name="Fecha"
+    )
+    
+    ubicacion = models.CharField(
+        max_length=50,
+        verbose_name="Ubicación"
+    )
+    
+    rango_potencia = models.CharField(
+        max_length=10,
+        choices=CostoInstalacion.RANGOS_POTENCIA,
+        verbose_name="Rango de Potencia"
+    )
+    
+    simulaciones = models.PositiveIntegerField(
+        verbose_name="Simulaciones"
+    )
+    
+    con_bateria = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Con Batería"
+    )
+    
+    potencia_media = models.FloatField(
+        verbose_name="Potencia Media (kW)"
+    )
+    
+    consumo_medio = models.FloatField(
+        verbose_name="Consumo Medio (kWh)"
+    )
+    
+    ahorro_medio = models.FloatField(
+        verbose_name="Ahorro Medio (€)"
+    )
+    
+    retorno_medio = models.FloatField(
+        verbose_name="Retorno Medio (años)"
+    )
+    
+    retorno_minimo = models.FloatField(
+        verbose_name="Retorno Mínimo (años)"
+    )
+    
+    retorno_maximo = models.FloatField(
+        verbose_name="Retorno Máximo (años)"
+    )
+    
+    class Meta:
+        verbose_name = "Resumen Diario de Simulaciones"
+        verbose_name_plural = "Resúmenes Diarios de Simulaciones"
+        ordering = ['-fecha', 'ubicacion', 'rango_potencia']
+        unique_together = ['fecha', 'ubicacion', 'rango_potencia']
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.ubicacion} {self.get_rango_potencia_display()}: {self.simulaciones}"
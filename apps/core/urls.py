@@ -13,6 +13,11 @@ urlpatterns = [
     
     # Simulador Solar
     path('simulador/', views.SimuladorSolarView.as_view(), name='simulador'),
+    path('simulador/batch/', views.SimuladorBatchView.as_view(), name='simulador_batch'),
+    path('simulador/parametros/', views.SimuladorParametrosView.as_view(), name='simulador_parametros'),
+    path('simulador/cache/', views.SimuladorCacheView.as_view(), name='simulador_cache'),
+    path('simulador/informe/<str:formato>/', views.SimuladorInformeView.as_view(), name='simulador_informe'),
+    path('simulador/r/<str:id_simulacion>/', views.SimuladorPermalinkView.as_view(), name='simulador_permalink'),
     
     # API endpoints
     path('api/whatsapp-config/', views.whatsapp_config, name='whatsapp_config'),
@@ -1,13 +1,38 @@
-from django.shortcuts import render
-from django.views.generic import TemplateView
-from django.http import HttpResponse, JsonResponse
+from django.shortcuts import render, get_object_or_404
+from django.views.generic import TemplateView, View
+from django.http import HttpResponse, JsonResponse, FileResponse, Http404, HttpResponseNotModified
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.contrib.admin.views.decorators import staff_member_required
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
 from datetime import datetime
+from functools import partial
 import json
 import math
-from .models import Project, HomePortada
+import zlib
+from asgiref.sync import sync_to_async
+from .models import Project, HomePortada, SimulacionGuardada
+from apps.simulador.snapshot import get_snapshot, aget_snapshot
+from apps.simulador.batch import leer_escenarios
+from apps.simulador.engine import (
+    simular, simular_horario, simular_lote, normalizar_entradas,
+    MODELO_SIMPLIFICADO, MODELO_HORARIO
+)
+from apps.simulador.perfiles import get_perfiles, PERFIL_RESIDENCIAL, PERFILES_CONSUMO
+from apps.simulador.bateria import simular_bateria, leer_capacidades
+from apps.simulador.optimizador import optimizar, CRITERIOS, TASA_DESCUENTO_DEFECTO
+from apps.simulador.incertidumbre import bandas_incertidumbre, MUESTRAS_DEFECTO, MUESTRAS_MAXIMAS
+from apps.simulador.cache import get_cache_resultados
+from apps.simulador.ubicaciones import resolver_ubicacion
+from apps.simulador.informes import (
+    FORMATOS_INFORME, GENERADORES, TIPOS_CONTENIDO, clave_informe, obtener_informe
+)
+from apps.simulador.permalinks import registrar_simulacion, get_buffer_simulaciones
+from apps.simulador.analitica import registrar_evento
+from apps.simulador.parametros_cliente import paquete_json
 
 
 class HomeView(TemplateView):
@@ -29,7 +54,7 @@ class HomeView(TemplateView):
             noticias_destacadas = Noticia.objects.filter(
                 destacada=True,
                 activa=True
-            ).select_related('categoria').order_by('-fecha_publicacion')[:3]
+            ).tarjetas().order_by('-fecha_publicacion')[:3]
         except ImportError:
             # Si el modelo no existe aún, continuar sin noticias
             noticias_destacadas = []
@@ -83,64 +108,70 @@ class ServicesView(TemplateView):
         return context
 
 
+class EntradaInvalida(ValueError):
+    """Entrada del simulador no válida: el mensaje se devuelve tal cual al usuario"""
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class SimuladorSolarView(TemplateView):
-    """Vista del Simulador Solar de INGLAT"""
+    """
+    Vista del Simulador Solar de INGLAT.
+    
+    GET y POST son async: con ASGI el modelo simplificado (el caso común) se
+    calcula en el event loop con el snapshot en memoria; horario, batería,
+    optimización e incertidumbre pasan a un hilo para no bloquearlo.
+    """
     template_name = 'core/simulador.html'
     
+    async def get(self, request, *args, **kwargs):
+        self.snapshot = await aget_snapshot()
+        return self.render_to_response(self.get_context_data(**kwargs))
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
             'current_year': datetime.now().year,
             'page_title': 'Simulador Solar - INGLAT',
             'meta_description': 'Calcula el ahorro y retorno de inversión de tu instalación solar con nuestro simulador avanzado. Resultados personalizados instantáneos.',
+            # URL versionada: el navegador puede guardar el paquete mientras no cambien los parámetros
+            'parametros_url': f"{reverse('core:simulador_parametros')}?v={self.snapshot.version}",
         })
         return context
     
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         """Procesa los datos del formulario del simulador y calcula resultados"""
         try:
             data = json.loads(request.body)
             
-            # Validar y extraer datos del formulario con validaciones robustas
             try:
-                consumo_anual = float(data.get('consumo_anual', 0))
-                if consumo_anual < 0 or consumo_anual > 100000:
-                    raise ValueError("Consumo anual debe estar entre 0 y 100,000 kWh")
-            except (ValueError, TypeError):
-                return JsonResponse({'success': False, 'error': 'Consumo anual inválido'}, status=400)
+                entradas, ubicacion_resuelta = self.leer_entradas(data)
+            except EntradaInvalida as e:
+                return JsonResponse({'success': False, 'error': str(e)}, status=400)
             
-            try:
-                superficie = float(data.get('superficie', 0))
-                if superficie < 0 or superficie > 10000:
-                    raise ValueError("Superficie debe estar entre 0 y 10,000 m²")
-            except (ValueError, TypeError):
-                return JsonResponse({'success': False, 'error': 'Superficie inválida'}, status=400)
+            snapshot = await aget_snapshot()
+            resultados, estado_cache = await self.aobtener_resultados(entradas, snapshot)
+            if resultados is None:
+                return JsonResponse({'success': False, 'error': 'La superficie no admite ningún panel'}, status=400)
             
-            try:
-                inclinacion = float(data.get('inclinacion', 30))
-                if inclinacion < 0 or inclinacion > 90:
-                    raise ValueError("Inclinación debe estar entre 0 y 90 grados")
-            except (ValueError, TypeError):
-                return JsonResponse({'success': False, 'error': 'Inclinación inválida'}, status=400)
-            
-            # Variables de texto
-            ubicacion = str(data.get('ubicacion', '')).strip()
-            orientacion = str(data.get('orientacion', 'N')).strip()
-            
-            # Validar ubicación no vacía
-            if not ubicacion:
-                return JsonResponse({'success': False, 'error': 'Ubicación es requerida'}, status=400)
-            
-            # Realizar cálculos
-            resultados = self.calcular_simulacion(
-                consumo_anual, ubicacion, orientacion, inclinacion, superficie
+            # Enlace permanente y analítica: colas en memoria, se guardan en segundo plano
+            id_simulacion = registrar_simulacion(
+                snapshot.version, entradas, resultados, snapshot.config.version
             )
+            registrar_evento(entradas, resultados, id_simulacion or '', snapshot.config.version)
             
-            return JsonResponse({
+            respuesta = {
                 'success': True,
-                'resultados': resultados
-            })
+                'resultados': resultados,
+                'id_simulacion': id_simulacion,
+            }
+            # Buffer lleno: la simulación no se guardará, así que no hay enlace que compartir
+            if id_simulacion is not None:
+                respuesta['permalink'] = reverse('core:simulador_permalink', args=[id_simulacion])
+            if ubicacion_resuelta:
+                respuesta['ubicacion_resuelta'] = ubicacion_resuelta
+            response = JsonResponse(respuesta)
+            response['X-Simulador-Cache'] = estado_cache
+            return response
             
         except Exception as e:
             return JsonResponse({
@@ -148,134 +179,473 @@ class SimuladorSolarView(TemplateView):
                 'error': str(e)
             }, status=400)
     
-    def calcular_simulacion(self, consumo_anual, ubicacion, orientacion, inclinacion, superficie):
-        """Calcula los resultados de la simulación solar usando parámetros configurables"""
+    def leer_entradas(self, data):
+        """
+        Valida y normaliza las entradas del simulador.
         
-        # Importar modelos necesarios
-        from .models import (
-            SimuladorConfig, CostoInstalacion, FactorUbicacion,
-            FactorOrientacion, AnguloTejado
-        )
+        Devuelve (entradas, ubicacion_resuelta): `entradas` son los argumentos
+        de calcular_resultados. Lanza EntradaInvalida con el mensaje para el usuario.
+        """
+        # Validar y extraer datos del formulario con validaciones robustas
+        try:
+            consumo_anual = float(data.get('consumo_anual', 0))
+            if consumo_anual < 0 or consumo_anual > 100000:
+                raise ValueError("Consumo anual debe estar entre 0 y 100,000 kWh")
+        except (ValueError, TypeError):
+            raise EntradaInvalida('Consumo anual inválido')
+        
+        try:
+            superficie = float(data.get('superficie', 0))
+            if superficie < 0 or superficie > 10000:
+                raise ValueError("Superficie debe estar entre 0 y 10,000 m²")
+        except (ValueError, TypeError):
+            raise EntradaInvalida('Superficie inválida')
+        
+        try:
+            inclinacion = float(data.get('inclinacion', 30))
+            if inclinacion < 0 or inclinacion > 90:
+                raise ValueError("Inclinación debe estar entre 0 y 90 grados")
+        except (ValueError, TypeError):
+            raise EntradaInvalida('Inclinación inválida')
         
-        # Obtener configuración activa
-        config = SimuladorConfig.get_activa()
+        # Variables de texto
+        ubicacion = str(data.get('ubicacion', '')).strip()
+        orientacion = str(data.get('orientacion', 'N')).strip()
         
-        # Parámetros base desde configuración
-        horas_sol_promedio = config.horas_sol_promedio
-        eficiencia_panel = config.eficiencia_panel
-        potencia_panel = config.potencia_panel
-        precio_kwh = config.precio_kwh
+        # Coordenadas opcionales: resuelven la provincia y el perfil de la celda lat/lon
+        coordenadas = (None, None)
+        ubicacion_resuelta = None
+        if data.get('latitud') not in (None, '') or data.get('longitud') not in (None, ''):
+            try:
+                latitud = float(data.get('latitud'))
+                longitud = float(data.get('longitud'))
+                if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+                    raise ValueError("Coordenadas fuera de rango")
+            except (ValueError, TypeError):
+                raise EntradaInvalida('Coordenadas inválidas')
+            codigo, metodo = resolver_ubicacion(latitud, longitud)
+            if codigo is None:
+                raise EntradaInvalida('Coordenadas fuera de Argentina')
+            ubicacion = codigo
+            coordenadas = (round(latitud, 3), round(longitud, 3))
+            ubicacion_resuelta = {
+                'ubicacion': codigo,
+                'metodo': metodo,
+                'latitud': coordenadas[0],
+                'longitud': coordenadas[1],
+            }
         
-        # Sin consumo adicional - simplificado
+        # Validar ubicación no vacía
+        if not ubicacion:
+            raise EntradaInvalida('Ubicación es requerida')
         
-        # Obtener factores desde base de datos
-        factor_ubicacion = FactorUbicacion.get_factor_provincia(ubicacion)
-        factor_orientacion = FactorOrientacion.get_factor_orientacion(orientacion)
+        # Azimut opcional en grados (0° = Norte): tejados fuera de los 8 códigos de orientación
+        if data.get('azimut') not in (None, ''):
+            try:
+                azimut = float(data.get('azimut'))
+                if azimut < 0 or azimut > 360:
+                    raise ValueError("Azimut debe estar entre 0 y 360 grados")
+            except (ValueError, TypeError):
+                raise EntradaInvalida('Azimut inválido')
+            orientacion = round(azimut, 1)
         
-        # Factor de inclinación - buscar en base de datos o calcular
-        try:
-            angulo_tejado = AnguloTejado.objects.get(angulo=int(inclinacion), activo=True)
-            factor_inclinacion = angulo_tejado.get_factor_inclinacion()
-        except AnguloTejado.DoesNotExist:
-            # Cálculo por defecto si no está en BD
-            factor_inclinacion = 1.0 - abs(inclinacion - 32) * 0.01
-            factor_inclinacion = max(0.7, min(1.0, factor_inclinacion))
-        
-        # Sin factor de complejidad del tejado (simplificado)
-        factor_complejidad_tejado = 1.0
-        
-        # Producción diaria requerida
-        produccion_diaria_requerida = consumo_anual / 365
-        
-        # Potencia instalada necesaria (kW)
-        potencia_necesaria = produccion_diaria_requerida / (
-            horas_sol_promedio * factor_ubicacion * factor_orientacion * factor_inclinacion
+        # Normalizar entradas numéricas: formularios casi idénticos comparten resultado en caché
+        consumo_anual, superficie, inclinacion = normalizar_entradas(consumo_anual, superficie, inclinacion)
+        
+        # Modelo de producción: simplificado (por defecto) u horario de 8760 pasos
+        modo = str(data.get('modo', MODELO_SIMPLIFICADO)).strip()
+        if modo not in (MODELO_SIMPLIFICADO, MODELO_HORARIO):
+            raise EntradaInvalida('Modo de simulación inválido')
+        
+        perfil_consumo = str(data.get('perfil_consumo', PERFIL_RESIDENCIAL)).strip()
+        if perfil_consumo not in PERFILES_CONSUMO:
+            raise EntradaInvalida('Perfil de consumo inválido')
+        
+        # Batería: despacho horario para varias capacidades (fuerza el modelo horario)
+        bateria = bool(data.get('bateria', False))
+        capacidades_bateria = None
+        if bateria:
+            try:
+                capacidades_bateria = leer_capacidades(data.get('capacidades_bateria'))
+            except ValueError as e:
+                raise EntradaInvalida(str(e))
+        
+        # Optimizador de tamaño: 'van' (mayor VAN) o 'retorno' (menor período de retorno)
+        criterio = data.get('optimizar')
+        tasa_descuento = TASA_DESCUENTO_DEFECTO
+        if criterio:
+            criterio = str(criterio).strip()
+            if criterio not in CRITERIOS:
+                raise EntradaInvalida('Criterio de optimización inválido')
+            if bateria:
+                raise EntradaInvalida('La optimización no admite batería')
+            try:
+                tasa_descuento = float(data.get('tasa_descuento', TASA_DESCUENTO_DEFECTO))
+                if tasa_descuento < 0 or tasa_descuento > 0.5:
+                    raise ValueError("Tasa de descuento debe estar entre 0 y 0.5")
+            except (ValueError, TypeError):
+                raise EntradaInvalida('Tasa de descuento inválida')
+        
+        # Bandas de incertidumbre Monte Carlo (opcional)
+        incertidumbre = None
+        if data.get('incertidumbre', False):
+            try:
+                # Límite fijo (no por tiempo): las bandas son reproducibles y se guardan en caché
+                maximo = min(
+                    getattr(settings, 'SIMULADOR_MONTECARLO_MAX_MUESTRAS', MUESTRAS_MAXIMAS), MUESTRAS_MAXIMAS
+                )
+                muestras = int(data.get('muestras', min(MUESTRAS_DEFECTO, maximo)))
+                if muestras < 1 or muestras > maximo:
+                    raise ValueError(f"Muestras debe estar entre 1 y {maximo:,}")
+                # Semilla por defecto derivada de las entradas: misma consulta, mismas bandas
+                semilla = int(data.get('semilla', zlib.crc32(
+                    f'{consumo_anual}|{ubicacion}|{orientacion}|{inclinacion}|{superficie}'.encode('utf-8')
+                )))
+                if semilla < 0:
+                    raise ValueError("La semilla debe ser positiva")
+            except (ValueError, TypeError):
+                raise EntradaInvalida('Parámetros de incertidumbre inválidos')
+            incertidumbre = (muestras, semilla)
+        
+        entradas = {
+            'consumo_anual': consumo_anual,
+            'ubicacion': ubicacion,
+            'orientacion': orientacion,
+            'inclinacion': inclinacion,
+            'superficie': superficie,
+            'modo': modo,
+            'perfil_consumo': perfil_consumo,
+            'capacidades_bateria': capacidades_bateria,
+            'criterio': criterio or None,
+            'tasa_descuento': tasa_descuento,
+            'incertidumbre': incertidumbre,
+            'coordenadas': coordenadas,
+        }
+        return entradas, ubicacion_resuelta
+    
+    @staticmethod
+    def clave_resultados(entradas, snapshot):
+        """Clave de caché: entradas normalizadas + versión de parámetros"""
+        return (
+            snapshot.version, entradas['consumo_anual'], entradas['ubicacion'],
+            entradas['coordenadas'], entradas['orientacion'], entradas['inclinacion'],
+            entradas['superficie'], entradas['modo'], entradas['perfil_consumo'],
+            tuple(entradas['capacidades_bateria']) if entradas['capacidades_bateria'] is not None else None,
+            entradas['criterio'], entradas['tasa_descuento'], entradas['incertidumbre'],
+        )
+    
+    def obtener_resultados(self, entradas, snapshot=None):
+        """Resultados desde la caché por entradas normalizadas + versión de parámetros"""
+        snapshot = snapshot or get_snapshot()
+        return get_cache_resultados().obtener(
+            self.clave_resultados(entradas, snapshot),
+            lambda: self.calcular_resultados(snapshot=snapshot, **entradas)
+        )
+    
+    async def aobtener_resultados(self, entradas, snapshot):
+        """obtener_resultados() para la vista async: solo los cálculos pesados salen del event loop"""
+        calcular = partial(self.calcular_resultados, snapshot=snapshot, **entradas)
+        if self.calculo_ligero(entradas):
+            # Modelo simplificado: fracciones de milisegundo, no compensa el salto a un hilo
+            async def calcular_async():
+                return calcular()
+        else:
+            calcular_async = sync_to_async(calcular, thread_sensitive=False)
+        return await get_cache_resultados().aobtener(
+            self.clave_resultados(entradas, snapshot), calcular_async
+        )
+    
+    @staticmethod
+    def calculo_ligero(entradas):
+        """True si es el modelo simplificado sin batería, optimizador ni Monte Carlo"""
+        return (
+            entradas['modo'] == MODELO_SIMPLIFICADO
+            and entradas['capacidades_bateria'] is None
+            and not entradas['criterio']
+            and not entradas['incertidumbre']
         )
+    
+    def calcular_resultados(self, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                            modo, perfil_consumo, capacidades_bateria=None, criterio=None,
+                            tasa_descuento=TASA_DESCUENTO_DEFECTO, incertidumbre=None,
+                            coordenadas=(None, None), snapshot=None):
+        """Resultados completos de una petición (None si el optimizador no encuentra tamaño)"""
+        snapshot = snapshot or get_snapshot()
+        if criterio:
+            resultados = self.calcular_optimizacion(
+                consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                criterio, tasa_descuento, modo=modo, perfil_consumo=perfil_consumo,
+                coordenadas=coordenadas, snapshot=snapshot
+            )
+            if resultados is None:
+                return None
+        else:
+            resultados = self.calcular_simulacion(
+                consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                modo=modo, perfil_consumo=perfil_consumo,
+                capacidades_bateria=capacidades_bateria, coordenadas=coordenadas,
+                snapshot=snapshot
+            )
+        
+        if incertidumbre:
+            muestras, semilla = incertidumbre
+            resultados['incertidumbre'] = bandas_incertidumbre(
+                snapshot.parametros, consumo_anual,
+                resultados['energia_autoconsumida'], resultados['ahorro_total_anual'],
+                resultados['costo_instalacion'], muestras=muestras, semilla=semilla
+            )
+        return resultados
+    
+    def calcular_simulacion(self, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                            modo=MODELO_SIMPLIFICADO, perfil_consumo=PERFIL_RESIDENCIAL,
+                            capacidades_bateria=None, coordenadas=(None, None), snapshot=None):
+        """Calcula los resultados de la simulación solar usando parámetros configurables"""
+        
+        # Parámetros desde el snapshot en memoria (sin consultas a la BD)
+        parametros = (snapshot or get_snapshot()).parametros
         
-        # Limitar por superficie disponible
-        paneles_maximos = int(superficie / 2)  # Aprox 2m² por panel
-        potencia_maxima_superficie = paneles_maximos * (potencia_panel / 1000)
-        potencia_instalada = min(potencia_necesaria, potencia_maxima_superficie)
-        
-        # Número de paneles
-        num_paneles = int(potencia_instalada * 1000 / potencia_panel)
-        
-        # Producción anual estimada
-        produccion_anual = (
-            potencia_instalada * 
-            horas_sol_promedio * 365 * 
-            factor_ubicacion * 
-            factor_orientacion * 
-            factor_inclinacion
+        if capacidades_bateria is not None:
+            # Se devuelve la capacidad óptima y la comparación de todas las evaluadas
+            perfiles = get_perfiles()
+            resultado, capacidad_optima, opciones = simular_bateria(
+                parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                perfil_irradiancia=perfiles.perfil_irradiancia(ubicacion, *coordenadas),
+                perfil_consumo=perfiles.perfil_consumo(perfil_consumo),
+                capacidades=capacidades_bateria, categoria=perfil_consumo
+            )
+            resultados = resultado.to_dict()
+            resultados['bateria'] = {
+                'capacidad_optima_kwh': capacidad_optima,
+                'opciones': opciones,
+            }
+            return resultados
+        
+        if modo == MODELO_HORARIO:
+            # Perfiles precargados en memoria: curva de irradiancia vs curva de consumo
+            perfiles = get_perfiles()
+            resultado = simular_horario(
+                parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                perfil_irradiancia=perfiles.perfil_irradiancia(ubicacion, *coordenadas),
+                perfil_consumo=perfiles.perfil_consumo(perfil_consumo),
+                categoria=perfil_consumo
+            )
+        else:
+            # Con tarifa escalonada las facturas mensuales usan el reparto de los perfiles
+            reparto_mensual = None
+            if parametros.tarifa(ubicacion, perfil_consumo) is not None:
+                reparto_mensual = get_perfiles().reparto_mensual(ubicacion, perfil_consumo, *coordenadas)
+            resultado = simular(
+                parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                categoria=perfil_consumo, reparto_mensual=reparto_mensual
+            )
+        return resultado.to_dict()
+    
+    def calcular_optimizacion(self, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                              criterio, tasa_descuento, modo=MODELO_SIMPLIFICADO,
+                              perfil_consumo=PERFIL_RESIDENCIAL, coordenadas=(None, None),
+                              snapshot=None):
+        """Evalúa todos los tamaños que caben en la superficie y devuelve el óptimo"""
+        parametros = (snapshot or get_snapshot()).parametros
+        
+        perfiles_horarios = {}
+        if modo == MODELO_HORARIO:
+            perfiles = get_perfiles()
+            perfiles_horarios = {
+                'perfil_irradiancia': perfiles.perfil_irradiancia(ubicacion, *coordenadas),
+                'perfil_consumo': perfiles.perfil_consumo(perfil_consumo),
+            }
+        elif parametros.tarifa(ubicacion, perfil_consumo) is not None:
+            # Mismo reparto mensual de las facturas que calcular_simulacion()
+            perfiles_horarios = {
+                'reparto_mensual': get_perfiles().reparto_mensual(ubicacion, perfil_consumo, *coordenadas),
+            }
+        
+        optimizacion = optimizar(
+            parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+            criterio=criterio, tasa_descuento=tasa_descuento, categoria=perfil_consumo,
+            **perfiles_horarios
         )
+        if optimizacion is None:
+            return None
+        
+        resultado, resumen = optimizacion
+        resultados = resultado.to_dict()
+        resultados['optimizacion'] = resumen
+        return resultados
+
+
+class SimuladorInformeView(SimuladorSolarView):
+    """
+    Informe descargable (PDF o CSV) de una simulación.
+    
+    Las entradas van en la query string, así que la URL se puede compartir.
+    El archivo se guarda por hash de entradas + versión de parámetros y las
+    descargas siguientes se sirven desde el storage sin recalcular.
+    """
+    http_method_names = ['get']
+    
+    # El informe cubre la simulación base (sin batería, optimizador ni Monte Carlo)
+    CAMPOS_EXCLUIDOS = ('bateria', 'capacidades_bateria', 'optimizar', 'tasa_descuento',
+                        'incertidumbre', 'muestras', 'semilla')
+    
+    def get(self, request, formato, *args, **kwargs):
+        if formato not in FORMATOS_INFORME:
+            raise Http404("Formato de informe no disponible")
         
-        # Autoconsumo sin baterías (simplificado)
-        autoconsumo_porcentaje = config.autoconsumo_sin_bateria
-        costo_bateria = 0
+        data = request.GET.dict()
+        for campo in self.CAMPOS_EXCLUIDOS:
+            data.pop(campo, None)
+        try:
+            entradas, _ = self.leer_entradas(data)
+        except EntradaInvalida as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        
+        snapshot = get_snapshot()
+        version = snapshot.version
+        clave = clave_informe(version, entradas, formato)
+        etag = f'"{clave}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponseNotModified()
+        
+        def renderizar():
+            resultados, _ = self.obtener_resultados(entradas, snapshot)
+            if resultados is None:
+                return None
+            return GENERADORES[formato](entradas, resultados, version)
+        
+        ruta, estado = obtener_informe(clave, formato, renderizar)
+        if ruta is None:
+            return JsonResponse({'success': False, 'error': 'La superficie no admite ningún panel'}, status=400)
+        
+        response = FileResponse(
+            default_storage.open(ruta, 'rb'),
+            as_attachment=True,
+            filename=f'simulacion-solar-{clave[:12]}.{formato}',
+            content_type=TIPOS_CONTENIDO[formato],
+        )
+        response['ETag'] = etag
+        response['X-Simulador-Informe'] = estado
+        return response
+
+
+class SimuladorPermalinkView(TemplateView):
+    """Página del simulador con una simulación guardada: se muestra sin recalcular"""
+    template_name = 'core/simulador.html'
+    
+    # El registro es inmutable: el navegador y los proxies pueden guardarlo un año
+    MAX_AGE = 365 * 24 * 3600
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        id_simulacion = kwargs['id_simulacion']
         
-        energia_autoconsumida = produccion_anual * autoconsumo_porcentaje
-        energia_excedente = produccion_anual - energia_autoconsumida
+        # Recién calculada: puede estar todavía en el buffer de este proceso. Los demás
+        # procesos responden 404 hasta que se vacíe (cada pocos segundos); el 404 no
+        # lleva la cabecera immutable, así que no queda guardado en caché
+        registro = get_buffer_simulaciones().pendiente(id_simulacion)
+        if registro is None:
+            registro = get_object_or_404(SimulacionGuardada, pk=id_simulacion)
         
-        # Ahorro anual
-        ahorro_autoconsumo = min(energia_autoconsumida, consumo_anual) * precio_kwh
-        # Compensación por excedentes
-        compensacion_excedentes = energia_excedente * precio_kwh * config.compensacion_excedentes
-        ahorro_total_anual = ahorro_autoconsumo + compensacion_excedentes
+        context.update({
+            'current_year': datetime.now().year,
+            'page_title': 'Simulación Solar compartida - INGLAT',
+            'meta_description': 'Resultados de una simulación solar realizada con el simulador de INGLAT.',
+            'simulacion_guardada': {
+                'id': registro.id,
+                'entradas': registro.entradas,
+                'version_parametros': registro.version_parametros,
+                'version_config': registro.version_config,
+                'resultados': registro.resultados,
+            },
+        })
+        return context
+    
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        patch_cache_control(response, public=True, max_age=self.MAX_AGE, immutable=True)
+        return response
+
+
+class SimuladorParametrosView(View):
+    """Paquete de parámetros para recalcular en el navegador (static/js/simulador-kernel.js)"""
+    
+    # Con ?v=<versión vigente> la URL identifica el contenido: se puede guardar un año
+    MAX_AGE_VERSIONADO = 365 * 24 * 3600
+    
+    def get(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        cuerpo, etag = paquete_json(snapshot)
         
-        # Costo total de la instalación (simplificado)
-        costo_instalacion_info = CostoInstalacion.get_costo_para_potencia(potencia_instalada)
-        costo_base_por_kw = costo_instalacion_info.costo_por_kw if costo_instalacion_info else 900
-        costo_instalacion = potencia_instalada * costo_base_por_kw
+        if request.headers.get('If-None-Match') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(cuerpo, content_type='application/json')
+        response['ETag'] = etag
         
-        # Período de retorno (payback)
-        if ahorro_total_anual > 0:
-            periodo_retorno = costo_instalacion / ahorro_total_anual
+        if request.GET.get('v') == snapshot.version:
+            patch_cache_control(response, public=True, max_age=self.MAX_AGE_VERSIONADO, immutable=True)
         else:
-            periodo_retorno = 0
-        
-        # Ahorro acumulado en 25 años
-        ahorro_25_anos = ahorro_total_anual * 25 - costo_instalacion
-        
-        # Datos para gráfico año por año
-        datos_anuales = []
-        ahorro_acumulado = -costo_instalacion
-        
-        for ano in range(26):  # 0 a 25 años
-            if ano == 0:
-                ahorro_acumulado = -costo_instalacion
-            else:
-                # Degradación anual desde configuración
-                factor_degradacion = (1 - config.degradacion_anual) ** (ano - 1)
-                ahorro_ano = ahorro_total_anual * factor_degradacion
-                ahorro_acumulado += ahorro_ano
-            
-            datos_anuales.append({
-                'ano': ano,
-                'ahorro_acumulado': round(ahorro_acumulado, 2)
-            })
-        
-        return {
-            'potencia_instalada': round(potencia_instalada, 2),
-            'num_paneles': num_paneles,
-            'superficie_necesaria': round(num_paneles * 2, 2),
-            'produccion_anual': round(produccion_anual, 2),
-            'autoconsumo_porcentaje': round(autoconsumo_porcentaje * 100, 1),
-            'energia_autoconsumida': round(energia_autoconsumida, 2),
-            'ahorro_total_anual': round(ahorro_total_anual, 2),
-            'costo_instalacion': round(costo_instalacion, 2),
-            'periodo_retorno': round(periodo_retorno, 1),
-            'ahorro_25_anos': round(ahorro_25_anos, 2),
-            'datos_anuales': datos_anuales,
-            'incluye_bateria': False,
-            'costo_bateria': round(costo_bateria, 2),
-            'factor_ubicacion': factor_ubicacion,
-            'factor_orientacion': factor_orientacion,
-            'factor_inclinacion': round(factor_inclinacion, 3),
-            'factor_complejidad_tejado': factor_complejidad_tejado
+            # Sin versión (o una vieja): revalidar cuando pueda haber cambiado el snapshot
+            patch_cache_control(response, public=True, max_age=getattr(settings, 'SIMULADOR_SNAPSHOT_TTL', 300))
+        return response
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class SimuladorCacheView(View):
+    """Contadores de la caché de resultados del simulador (proceso actual, solo staff)"""
+    
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({
+            'success': True,
+            'cache': get_cache_resultados().estadisticas()
+        })
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class SimuladorBatchView(View):
+    """API del simulador por lotes: muchos escenarios en una sola petición"""
+    http_method_names = ['post']
+    
+    def post(self, request, *args, **kwargs):
+        """Simula todos los escenarios del payload y devuelve resultados en columnas"""
+        try:
+            data = json.loads(request.body)
+        except (ValueError, TypeError):
+            return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+        
+        try:
+            escenarios = leer_escenarios(data)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+        
+        snapshot = get_snapshot()
+        parametros = snapshot.parametros
+        columnas = dict(escenarios)
+        categoria = columnas.pop('perfil_consumo')
+        
+        # Mismo reparto mensual que /simulador/ para los pares (provincia, categoría) con tarifa
+        repartos = {
+            (provincia, tipo): get_perfiles().reparto_mensual(provincia, tipo)
+            for provincia, tipo in set(zip(columnas['ubicacion'].tolist(), categoria.tolist()))
+            if parametros.tarifa(provincia, tipo) is not None
         }
+        resultados = simular_lote(
+            parametros, categoria=categoria, repartos=repartos,
+            incluir_datos_anuales=bool(data.get('incluir_datos_anuales', False)),
+            **columnas
+        )
+        
+        return JsonResponse({
+            'success': True,
+            'total': len(escenarios['consumo_anual']),
+            'version_parametros': snapshot.version,
+            'version_config': snapshot.config.version,
+            'escenarios': {campo: valores.tolist() for campo, valores in escenarios.items()},
+            'resultados': resultados
+        })
 
 
-def whatsapp_config(request):
+async def whatsapp_config(request):
     """API endpoint para obtener configuración de WhatsApp de forma segura"""
     return JsonResponse({
         'phoneNumber': settings.WHATSAPP_NUMBER,
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén binario de perfiles horarios de irradiancia mapeado en memoria.
+
+Formato en disco (dos archivos con el mismo nombre base):
+
+    perfiles_horarios.npy   matriz float32 de N filas x 8760 horas (formato .npy)
+    perfiles_horarios.json  índice: provincia -> fila, celda lat/lon -> fila,
+                            checksums SHA-256 del .npy y de las fuentes CSV
+
+El .npy se abre con `numpy.memmap` en modo solo lectura, así que todos los
+workers de gunicorn comparten las mismas páginas del page cache del sistema
+operativo en lugar de copiar los perfiles en la memoria de cada proceso.
+Por eso el almacén nunca se reescribe en su sitio: se genera en archivos
+temporales del mismo directorio y se sustituye con `os.replace`, y los
+workers que ya lo tienen mapeado siguen leyendo el archivo anterior.
+"""
+import csv
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .engine import HORAS_ANO
+
+
+VERSION_FORMATO = 1
+
+# Resolución por defecto de la grilla lat/lon (grados)
+RESOLUCION_CELDA = 0.5
+
+PATRON_CELDA = re.compile(r'^celda_(-?\d+(?:\.\d+)?)_(-?\d+(?:\.\d+)?)$')
+
+
+class AlmacenPerfilesError(Exception):
+    """Error de formato o integridad del almacén de perfiles"""
+
+
+def ruta_indice(ruta_datos):
+    """Ruta del índice JSON que acompaña al archivo .npy"""
+    return Path(ruta_datos).with_suffix('.json')
+
+
+def clave_celda(latitud, longitud, resolucion=RESOLUCION_CELDA):
+    """Clave de la celda de la grilla que contiene un punto"""
+    fila = math.floor(latitud / resolucion)
+    columna = math.floor(longitud / resolucion)
+    return f"{fila}:{columna}"
+
+
+def sha256_archivo(ruta, bloque=1024 * 1024):
+    """Checksum SHA-256 de un archivo leído por bloques"""
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for datos in iter(lambda: archivo.read(bloque), b''):
+            digest.update(datos)
+    return digest.hexdigest()
+
+
+def normalizar_perfil(valores):
+    """Convierte una serie horaria en un perfil que suma 1"""
+    valores = np.clip(np.asarray(valores, dtype=np.float64), 0.0, None)
+    if valores.shape != (HORAS_ANO,):
+        raise AlmacenPerfilesError(
+            f"Se esperaban {HORAS_ANO} valores horarios, se recibieron {valores.size}"
+        )
+    total = valores.sum()
+    if total <= 0:
+        raise AlmacenPerfilesError("La serie horaria no tiene irradiancia")
+    return (valores / total).astype(np.float32)
+
+
+def leer_serie_csv(ruta):
+    """
+    Lee una serie horaria desde CSV.
+
+    Acepta una sola columna numérica o un encabezado con la columna
+    `irradiancia` (o `ghi`); las demás columnas se ignoran.
+    """
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        filas = [fila for fila in csv.reader(archivo) if fila]
+
+    if not filas:
+        raise AlmacenPerfilesError(f"{ruta}: archivo vacío")
+
+    columna = 0
+    try:
+        float(filas[0][0])
+    except ValueError:
+        encabezado = [nombre.strip().lower() for nombre in filas[0]]
+        for nombre in ('irradiancia', 'ghi'):
+            if nombre in encabezado:
+                columna = encabezado.index(nombre)
+                break
+        filas = filas[1:]
+
+    try:
+        return [float(fila[columna]) for fila in filas]
+    except (ValueError, IndexError):
+        raise AlmacenPerfilesError(f"{ruta}: valores no numéricos")
+
+
+def construir_almacen(destino, series, resolucion=RESOLUCION_CELDA, fuentes=None):
+    """
+    Escribe el almacén a partir de series horarias.
+
+    `series` es una lista de tuplas (clave, valores) donde la clave es un
+    código de provincia o una tupla (latitud, longitud) para celdas de grilla.
+    Devuelve el índice escrito.
+
+    Los dos archivos se escriben primero como temporales y se sustituyen de
+    forma atómica (el .npy antes que el índice): si la construcción falla,
+    el almacén anterior queda intacto.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal_datos = _temporal(destino)
+    temporal_indice = _temporal(ruta_indice(destino))
+
+    try:
+        matriz = np.lib.format.open_memmap(
+            temporal_datos, mode='w+', dtype=np.float32, shape=(len(series), HORAS_ANO)
+        )
+        provincias = {}
+        celdas = {}
+        for fila, (clave, valores) in enumerate(series):
+            matriz[fila] = normalizar_perfil(valores)
+            if isinstance(clave, tuple):
+                celdas[clave_celda(clave[0], clave[1], resolucion)] = fila
+            else:
+                provincias[clave] = fila
+        matriz.flush()
+        del matriz
+
+        indice = {
+            'version': VERSION_FORMATO,
+            'horas': HORAS_ANO,
+            'dtype': 'float32',
+            'filas': len(series),
+            'resolucion_celda': resolucion,
+            'provincias': provincias,
+            'celdas': celdas,
+            'sha256': sha256_archivo(temporal_datos),
+            'fuentes': fuentes or {},
+        }
+        with open(temporal_indice, 'w', encoding='utf-8') as archivo:
+            json.dump(indice, archivo, indent=2, sort_keys=True)
+
+        os.replace(temporal_datos, destino)
+        os.replace(temporal_indice, ruta_indice(destino))
+    finally:
+        for temporal in (temporal_datos, temporal_indice):
+            if temporal.exists():
+                temporal.unlink()
+    return indice
+
+
+def _temporal(ruta):
+    """Archivo temporal vacío junto a `ruta` (mismo sistema de archivos para os.replace)"""
+    descriptor, nombre = tempfile.mkstemp(prefix=f'.{ruta.name}.', suffix='.tmp', dir=ruta.parent)
+    os.close(descriptor)
+    # mkstemp crea el archivo con 0600: los workers pueden correr con otro usuario
+    os.chmod(nombre, 0o644)
+    return Path(nombre)
+
+
+def series_desde_directorio(directorio):
+    """
+    Series horarias desde un directorio de CSV.
+
+    `<provincia>.csv` define el perfil de una provincia y
+    `celda_<lat>_<lon>.csv` el de la celda que contiene ese punto.
+    Devuelve (series, checksums de las fuentes).
+    """
+    series = []
+    fuentes = {}
+    for ruta in sorted(Path(directorio).glob('*.csv')):
+        nombre = ruta.stem
+        coincidencia = PATRON_CELDA.match(nombre)
+        clave = (
+            (float(coincidencia.group(1)), float(coincidencia.group(2)))
+            if coincidencia else nombre
+        )
+        series.append((clave, leer_serie_csv(ruta)))
+        fuentes[ruta.name] = sha256_archivo(ruta)
+    return series, fuentes
+
+
+class AlmacenPerfiles:
+    """Almacén de perfiles abierto en modo solo lectura (memmap)"""
+
+    __slots__ = ('ruta', 'matriz', 'provincias', 'celdas', 'resolucion', 'indice')
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        try:
+            with open(ruta_indice(self.ruta), encoding='utf-8') as archivo:
+                self.indice = json.load(archivo)
+        except (OSError, ValueError) as e:
+            raise AlmacenPerfilesError(f"Índice de perfiles ilegible: {e}")
+
+        if self.indice.get('version') != VERSION_FORMATO:
+            raise AlmacenPerfilesError("Versión de formato de perfiles no soportada")
+
+        self.matriz = np.load(self.ruta, mmap_mode='r')
+        esperado = (self.indice['filas'], self.indice['horas'])
+        if self.matriz.shape != esperado or self.matriz.dtype != np.float32:
+            raise AlmacenPerfilesError(
+                f"El archivo de perfiles no coincide con el índice: {self.matriz.shape} != {esperado}"
+            )
+
+        self.provincias = self.indice['provincias']
+        self.celdas = self.indice['celdas']
+        self.resolucion = self.indice['resolucion_celda']
+
+    def perfil_provincia(self, provincia):
+        """Perfil de la provincia o None"""
+        fila = self.provincias.get(provincia)
+        return None if fila is None else self.matriz[fila]
+
+    def perfil_coordenadas(self, latitud, longitud):
+        """Perfil de la celda de grilla que contiene el punto o None"""
+        fila = self.celdas.get(clave_celda(latitud, longitud, self.resolucion))
+        return None if fila is None else self.matriz[fila]
+
+    def verificar(self, directorio_fuentes=None):
+        """
+        Comprueba checksums: el del .npy contra el índice y, si se indica un
+        directorio, el de cada CSV fuente. Devuelve la lista de errores.
+        """
+        errores = []
+        if sha256_archivo(self.ruta) != self.indice.get('sha256'):
+            errores.append(f"{self.ruta.name}: checksum distinto al del índice")
+
+        if directorio_fuentes:
+            directorio = Path(directorio_fuentes)
+            for nombre, checksum in sorted(self.indice.get('fuentes', {}).items()):
+                ruta = directorio / nombre
+                if not ruta.exists():
+                    errores.append(f"{nombre}: fuente no encontrada")
+                elif sha256_archivo(ruta) != checksum:
+                    errores.append(f"{nombre}: la fuente cambió desde la construcción")
+        return errores
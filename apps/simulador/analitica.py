@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de eventos de simulación para analítica (solo inserción).
+
+La vista encola un evento por simulación en una cola acotada del proceso
+y responde sin escribir en la base de datos. El hilo de fondo inserta los
+eventos con `bulk_create` cada `intervalo` segundos o al juntar un lote.
+Si la base de datos no está disponible, el lote se escribe en un archivo
+JSON Lines del directorio de spool y se reingresa en el siguiente vaciado
+correcto (o con `manage.py simulador_analitica --recuperar-spool`). Un
+archivo que falla por sus datos (no por la conexión) se reintenta unas
+pocas veces y luego pasa al subdirectorio `cuarentena/` para no bloquear
+a los demás; los `.procesando` abandonados por un proceso que murió a
+mitad de reingreso vuelven al spool pasado un tiempo.
+
+El comando `simulador_analitica` arma además los resúmenes diarios
+(ResumenDiarioSimulaciones) que consume el tablero.
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .segundo_plano import VaciadoPeriodico
+
+
+logger = logging.getLogger(__name__)
+
+# Límite superior (kW) de cada rango de potencia (códigos de CostoInstalacion.RANGOS_POTENCIA)
+LIMITES_RANGO_POTENCIA = (
+    ('0-3', 3),
+    ('3-5', 5),
+    ('5-10', 10),
+    ('10+', None),
+)
+
+EXTENSION_SPOOL = '.jsonl'
+EXTENSION_PROCESANDO = '.procesando'
+DIRECTORIO_CUARENTENA = 'cuarentena'
+
+# Reintentos de un archivo del spool antes de apartarlo en cuarentena
+MAX_INTENTOS_SPOOL = 3
+# Segundos tras los que un .procesando se da por abandonado (el reingreso tarda segundos)
+ANTIGUEDAD_PROCESANDO = 600
+
+
+def rango_potencia(potencia_kw):
+    """Código del rango de potencia de una instalación"""
+    for codigo, limite in LIMITES_RANGO_POTENCIA:
+        if limite is None or potencia_kw < limite:
+            return codigo
+
+
+def evento_simulacion(entradas, resultados, id_simulacion='', version_config=None):
+    """Evento serializable (JSON) con lo que interesa a marketing de una simulación"""
+    return {
+        'fecha': timezone.now().isoformat(),
+        'id_simulacion': id_simulacion,
+        'version_config': version_config,
+        'ubicacion': entradas['ubicacion'],
+        'modo': entradas['modo'],
+        'perfil_consumo': entradas['perfil_consumo'],
+        'consumo_anual': entradas['consumo_anual'],
+        'superficie': entradas['superficie'],
+        'potencia_instalada': resultados['potencia_instalada'],
+        'rango_potencia': rango_potencia(resultados['potencia_instalada']),
+        'num_paneles': resultados['num_paneles'],
+        'ahorro_total_anual': resultados['ahorro_total_anual'],
+        'costo_instalacion': resultados['costo_instalacion'],
+        'periodo_retorno': resultados['periodo_retorno'],
+        'incluye_bateria': resultados['incluye_bateria'],
+        'optimizado': 'optimizacion' in resultados,
+    }
+
+
+def guardar_eventos(eventos):
+    """Inserta eventos en bloque"""
+    from apps.core.models import EventoSimulacion
+
+    EventoSimulacion.objects.bulk_create(
+        [EventoSimulacion(**{**evento, 'fecha': parse_datetime(evento['fecha'])}) for evento in eventos],
+        batch_size=500,
+    )
+
+
+class ColaEventos(VaciadoPeriodico):
+    """Cola acotada de eventos con vaciado periódico y spool en disco como respaldo"""
+
+    nombre_hilo = 'simulador-analitica'
+
+    def __init__(self, directorio_spool, guardar=guardar_eventos, intervalo=5.0, lote=200,
+                 max_pendientes=10000):
+        super().__init__(intervalo)
+        self.directorio_spool = Path(directorio_spool)
+        self.guardar = guardar
+        self.lote = lote
+        self.max_pendientes = max_pendientes
+        self._pendientes = []
+        # Fallos por archivo del spool (nombre -> intentos) en este proceso
+        self._fallos_spool = {}
+        self.guardados = self.descartados = self.en_spool = self.recuperados = 0
+        self.en_cuarentena = 0
+
+    def agregar(self, evento):
+        """Encola un evento sin bloquear la petición (se descarta si la cola está llena)"""
+        with self._lock:
+            if len(self._pendientes) >= self.max_pendientes:
+                self.descartados += 1
+                return
+            self._pendientes.append(evento)
+            lleno = len(self._pendientes) >= self.lote
+            self._asegurar_hilo()
+        if lleno:
+            self.despertar()
+
+    def vaciar(self):
+        """Inserta los pendientes; si la base de datos falla, los escribe en el spool"""
+        with self._lock:
+            eventos, self._pendientes = self._pendientes, []
+        if not eventos:
+            return 0
+
+        try:
+            self.guardar(eventos)
+        except Exception as e:
+            # Los eventos ya salieron de la cola: al spool para no perderlos
+            logger.warning(f'No se pudieron guardar {len(eventos)} eventos, al spool: {e}')
+            self.escribir_spool(eventos)
+            return 0
+
+        with self._lock:
+            self.guardados += len(eventos)
+        # La base de datos responde: reingresar lo que haya quedado en el spool
+        self.recuperar_spool()
+        return len(eventos)
+
+    def escribir_spool(self, eventos):
+        """Escribe un lote en un archivo nuevo del spool (nombre único por proceso y lote)"""
+        self.directorio_spool.mkdir(parents=True, exist_ok=True)
+        nombre = f'eventos-{time.strftime("%Y%m%d%H%M%S")}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        temporal = self.directorio_spool / f'{nombre}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            for evento in eventos:
+                archivo.write(json.dumps(evento) + '\n')
+        # Renombrar al final: ningún lector ve un archivo a medio escribir
+        os.replace(temporal, self.directorio_spool / f'{nombre}{EXTENSION_SPOOL}')
+        with self._lock:
+            self.en_spool += len(eventos)
+
+    def recuperar_spool(self):
+        """Reingresa los archivos del spool; devuelve cuántos eventos se insertaron"""
+        if not self.directorio_spool.is_dir():
+            return 0
+
+        self.reclamar_procesando()
+        insertados = 0
+        for ruta in sorted(self.directorio_spool.glob(f'*{EXTENSION_SPOOL}')):
+            # Renombrar primero: si otro proceso ya lo tomó, el rename falla y se sigue
+            procesando = ruta.with_suffix(EXTENSION_PROCESANDO)
+            try:
+                os.rename(ruta, procesando)
+            except OSError:
+                continue
+            # El rename conserva la fecha del archivo: marcar cuándo empezó el reingreso
+            os.utime(procesando)
+
+            try:
+                with open(procesando, encoding='utf-8') as archivo:
+                    eventos = [json.loads(linea) for linea in archivo if linea.strip()]
+                self.guardar(eventos)
+            except (OperationalError, InterfaceError) as e:
+                # Sin conexión fallarían también los siguientes: se reintenta en otro vaciado
+                os.rename(procesando, ruta)
+                logger.warning(f'No se pudo reingresar {ruta.name}: {e}')
+                break
+            except Exception as e:
+                # Error del propio archivo (datos inválidos, integridad...): seguir con los demás
+                os.rename(procesando, ruta)
+                self._fallo_spool(ruta, e)
+                continue
+            procesando.unlink()
+            self._fallos_spool.pop(ruta.name, None)
+            insertados += len(eventos)
+
+        with self._lock:
+            self.recuperados += insertados
+        return insertados
+
+    def _fallo_spool(self, ruta, error):
+        """Cuenta un fallo de un archivo del spool y lo aparta tras MAX_INTENTOS_SPOOL"""
+        intentos = self._fallos_spool.get(ruta.name, 0) + 1
+        if intentos < MAX_INTENTOS_SPOOL:
+            self._fallos_spool[ruta.name] = intentos
+            logger.warning(f'No se pudo reingresar {ruta.name} (intento {intentos}): {error}')
+            return
+
+        self._fallos_spool.pop(ruta.name, None)
+        cuarentena = self.directorio_spool / DIRECTORIO_CUARENTENA
+        cuarentena.mkdir(exist_ok=True)
+        try:
+            os.rename(ruta, cuarentena / ruta.name)
+        except OSError:
+            return
+        with self._lock:
+            self.en_cuarentena += 1
+        logger.error(f'{ruta.name} falló {intentos} veces, movido a {cuarentena}: {error}')
+
+    def reclamar_procesando(self, antiguedad=ANTIGUEDAD_PROCESANDO):
+        """Devuelve al spool los .procesando abandonados por procesos que murieron a mitad de reingreso"""
+        limite = time.time() - antiguedad
+        reclamados = 0
+        for procesando in self.directorio_spool.glob(f'*{EXTENSION_PROCESANDO}'):
+            try:
+                if procesando.stat().st_mtime > limite:
+                    # Otro proceso lo está reingresando ahora mismo
+                    continue
+                os.rename(procesando, procesando.with_suffix(EXTENSION_SPOOL))
+            except OSError:
+                continue
+            reclamados += 1
+        if reclamados:
+            logger.warning(f'{reclamados} archivos .procesando abandonados devueltos al spool')
+        return reclamados
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'pendientes': len(self._pendientes),
+                'guardados': self.guardados,
+                'descartados': self.descartados,
+                'en_spool': self.en_spool,
+                'recuperados': self.recuperados,
+                'en_cuarentena': self.en_cuarentena,
+            }
+
+
+def directorio_spool():
+    """Directorio de spool de eventos"""
+    return Path(getattr(
+        settings, 'SIMULADOR_ANALITICA_SPOOL_DIR',
+        Path(settings.BASE_DIR) / 'logs' / 'simulador_spool'
+    ))
+
+
+_lock = threading.Lock()
+_cola = None
+
+
+def get_cola_eventos():
+    """Cola de eventos del proceso (se vacía también al terminar el proceso)"""
+    global _cola
+    cola = _cola
+    if cola is not None:
+        return cola
+
+    with _lock:
+        if _cola is None:
+            _cola = ColaEventos(
+                directorio_spool(),
+                intervalo=getattr(settings, 'SIMULADOR_ANALITICA_INTERVALO', 5.0),
+                lote=getattr(settings, 'SIMULADOR_ANALITICA_LOTE', 200),
+                max_pendientes=getattr(settings, 'SIMULADOR_ANALITICA_MAX_PENDIENTES', 10000),
+            )
+            atexit.register(_cola.vaciar)
+            # Arranque del proceso: recuperar lo que dejó a medias un proceso anterior
+            if _cola.directorio_spool.is_dir():
+                _cola.reclamar_procesando()
+        return _cola
+
+
+def registrar_evento(entradas, resultados, id_simulacion='', version_config=None):
+    """Encola el evento de una simulación"""
+    get_cola_eventos().agregar(evento_simulacion(entradas, resultados, id_simulacion, version_config))
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class SimuladorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.simulador'
-    verbose_name = 'Simulador Solar'
\ No newline at end of file
+    verbose_name = 'Simulador Solar'
+
+    def ready(self):
+        # Conectar señales de invalidación del snapshot de parámetros
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Lectura y validación de escenarios para la simulación solar por lotes.
+
+Convierte el payload de /simulador/batch/ en columnas NumPy listas para
+`engine.simular_lote`, que calcula cientos o miles de escenarios
+(provincia x orientación x consumo ...) en una sola pasada.
+"""
+import itertools
+
+import numpy as np
+
+from django.conf import settings
+
+from .engine import normalizar_entradas
+from .perfiles import PERFIL_RESIDENCIAL, PERFILES_CONSUMO
+
+
+# Campos de entrada: (valor por defecto, mínimo, máximo) para los numéricos
+CAMPOS_NUMERICOS = {
+    'consumo_anual': (0, 0, 100000),
+    'superficie': (0, 0, 10000),
+    'inclinacion': (30, 0, 90),
+}
+CAMPOS_TEXTO = {
+    'ubicacion': '',
+    'orientacion': 'N',
+    # Categoría de la tarifa, igual que en /simulador/
+    'perfil_consumo': PERFIL_RESIDENCIAL,
+}
+
+
+def max_escenarios():
+    """Número máximo de escenarios aceptados por petición"""
+    return getattr(settings, 'SIMULADOR_BATCH_MAX_ESCENARIOS', 20000)
+
+
+def leer_escenarios(data):
+    """
+    Convierte el payload JSON en columnas validadas.
+
+    Acepta una lista explícita `escenarios: [{...}, ...]` o un producto
+    cartesiano `combinar: {'ubicacion': [...], 'consumo_anual': [...], ...}`.
+    Lanza ValueError con un mensaje legible si algo no es válido.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("El cuerpo debe ser un objeto JSON")
+
+    if 'combinar' in data:
+        escenarios = _expandir_combinaciones(data['combinar'])
+    else:
+        escenarios = data.get('escenarios')
+        if not isinstance(escenarios, list):
+            raise ValueError("Se requiere una lista 'escenarios' o un objeto 'combinar'")
+
+    if not escenarios:
+        raise ValueError("No hay escenarios para simular")
+    if len(escenarios) > max_escenarios():
+        raise ValueError(f"Máximo {max_escenarios()} escenarios por petición")
+    if not all(isinstance(escenario, dict) for escenario in escenarios):
+        raise ValueError("Cada escenario debe ser un objeto JSON")
+
+    columnas = {}
+    for campo, (defecto, minimo, maximo) in CAMPOS_NUMERICOS.items():
+        try:
+            valores = np.array(
+                [escenario.get(campo, defecto) for escenario in escenarios], dtype=float
+            )
+        except (ValueError, TypeError):
+            raise ValueError(f"Valor no numérico en '{campo}'")
+        invalidos = ~np.isfinite(valores) | (valores < minimo) | (valores > maximo)
+        if invalidos.any():
+            indice = int(np.argmax(invalidos))
+            raise ValueError(
+                f"Escenario {indice}: '{campo}' debe estar entre {minimo:,} y {maximo:,}"
+            )
+        columnas[campo] = valores
+
+    for campo, defecto in CAMPOS_TEXTO.items():
+        valores = np.array(
+            [str(escenario.get(campo, defecto)).strip() for escenario in escenarios]
+        )
+        columnas[campo] = valores
+
+    vacios = columnas['ubicacion'] == ''
+    if vacios.any():
+        raise ValueError(f"Escenario {int(np.argmax(vacios))}: ubicación es requerida")
+
+    invalidos = ~np.isin(columnas['perfil_consumo'], PERFILES_CONSUMO)
+    if invalidos.any():
+        raise ValueError(f"Escenario {int(np.argmax(invalidos))}: perfil de consumo inválido")
+
+    # Mismo redondeo que /simulador/ (round() de Python, no np.round): mismos resultados
+    normalizadas = [
+        normalizar_entradas(consumo, superficie, inclinacion)
+        for consumo, superficie, inclinacion in zip(
+            columnas['consumo_anual'].tolist(), columnas['superficie'].tolist(),
+            columnas['inclinacion'].tolist()
+        )
+    ]
+    for campo, valores in zip(('consumo_anual', 'superficie', 'inclinacion'), zip(*normalizadas)):
+        columnas[campo] = np.array(valores, dtype=float)
+
+    return columnas
+
+
+def _expandir_combinaciones(combinar):
+    """Producto cartesiano de listas de valores por campo"""
+    if not isinstance(combinar, dict) or not combinar:
+        raise ValueError("'combinar' debe ser un objeto con listas de valores")
+
+    campos_validos = set(CAMPOS_NUMERICOS) | set(CAMPOS_TEXTO)
+    desconocidos = set(combinar) - campos_validos
+    if desconocidos:
+        raise ValueError(f"Campos desconocidos en 'combinar': {', '.join(sorted(desconocidos))}")
+
+    campos = sorted(combinar)
+    listas = []
+    total = 1
+    for campo in campos:
+        valores = combinar[campo]
+        if not isinstance(valores, list):
+            valores = [valores]
+        total *= len(valores)
+        listas.append(valores)
+
+    if total > max_escenarios():
+        raise ValueError(f"Máximo {max_escenarios()} escenarios por petición")
+
+    return [dict(zip(campos, valores)) for valores in itertools.product(*listas)]
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Despacho horario de baterías para el simulador solar.
+
+Simula carga y descarga durante un año de 8760 horas para varias capacidades
+de batería a la vez. El estado de carga es una recurrencia hora a hora
+(soc[t] = clip(soc[t-1] + delta[t], 0, capacidad)), así que no se puede
+resolver con una sola suma acumulada. Pero la composición de funciones
+x -> clip(x + a, l, h) es otra función de la misma forma, de modo que:
+
+1. se compone el mapa de cada día recorriendo sus 24 horas con arrays de
+   (capacidades x 365 días);
+2. un scan prefijo en paralelo (log2(365) = 9 pasos) da el estado de carga
+   al inicio de cada día;
+3. una segunda pasada de 24 horas obtiene la energía cargada y descargada.
+
+El resultado es idéntico al del bucle hora a hora con un costo fijo de
+unas 60 operaciones vectoriales.
+
+Módulo puro, como `engine`: no importa Django.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import (
+    ANOS_PROYECCION, HORAS_ANO, MODELO_HORARIO, dimensionar, _resultado
+)
+from .tarifas import INICIO_MES_HORAS, facturas_mensuales, sumar_por_mes
+
+
+# Capacidades evaluadas por defecto (kWh); 0 = sin batería
+CAPACIDADES_DEFECTO = (0, 2.5, 5, 7.5, 10, 13.5, 15, 20)
+
+# Límites de las capacidades que puede pedir el cliente
+CAPACIDAD_MAXIMA = 200
+MAX_CAPACIDADES = 20
+
+# Eficiencia de ida y vuelta (carga x descarga)
+EFICIENCIA_BATERIA = 0.90
+
+# Potencia máxima de carga/descarga como fracción de la capacidad por hora (C-rate)
+TASA_C = 0.5
+
+DIAS_ANO = HORAS_ANO // 24
+INICIO_MES_DIAS = INICIO_MES_HORAS // 24
+
+DespachoBateria = namedtuple(
+    'DespachoBateria',
+    ['capacidades', 'energia_autoconsumida', 'energia_excedente', 'energia_descargada', 'ciclos',
+     'autoconsumo_mensual', 'excedente_mensual']
+)
+
+
+def leer_capacidades(valores):
+    """Valida la lista de capacidades (kWh) recibida en la petición"""
+    if valores is None:
+        return CAPACIDADES_DEFECTO
+    if not isinstance(valores, list) or not valores:
+        raise ValueError("'capacidades_bateria' debe ser una lista de kWh")
+    if len(valores) > MAX_CAPACIDADES:
+        raise ValueError(f"Máximo {MAX_CAPACIDADES} capacidades de batería")
+    try:
+        capacidades = [float(valor) for valor in valores]
+    except (ValueError, TypeError):
+        raise ValueError("Capacidad de batería no numérica")
+    if any(not 0 <= capacidad <= CAPACIDAD_MAXIMA for capacidad in capacidades):
+        raise ValueError(f"Las capacidades de batería deben estar entre 0 y {CAPACIDAD_MAXIMA} kWh")
+    return capacidades
+
+
+def despachar(produccion_horaria, consumo_horario, capacidades,
+              eficiencia=EFICIENCIA_BATERIA, tasa_c=TASA_C):
+    """
+    Despacho de autoconsumo para K capacidades de batería.
+
+    La batería se carga sólo con excedente solar y se descarga para cubrir el
+    consumo que la producción no alcanza; empieza el año vacía. Devuelve
+    arrays de longitud K con la energía autoconsumida (directa + descargada),
+    el excedente inyectado a la red, la energía entregada por la batería y
+    los ciclos equivalentes anuales, más el autoconsumo y el excedente de
+    cada mes (K x 12) para las facturas.
+    """
+    capacidades = np.asarray(capacidades, dtype=float)
+    produccion_horaria = np.asarray(produccion_horaria, dtype=float)
+    consumo_horario = np.asarray(consumo_horario, dtype=float)
+
+    eficiencia_tramo = np.sqrt(eficiencia)
+    neto = produccion_horaria - consumo_horario
+    directa_mensual = sumar_por_mes(np.minimum(produccion_horaria, consumo_horario))
+    excedente_red_mensual = sumar_por_mes(np.maximum(neto, 0.0))
+    directa = directa_mensual.sum()
+    excedente_total = excedente_red_mensual.sum()
+
+    # Variación pedida al estado de carga en cada hora: (K, 365, 24)
+    potencia_max = (capacidades * tasa_c)[:, None, None]
+    neto_dias = neto.reshape(DIAS_ANO, 24)[None, :, :]
+    delta = np.where(
+        neto_dias > 0,
+        np.minimum(neto_dias * eficiencia_tramo, potencia_max),
+        -np.minimum(-neto_dias / eficiencia_tramo, potencia_max),
+    )
+
+    capacidad = capacidades[:, None]
+
+    # 1. Mapa de cada día: soc_final = clip(soc_inicial + a, l, h)
+    a = np.zeros((capacidades.size, DIAS_ANO))
+    l = np.full_like(a, -np.inf)
+    h = np.full_like(a, np.inf)
+    for hora in range(24):
+        paso = delta[:, :, hora]
+        a += paso
+        l = np.clip(l + paso, 0.0, capacidad)
+        h = np.clip(h + paso, 0.0, capacidad)
+
+    # 2. Scan prefijo: mapa acumulado desde el 1 de enero hasta cada día
+    salto = 1
+    while salto < DIAS_ANO:
+        previo_a, previo_l, previo_h = a[:, :-salto], l[:, :-salto], h[:, :-salto]
+        actual_a, actual_l, actual_h = a[:, salto:], l[:, salto:], h[:, salto:]
+        a = np.concatenate([a[:, :salto], previo_a + actual_a], axis=1)
+        l = np.concatenate([l[:, :salto], np.clip(previo_l + actual_a, actual_l, actual_h)], axis=1)
+        h = np.concatenate([h[:, :salto], np.clip(previo_h + actual_a, actual_l, actual_h)], axis=1)
+        salto *= 2
+
+    # La batería empieza el año vacía
+    soc_final = np.clip(a, l, h)
+    soc = np.zeros_like(soc_final)
+    soc[:, 1:] = soc_final[:, :-1]
+
+    # 3. Energía cargada y descargada con el estado inicial exacto de cada día
+    carga = np.zeros_like(soc)
+    descarga = np.zeros_like(soc)
+    for hora in range(24):
+        nuevo = np.clip(soc + delta[:, :, hora], 0.0, capacidad)
+        cambio = nuevo - soc
+        carga += np.maximum(cambio, 0.0)
+        descarga -= np.minimum(cambio, 0.0)
+        soc = nuevo
+
+    energia_cargada = carga.sum(axis=1)
+    energia_descargada = descarga.sum(axis=1) * eficiencia_tramo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ciclos = np.where(capacidades > 0, descarga.sum(axis=1) / capacidades, 0.0)
+
+    return DespachoBateria(
+        capacidades=capacidades,
+        energia_autoconsumida=directa + energia_descargada,
+        energia_excedente=excedente_total - energia_cargada / eficiencia_tramo,
+        energia_descargada=energia_descargada,
+        ciclos=ciclos,
+        autoconsumo_mensual=(
+            directa_mensual + np.add.reduceat(descarga, INICIO_MES_DIAS, axis=1) * eficiencia_tramo
+        ),
+        excedente_mensual=(
+            excedente_red_mensual - np.add.reduceat(carga, INICIO_MES_DIAS, axis=1) / eficiencia_tramo
+        ),
+    )
+
+
+def simular_bateria(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                    perfil_irradiancia, perfil_consumo, capacidades=CAPACIDADES_DEFECTO,
+                    categoria=None):
+    """
+    Simulación horaria con batería para varias capacidades.
+
+    Devuelve (resultado óptimo, capacidad óptima, lista de opciones evaluadas).
+    La óptima es la de mayor ahorro acumulado a 25 años (con degradación);
+    la capacidad 0 compite como opción sin batería. Con tarifa para la
+    provincia y la `categoria`, el ahorro de cada capacidad sale de las
+    facturas mensuales, como en `engine.simular_horario`.
+    """
+    capacidades = sorted({float(capacidad) for capacidad in capacidades} | {0.0})
+    dimension = dimensionar(
+        parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie
+    )
+
+    consumo_horario = consumo_anual * perfil_consumo
+    despacho = despachar(
+        dimension.produccion_anual * perfil_irradiancia,
+        consumo_horario,
+        capacidades,
+    )
+    tarifa = parametros.tarifa(ubicacion, categoria)
+    consumo_mensual = sumar_por_mes(consumo_horario) if tarifa is not None else None
+
+    # costo_bateria_por_kw de la banda de la instalación, aplicado por kWh de capacidad
+    banda = parametros.banda_costo(dimension.potencia_instalada)
+    costo_bateria_kwh = banda.costo_bateria_por_kw if banda else 0
+
+    resultados = []
+    opciones = []
+    for indice, capacidad in enumerate(capacidades):
+        energia_autoconsumida = float(despacho.energia_autoconsumida[indice])
+        if dimension.produccion_anual > 0:
+            autoconsumo_porcentaje = energia_autoconsumida / dimension.produccion_anual
+        else:
+            autoconsumo_porcentaje = 0.0
+
+        facturas = None
+        if tarifa is not None:
+            facturas = facturas_mensuales(
+                tarifa, consumo_mensual,
+                despacho.autoconsumo_mensual[indice], despacho.excedente_mensual[indice]
+            )
+
+        resultado = _resultado(
+            parametros, dimension, consumo_anual, energia_autoconsumida,
+            autoconsumo_porcentaje, MODELO_HORARIO,
+            costo_bateria=capacidad * costo_bateria_kwh,
+            energia_excedente=float(despacho.energia_excedente[indice]),
+            facturas=facturas,
+        )
+        resultados.append(resultado)
+        opciones.append({
+            'capacidad_kwh': capacidad,
+            'autoconsumo_porcentaje': round(autoconsumo_porcentaje * 100, 1),
+            'energia_descargada': round(float(despacho.energia_descargada[indice]), 2),
+            'ciclos_anuales': round(float(despacho.ciclos[indice]), 1),
+            'costo_bateria': round(resultado.costo_bateria, 2),
+            'ahorro_total_anual': round(resultado.ahorro_total_anual, 2),
+            'periodo_retorno': round(resultado.periodo_retorno, 1),
+            'ahorro_acumulado_25': round(resultado.ahorro_acumulado[ANOS_PROYECCION], 2),
+        })
+
+    optimo = max(
+        range(len(capacidades)), key=lambda indice: resultados[indice].ahorro_acumulado[-1]
+    )
+    return resultados[optimo], capacidades[optimo], opciones
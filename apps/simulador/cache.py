@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de resultados del simulador (LRU + TTL) por proceso.
+
+La clave la arma la vista con las entradas normalizadas y la versión del
+snapshot de parámetros, así que cualquier cambio en SimuladorConfig o en las
+tablas de factores deja de acertar sin invalidación explícita; las entradas
+viejas salen por LRU o por TTL.
+
+Las peticiones idénticas concurrentes se agrupan: la primera calcula y las
+demás esperan su resultado en lugar de repetir el cálculo. Si el cálculo se
+interrumpe sin error propio (CancelledError de una petición async cuyo
+cliente se desconectó, KeyboardInterrupt...), las agrupadas vuelven a
+intentarlo en lugar de recibir un valor vacío. `aobtener` es la variante
+para vistas async: los aciertos y los cálculos propios no salen del event
+loop.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+ACIERTO = 'HIT'
+FALLO = 'MISS'
+AGRUPADA = 'COALESCED'
+
+
+class _Calculo:
+    """Cálculo en curso para una clave (lo esperan las peticiones agrupadas)"""
+
+    __slots__ = ('evento', 'valor', 'error', 'interrumpido')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+        # Terminó sin valor ni excepción que repetir (BaseException como CancelledError)
+        self.interrumpido = False
+
+
+class CacheResultados:
+    """LRU con expiración por TTL y agrupación de peticiones concurrentes"""
+
+    def __init__(self, max_entradas=2048, ttl=600):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._en_curso = {}
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.agrupadas = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def obtener(self, clave, calcular):
+        """
+        Devuelve (valor, estado) donde estado es HIT, MISS o COALESCED.
+
+        `calcular` se invoca sin argumentos y fuera del lock; si lanza una
+        excepción no se guarda nada y las peticiones agrupadas la reciben.
+        """
+        valor, estado, calculo = self._reservar(clave)
+        if estado == ACIERTO:
+            return valor, estado
+
+        if estado == AGRUPADA:
+            calculo.evento.wait()
+            if calculo.interrumpido:
+                return self.obtener(clave, calcular)
+            return self._agrupado(calculo)
+
+        try:
+            calculo.valor = calcular()
+        except Exception as e:
+            calculo.error = e
+            raise
+        except BaseException:
+            calculo.interrumpido = True
+            raise
+        else:
+            self._guardar(clave, calculo.valor)
+            return calculo.valor, FALLO
+        finally:
+            self._terminar(clave, calculo)
+
+    async def aobtener(self, clave, calcular):
+        """
+        Variante async de `obtener`: `calcular` es una función async sin argumentos.
+
+        Solo las peticiones agrupadas detrás de un cálculo en curso esperan en
+        un hilo (el evento es de `threading`, compartido con las vistas sync).
+        """
+        valor, estado, calculo = self._reservar(clave)
+        if estado == ACIERTO:
+            return valor, estado
+
+        if estado == AGRUPADA:
+            if not calculo.evento.is_set():
+                await sync_to_async(calculo.evento.wait, thread_sensitive=False)()
+            if calculo.interrumpido:
+                # El cliente de la petición que calculaba se desconectó: calcular de nuevo
+                return await self.aobtener(clave, calcular)
+            return self._agrupado(calculo)
+
+        try:
+            calculo.valor = await calcular()
+        except Exception as e:
+            calculo.error = e
+            raise
+        except BaseException:
+            calculo.interrumpido = True
+            raise
+        else:
+            self._guardar(clave, calculo.valor)
+            return calculo.valor, FALLO
+        finally:
+            self._terminar(clave, calculo)
+
+    def _reservar(self, clave):
+        """(valor, ACIERTO, None) si está en caché; si no (None, FALLO o AGRUPADA, cálculo en curso)"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                guardado_en, valor = entrada
+                if time.monotonic() - guardado_en < self.ttl:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor, ACIERTO, None
+                del self._entradas[clave]
+                self.expiradas += 1
+
+            calculo = self._en_curso.get(clave)
+            if calculo is not None:
+                self.agrupadas += 1
+                return None, AGRUPADA, calculo
+
+            calculo = _Calculo()
+            self._en_curso[clave] = calculo
+            self.fallos += 1
+            return None, FALLO, calculo
+
+    @staticmethod
+    def _agrupado(calculo):
+        if calculo.error is not None:
+            raise calculo.error
+        return calculo.valor, AGRUPADA
+
+    def _guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic(), valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.desalojadas += 1
+
+    def _terminar(self, clave, calculo):
+        with self._lock:
+            self._en_curso.pop(clave, None)
+        calculo.evento.set()
+
+    def limpiar(self):
+        """Vacía la caché y reinicia los contadores"""
+        with self._lock:
+            self._entradas.clear()
+            self.aciertos = self.fallos = self.agrupadas = 0
+            self.expiradas = self.desalojadas = 0
+
+    def estadisticas(self):
+        """Contadores de aciertos y fallos del proceso"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos + self.agrupadas
+            return {
+                'entradas': len(self._entradas),
+                'max_entradas': self.max_entradas,
+                'ttl': self.ttl,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'agrupadas': self.agrupadas,
+                'expiradas': self.expiradas,
+                'desalojadas': self.desalojadas,
+                'tasa_aciertos': round((self.aciertos + self.agrupadas) / consultas, 4) if consultas else 0.0,
+            }
+
+
+_lock = threading.Lock()
+_cache = None
+
+
+def get_cache_resultados():
+    """Caché de resultados del proceso (se crea con la configuración de settings)"""
+    global _cache
+    cache = _cache
+    if cache is not None:
+        return cache
+
+    with _lock:
+        if _cache is None:
+            _cache = CacheResultados(
+                max_entradas=getattr(settings, 'SIMULADOR_CACHE_MAX_ENTRADAS', 2048),
+                ttl=getattr(settings, 'SIMULADOR_CACHE_TTL', 600),
+            )
+        return _cache
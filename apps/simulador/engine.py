@@ -0,0 +1,672 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo de cálculo del simulador solar.
+
+Módulo puro: no importa Django ni hace I/O. Recibe un ParametrosSimulacion
+(construido a partir del snapshot de parámetros) más las entradas del usuario
+y devuelve resultados tipados. Lo usan la vista del simulador, la API por
+lotes y el comando `simulador_calcular`; al ser picklable también puede
+ejecutarse en un pool de procesos o medirse de forma aislada.
+"""
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+from .tarifas import REPARTO_DIAS, ahorro_anual_lote, facturas_mensuales, sumar_por_mes
+
+
+ANOS_PROYECCION = 25
+
+# Valores por defecto históricos del simulador cuando no hay datos en BD
+FACTOR_UBICACION_DEFECTO = 0.9
+FACTOR_ORIENTACION_DEFECTO = 0.9
+COSTO_POR_KW_DEFECTO = 900
+
+# Latitud usada cuando la provincia no tiene coordenadas (promedio nacional)
+LATITUD_DEFECTO = -32.0
+
+# Azimut de cada código de orientación (0° = Norte, sentido horario)
+AZIMUT_ORIENTACIONES = {
+    'N': 0, 'NE': 45, 'E': 90, 'SE': 135,
+    'S': 180, 'SO': 225, 'O': 270, 'NO': 315,
+}
+
+# Superficie aproximada que ocupa un panel (m²)
+SUPERFICIE_POR_PANEL = 2
+
+# Modelos de producción disponibles
+MODELO_SIMPLIFICADO = 'simplificado'
+MODELO_HORARIO = 'horario'
+HORAS_ANO = 8760
+
+BandaCosto = namedtuple(
+    'BandaCosto',
+    ['potencia_min', 'potencia_max', 'costo_por_kw', 'costo_bateria_por_kw']
+)
+
+
+def normalizar_entradas(consumo_anual, superficie, inclinacion):
+    """
+    Redondea las entradas numéricas antes de calcular: consumo a 1 kWh,
+    superficie e inclinación a un decimal.
+
+    Formularios casi idénticos comparten resultado en caché, y la vista, la
+    API por lotes y el núcleo del navegador calculan con los mismos valores.
+    """
+    return float(round(consumo_anual)), round(superficie, 1), round(inclinacion, 1)
+
+
+def _describir_banda(banda):
+    if banda.potencia_max:
+        return f"{banda.potencia_min}-{banda.potencia_max} kW"
+    return f"+{banda.potencia_min} kW"
+
+
+def solapamientos_bandas(bandas):
+    """Mensajes de error por bandas que se solapan o con máximo menor que el mínimo"""
+    bandas = sorted(bandas, key=lambda banda: banda.potencia_min)
+    errores = [
+        f"La banda {_describir_banda(banda)} tiene la potencia máxima menor que la mínima"
+        for banda in bandas
+        if banda.potencia_max and banda.potencia_max < banda.potencia_min
+    ]
+    for anterior, siguiente in zip(bandas, bandas[1:]):
+        # Un borde compartido (3-5 y 5-10) no es solapamiento: gana la primera banda
+        if not anterior.potencia_max or siguiente.potencia_min < anterior.potencia_max:
+            errores.append(
+                f"Las bandas {_describir_banda(anterior)} y {_describir_banda(siguiente)} se solapan"
+            )
+    return errores
+
+
+def huecos_bandas(bandas):
+    """Mensajes de error por rangos de potencia sin banda (desde 0 kW y sin límite superior)"""
+    bandas = sorted(bandas, key=lambda banda: banda.potencia_min)
+    if not bandas:
+        return []
+
+    errores = []
+    if bandas[0].potencia_min > 0:
+        errores.append(f"No hay banda entre 0 y {bandas[0].potencia_min} kW")
+    for anterior, siguiente in zip(bandas, bandas[1:]):
+        if anterior.potencia_max and siguiente.potencia_min > anterior.potencia_max:
+            errores.append(
+                f"No hay banda entre {anterior.potencia_max} y {siguiente.potencia_min} kW"
+            )
+    if bandas[-1].potencia_max:
+        errores.append(f"No hay banda para potencias mayores a {bandas[-1].potencia_max} kW")
+    return errores
+
+
+def validar_bandas(bandas):
+    """Todos los errores de un conjunto de bandas: solapamientos y huecos"""
+    return solapamientos_bandas(bandas) + huecos_bandas(bandas)
+
+
+class IndiceBandas:
+    """
+    Índice de intervalos sobre las bandas de CostoInstalacion.
+
+    Guarda los bordes inferiores y superiores ordenados y resuelve la banda de
+    una potencia con `bisect` (escalar) o `searchsorted` (vectorizado), con la
+    semántica histórica: primera banda que encaja (un borde compartido como
+    3-5 / 5-10 resuelve a la primera) y, si ninguna encaja, el primer rango.
+    Los huecos y solapamientos se detectan al construirlo (`errores`).
+    """
+
+    __slots__ = ('bandas', 'minimos', 'maximos', 'costos', 'errores', '_minimos', '_maximos')
+
+    def __init__(self, bandas=()):
+        self.bandas = tuple(
+            sorted((BandaCosto(*banda) for banda in bandas), key=lambda banda: banda.potencia_min)
+        )
+        self._minimos = tuple(banda.potencia_min for banda in self.bandas)
+        self._maximos = tuple(banda.potencia_max or float('inf') for banda in self.bandas)
+        self.minimos = np.array(self._minimos, dtype=float)
+        self.maximos = np.array(self._maximos, dtype=float)
+        self.costos = np.array([banda.costo_por_kw for banda in self.bandas], dtype=float)
+        self.errores = tuple(validar_bandas(self.bandas))
+
+    def __len__(self):
+        return len(self.bandas)
+
+    def buscar(self, potencia_kw):
+        """Posición de la banda de una potencia (-1 si no hay bandas)"""
+        if not self.bandas:
+            return -1
+        for posicion in (
+            bisect_left(self._minimos, potencia_kw) - 1,
+            bisect_right(self._minimos, potencia_kw) - 1,
+        ):
+            if posicion >= 0 and self._minimos[posicion] <= potencia_kw <= self._maximos[posicion]:
+                return posicion
+        return 0
+
+    def buscar_lote(self, potencia):
+        """Posición de la banda de cada potencia de un array"""
+        posiciones = np.zeros(potencia.shape, dtype=int)
+        asignado = np.zeros(potencia.shape, dtype=bool)
+        for lado in ('left', 'right'):
+            candidata = np.searchsorted(self.minimos, potencia, side=lado) - 1
+            valida = candidata >= 0
+            candidata = np.where(valida, candidata, 0)
+            encaja = (
+                valida & ~asignado
+                & (potencia >= self.minimos[candidata]) & (potencia <= self.maximos[candidata])
+            )
+            posiciones[encaja] = candidata[encaja]
+            asignado |= encaja
+        return posiciones
+
+
+class ParametrosSimulacion:
+    """Parámetros compactos del simulador: configuración activa y tablas de factores"""
+
+    __slots__ = (
+        'horas_sol_promedio',
+        'potencia_panel',
+        'precio_kwh',
+        'autoconsumo_sin_bateria',
+        'autoconsumo_con_bateria',
+        'compensacion_excedentes',
+        'degradacion_anual',
+        'factores_ubicacion',
+        'factores_orientacion',
+        'factores_inclinacion',
+        'bandas_costo',
+        'indice_bandas',
+        'latitudes',
+        'transposicion',
+        'tarifas',
+    )
+
+    def __init__(self, horas_sol_promedio, potencia_panel, precio_kwh,
+                 autoconsumo_sin_bateria, autoconsumo_con_bateria,
+                 compensacion_excedentes, degradacion_anual,
+                 factores_ubicacion=None, factores_orientacion=None,
+                 factores_inclinacion=None, bandas_costo=(), latitudes=None,
+                 transposicion=None, tarifas=None):
+        self.horas_sol_promedio = horas_sol_promedio
+        self.potencia_panel = potencia_panel
+        self.precio_kwh = precio_kwh
+        self.autoconsumo_sin_bateria = autoconsumo_sin_bateria
+        self.autoconsumo_con_bateria = autoconsumo_con_bateria
+        self.compensacion_excedentes = compensacion_excedentes
+        self.degradacion_anual = degradacion_anual
+        self.factores_ubicacion = dict(factores_ubicacion or {})
+        self.factores_orientacion = dict(factores_orientacion or {})
+        self.factores_inclinacion = dict(factores_inclinacion or {})
+        self.indice_bandas = IndiceBandas(bandas_costo)
+        self.bandas_costo = self.indice_bandas.bandas
+        # Latitud por provincia y malla de transposición (transposicion.MallaTransposicion)
+        self.latitudes = dict(latitudes or {})
+        self.transposicion = transposicion
+        # Tarifas escalonadas por (provincia, categoría) (tarifas.Tarifa)
+        self.tarifas = dict(tarifas or {})
+
+    def __repr__(self):
+        return (
+            f"<ParametrosSimulacion precio_kwh={self.precio_kwh} "
+            f"provincias={len(self.factores_ubicacion)} bandas={len(self.bandas_costo)}>"
+        )
+
+    def factor_ubicacion(self, provincia_code):
+        """Factor de irradiación de una provincia"""
+        return self.factores_ubicacion.get(provincia_code, FACTOR_UBICACION_DEFECTO)
+
+    def latitud(self, provincia_code):
+        """Latitud de la capital de una provincia"""
+        return self.latitudes.get(provincia_code, LATITUD_DEFECTO)
+
+    def factor_orientacion(self, orientacion, inclinacion=None, provincia_code=None):
+        """
+        Factor de eficiencia de una orientación.
+
+        `orientacion` es un código de FactorOrientacion o un azimut en grados.
+        Lo que no está en la tabla se calcula con el modelo de transposición
+        para la inclinación y la latitud de la provincia.
+        """
+        if isinstance(orientacion, str):
+            factor = self.factores_orientacion.get(orientacion)
+            if factor is not None:
+                return factor
+            azimut = AZIMUT_ORIENTACIONES.get(orientacion)
+        else:
+            azimut = float(orientacion)
+
+        if azimut is None or inclinacion is None or self.transposicion is None:
+            return FACTOR_ORIENTACION_DEFECTO
+        return self.transposicion.factor_orientacion(self.latitud(provincia_code), inclinacion, azimut)
+
+    def factor_inclinacion(self, inclinacion, provincia_code=None):
+        """Factor por inclinación: tabla AnguloTejado, modelo de transposición o cálculo por defecto"""
+        factor = self.factores_inclinacion.get(int(inclinacion))
+        if factor is None and self.transposicion is not None:
+            factor = self.transposicion.factor_inclinacion(self.latitud(provincia_code), inclinacion)
+        if factor is None:
+            # Cálculo por defecto sin modelo de transposición
+            factor = 1.0 - abs(inclinacion - 32) * 0.01
+            factor = max(0.7, min(1.0, factor))
+        return factor
+
+    def banda_costo(self, potencia_kw):
+        """Banda de costo para una potencia (primera que encaja, si no el primer rango)"""
+        posicion = self.indice_bandas.buscar(potencia_kw)
+        return self.bandas_costo[posicion] if posicion >= 0 else None
+
+    def costo_por_kw(self, potencia_kw):
+        """Costo de instalación por kW para una potencia"""
+        banda = self.banda_costo(potencia_kw)
+        return banda.costo_por_kw if banda else COSTO_POR_KW_DEFECTO
+
+    def tarifa(self, provincia_code, categoria):
+        """Tarifa escalonada de una provincia y categoría o None (precio único)"""
+        if categoria is None:
+            return None
+        return self.tarifas.get((provincia_code, categoria))
+
+
+class ResultadoSimulacion:
+    """Resultado de una simulación individual (valores sin redondear)"""
+
+    __slots__ = (
+        'potencia_instalada',
+        'num_paneles',
+        'produccion_anual',
+        'autoconsumo_porcentaje',
+        'energia_autoconsumida',
+        'energia_excedente',
+        'ahorro_total_anual',
+        'costo_instalacion',
+        'periodo_retorno',
+        'ahorro_25_anos',
+        'ahorro_acumulado',
+        'incluye_bateria',
+        'costo_bateria',
+        'factor_ubicacion',
+        'factor_orientacion',
+        'factor_inclinacion',
+        'factor_complejidad_tejado',
+        'modelo',
+        'facturas',
+    )
+
+    def __init__(self, **valores):
+        for campo in self.__slots__:
+            setattr(self, campo, valores[campo])
+
+    @property
+    def superficie_necesaria(self):
+        return self.num_paneles * SUPERFICIE_POR_PANEL
+
+    def to_dict(self):
+        """Formato JSON histórico de la respuesta del simulador"""
+        return {
+            'potencia_instalada': round(self.potencia_instalada, 2),
+            'num_paneles': self.num_paneles,
+            'superficie_necesaria': round(self.superficie_necesaria, 2),
+            'produccion_anual': round(self.produccion_anual, 2),
+            'autoconsumo_porcentaje': round(self.autoconsumo_porcentaje * 100, 1),
+            'energia_autoconsumida': round(self.energia_autoconsumida, 2),
+            'ahorro_total_anual': round(self.ahorro_total_anual, 2),
+            'costo_instalacion': round(self.costo_instalacion, 2),
+            'periodo_retorno': round(self.periodo_retorno, 1),
+            'ahorro_25_anos': round(self.ahorro_25_anos, 2),
+            'datos_anuales': [
+                {'ano': ano, 'ahorro_acumulado': round(ahorro, 2)}
+                for ano, ahorro in enumerate(self.ahorro_acumulado)
+            ],
+            'incluye_bateria': self.incluye_bateria,
+            'costo_bateria': round(self.costo_bateria, 2),
+            'factor_ubicacion': self.factor_ubicacion,
+            'factor_orientacion': round(self.factor_orientacion, 3),
+            'factor_inclinacion': round(self.factor_inclinacion, 3),
+            'factor_complejidad_tejado': self.factor_complejidad_tejado,
+            'modelo': self.modelo,
+            **({'facturas': self.facturas.to_dict()} if self.facturas is not None else {}),
+        }
+
+
+Dimensionamiento = namedtuple(
+    'Dimensionamiento',
+    [
+        'factor_ubicacion', 'factor_orientacion', 'factor_inclinacion',
+        'potencia_instalada', 'num_paneles', 'produccion_anual',
+    ]
+)
+
+
+def dimensionar(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie):
+    """
+    Factores, potencia instalada, número de paneles y producción anual estimada.
+
+    `orientacion` es un código ('N', 'NE', ...) o un azimut en grados.
+    """
+    horas_sol_promedio = parametros.horas_sol_promedio
+    potencia_panel = parametros.potencia_panel
+
+    factor_ubicacion = parametros.factor_ubicacion(ubicacion)
+    factor_orientacion = parametros.factor_orientacion(orientacion, inclinacion, ubicacion)
+    factor_inclinacion = parametros.factor_inclinacion(inclinacion, ubicacion)
+
+    # Potencia instalada necesaria (kW) para la producción diaria requerida
+    produccion_diaria_requerida = consumo_anual / 365
+    potencia_necesaria = produccion_diaria_requerida / (
+        horas_sol_promedio * factor_ubicacion * factor_orientacion * factor_inclinacion
+    )
+
+    # Limitar por superficie disponible
+    paneles_maximos = int(superficie / SUPERFICIE_POR_PANEL)
+    potencia_maxima_superficie = paneles_maximos * (potencia_panel / 1000)
+    potencia_instalada = min(potencia_necesaria, potencia_maxima_superficie)
+
+    num_paneles = int(potencia_instalada * 1000 / potencia_panel)
+
+    # Producción anual estimada
+    produccion_anual = (
+        potencia_instalada *
+        horas_sol_promedio * 365 *
+        factor_ubicacion *
+        factor_orientacion *
+        factor_inclinacion
+    )
+
+    return Dimensionamiento(
+        factor_ubicacion=factor_ubicacion,
+        factor_orientacion=factor_orientacion,
+        factor_inclinacion=factor_inclinacion,
+        potencia_instalada=potencia_instalada,
+        num_paneles=num_paneles,
+        produccion_anual=produccion_anual,
+    )
+
+
+def _resultado(parametros, dimension, consumo_anual, energia_autoconsumida,
+               autoconsumo_porcentaje, modelo, costo_bateria=0, energia_excedente=None,
+               facturas=None):
+    """Cálculo financiero común a todos los modelos de producción"""
+    precio_kwh = parametros.precio_kwh
+    if energia_excedente is None:
+        # Sin almacenamiento: todo lo no autoconsumido se inyecta a la red
+        energia_excedente = dimension.produccion_anual - energia_autoconsumida
+
+    if facturas is not None:
+        # Tarifa escalonada: ahorro = facturas sin solar - facturas con solar
+        ahorro_total_anual = facturas.ahorro_anual
+    else:
+        # Precio único: autoconsumo + compensación por excedentes
+        ahorro_autoconsumo = min(energia_autoconsumida, consumo_anual) * precio_kwh
+        compensacion_excedentes = energia_excedente * precio_kwh * parametros.compensacion_excedentes
+        ahorro_total_anual = ahorro_autoconsumo + compensacion_excedentes
+
+    potencia_instalada = dimension.potencia_instalada
+    costo_instalacion = potencia_instalada * parametros.costo_por_kw(potencia_instalada) + costo_bateria
+
+    # Período de retorno (payback)
+    if ahorro_total_anual > 0:
+        periodo_retorno = costo_instalacion / ahorro_total_anual
+    else:
+        periodo_retorno = 0
+
+    ahorro_25_anos = ahorro_total_anual * ANOS_PROYECCION - costo_instalacion
+
+    # Ahorro acumulado año a año (0 a 25) con degradación anual
+    ahorro_acumulado = [-costo_instalacion]
+    for ano in range(1, ANOS_PROYECCION + 1):
+        factor_degradacion = (1 - parametros.degradacion_anual) ** (ano - 1)
+        ahorro_acumulado.append(ahorro_acumulado[-1] + ahorro_total_anual * factor_degradacion)
+
+    return ResultadoSimulacion(
+        potencia_instalada=potencia_instalada,
+        num_paneles=dimension.num_paneles,
+        produccion_anual=dimension.produccion_anual,
+        autoconsumo_porcentaje=autoconsumo_porcentaje,
+        energia_autoconsumida=energia_autoconsumida,
+        energia_excedente=energia_excedente,
+        ahorro_total_anual=ahorro_total_anual,
+        costo_instalacion=costo_instalacion,
+        periodo_retorno=periodo_retorno,
+        ahorro_25_anos=ahorro_25_anos,
+        ahorro_acumulado=tuple(ahorro_acumulado),
+        incluye_bateria=costo_bateria > 0,
+        costo_bateria=costo_bateria,
+        factor_ubicacion=dimension.factor_ubicacion,
+        factor_orientacion=dimension.factor_orientacion,
+        factor_inclinacion=dimension.factor_inclinacion,
+        # Sin factor de complejidad del tejado (simplificado)
+        factor_complejidad_tejado=1.0,
+        modelo=modelo,
+        facturas=facturas,
+    )
+
+
+def simular(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+            categoria=None, reparto_mensual=None):
+    """
+    Calcula una simulación solar individual con autoconsumo fijo (modelo simplificado).
+
+    Si hay tarifa para la provincia y la `categoria`, el ahorro sale de las
+    facturas mensuales; `reparto_mensual` es (consumo, producción) con la
+    fracción anual de cada mes (por defecto, proporcional a los días).
+    """
+    dimension = dimensionar(
+        parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie
+    )
+
+    # Autoconsumo sin baterías (porcentaje fijo de la configuración)
+    autoconsumo_porcentaje = parametros.autoconsumo_sin_bateria
+    energia_autoconsumida = dimension.produccion_anual * autoconsumo_porcentaje
+
+    facturas = None
+    tarifa = parametros.tarifa(ubicacion, categoria)
+    if tarifa is not None:
+        reparto_consumo, reparto_produccion = reparto_mensual or (REPARTO_DIAS, REPARTO_DIAS)
+        consumo_mensual = consumo_anual * np.asarray(reparto_consumo)
+        produccion_mensual = dimension.produccion_anual * np.asarray(reparto_produccion)
+        autoconsumo_mensual = np.minimum(produccion_mensual * autoconsumo_porcentaje, consumo_mensual)
+        facturas = facturas_mensuales(
+            tarifa, consumo_mensual, autoconsumo_mensual, produccion_mensual - autoconsumo_mensual
+        )
+
+    return _resultado(
+        parametros, dimension, consumo_anual, energia_autoconsumida,
+        autoconsumo_porcentaje, MODELO_SIMPLIFICADO, facturas=facturas
+    )
+
+
+def simular_horario(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                    perfil_irradiancia, perfil_consumo, categoria=None):
+    """
+    Simulación con modelo horario de 8760 pasos.
+
+    `perfil_irradiancia` y `perfil_consumo` son arrays de 8760 valores
+    normalizados (suman 1). La producción anual total coincide con el modelo
+    simplificado; lo que cambia es su reparto horario, del que se derivan la
+    energía autoconsumida y el excedente comparándolo hora a hora con la curva
+    de consumo. Con tarifa para la provincia y la `categoria`, las facturas
+    mensuales se calculan con la energía de cada mes.
+    """
+    dimension = dimensionar(
+        parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie
+    )
+
+    produccion_horaria = dimension.produccion_anual * perfil_irradiancia
+    consumo_horario = consumo_anual * perfil_consumo
+    autoconsumo_horario = np.minimum(produccion_horaria, consumo_horario)
+    energia_autoconsumida = float(autoconsumo_horario.sum())
+
+    if dimension.produccion_anual > 0:
+        autoconsumo_porcentaje = energia_autoconsumida / dimension.produccion_anual
+    else:
+        autoconsumo_porcentaje = 0.0
+
+    facturas = None
+    tarifa = parametros.tarifa(ubicacion, categoria)
+    if tarifa is not None:
+        autoconsumo_mensual = sumar_por_mes(autoconsumo_horario)
+        facturas = facturas_mensuales(
+            tarifa, sumar_por_mes(consumo_horario), autoconsumo_mensual,
+            sumar_por_mes(produccion_horaria) - autoconsumo_mensual
+        )
+
+    return _resultado(
+        parametros, dimension, consumo_anual, energia_autoconsumida,
+        autoconsumo_porcentaje, MODELO_HORARIO, facturas=facturas
+    )
+
+
+# ----------------------------------------------------------------------
+# Versión vectorizada (N escenarios a la vez)
+# ----------------------------------------------------------------------
+
+def _factores_por_codigo(codigos, tabla, defecto):
+    """Busca factores por código con indexación: una búsqueda por código distinto"""
+    unicos, inversos = np.unique(codigos, return_inverse=True)
+    valores = np.array([tabla.get(codigo, defecto) for codigo in unicos], dtype=float)
+    return valores[inversos]
+
+
+def _factores_inclinacion(parametros, inclinacion, latitud):
+    """Factor por inclinación: tabla AnguloTejado (por grado entero), transposición o cálculo por defecto"""
+    tabla = np.full(91, np.nan)
+    for angulo, factor in parametros.factores_inclinacion.items():
+        if 0 <= angulo <= 90:
+            tabla[angulo] = factor
+
+    factores = tabla[inclinacion.astype(int)]
+    if parametros.transposicion is not None:
+        por_defecto = parametros.transposicion.factor_inclinacion_lote(latitud, inclinacion)
+    else:
+        por_defecto = np.clip(1.0 - np.abs(inclinacion - 32) * 0.01, 0.7, 1.0)
+    return np.where(np.isnan(factores), por_defecto, factores)
+
+
+def _factores_orientacion(parametros, orientacion, inclinacion, latitud):
+    """Factor de orientación: tabla FactorOrientacion o transposición para códigos sin fila"""
+    factores = _factores_por_codigo(orientacion, parametros.factores_orientacion, np.nan)
+    faltantes = np.isnan(factores)
+    if not faltantes.any():
+        return factores
+
+    azimut = _factores_por_codigo(orientacion, AZIMUT_ORIENTACIONES, np.nan)
+    calculables = faltantes & ~np.isnan(azimut)
+    if parametros.transposicion is not None and calculables.any():
+        factores[calculables] = parametros.transposicion.factor_orientacion_lote(
+            latitud[calculables], inclinacion[calculables], azimut[calculables]
+        )
+    factores[np.isnan(factores)] = FACTOR_ORIENTACION_DEFECTO
+    return factores
+
+
+def costo_por_kw_lote(parametros, potencia):
+    """Costo por kW según bandas de CostoInstalacion (`searchsorted` sobre el índice de bandas)"""
+    indice = parametros.indice_bandas
+    if not len(indice):
+        return np.full(potencia.shape, float(COSTO_POR_KW_DEFECTO))
+    return indice.costos[indice.buscar_lote(potencia)]
+
+
+def simular_lote(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+                 categoria=None, repartos=None, incluir_datos_anuales=False):
+    """
+    Simula N escenarios a la vez y devuelve los resultados en columnas.
+
+    Todas las entradas son arrays de longitud N; los valores se redondean
+    igual que en ResultadoSimulacion.to_dict(). Con `categoria`, los
+    escenarios cuya (provincia, categoría) tiene tarifa calculan el ahorro con
+    las facturas mensuales, como `simular`; `repartos` da el reparto mensual
+    (consumo, producción) de cada par (por defecto, proporcional a los días).
+    """
+    horas_sol_promedio = parametros.horas_sol_promedio
+    potencia_panel = parametros.potencia_panel
+    precio_kwh = parametros.precio_kwh
+
+    factor_ubicacion = _factores_por_codigo(
+        ubicacion, parametros.factores_ubicacion, FACTOR_UBICACION_DEFECTO
+    )
+    latitud = _factores_por_codigo(ubicacion, parametros.latitudes, LATITUD_DEFECTO)
+    factor_orientacion = _factores_orientacion(parametros, orientacion, inclinacion, latitud)
+    factor_inclinacion = _factores_inclinacion(parametros, inclinacion, latitud)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Potencia necesaria, limitada por la superficie disponible
+        potencia_necesaria = (consumo_anual / 365) / (
+            horas_sol_promedio * factor_ubicacion * factor_orientacion * factor_inclinacion
+        )
+        paneles_maximos = np.floor(superficie / SUPERFICIE_POR_PANEL)
+        potencia_maxima_superficie = paneles_maximos * (potencia_panel / 1000)
+        potencia_instalada = np.fmin(potencia_necesaria, potencia_maxima_superficie)
+
+        num_paneles = np.floor(potencia_instalada * 1000 / potencia_panel).astype(int)
+        produccion_anual = (
+            potencia_instalada * horas_sol_promedio * 365
+            * factor_ubicacion * factor_orientacion * factor_inclinacion
+        )
+
+        # Autoconsumo sin baterías y compensación de excedentes
+        autoconsumo_porcentaje = parametros.autoconsumo_sin_bateria
+        energia_autoconsumida = produccion_anual * autoconsumo_porcentaje
+        energia_excedente = produccion_anual - energia_autoconsumida
+        ahorro_total_anual = (
+            np.minimum(energia_autoconsumida, consumo_anual) * precio_kwh
+            + energia_excedente * precio_kwh * parametros.compensacion_excedentes
+        )
+        if categoria is not None:
+            _ahorro_tarifas_lote(
+                parametros, ahorro_total_anual, consumo_anual, produccion_anual,
+                ubicacion, categoria, repartos or {}
+            )
+
+        costo_instalacion = potencia_instalada * costo_por_kw_lote(parametros, potencia_instalada)
+        periodo_retorno = np.where(
+            ahorro_total_anual > 0, costo_instalacion / ahorro_total_anual, 0.0
+        )
+    ahorro_25_anos = ahorro_total_anual * ANOS_PROYECCION - costo_instalacion
+
+    resultados = {
+        'potencia_instalada': np.round(potencia_instalada, 2),
+        'num_paneles': num_paneles,
+        'superficie_necesaria': num_paneles * SUPERFICIE_POR_PANEL,
+        'produccion_anual': np.round(produccion_anual, 2),
+        'autoconsumo_porcentaje': np.full(
+            consumo_anual.shape, round(autoconsumo_porcentaje * 100, 1)
+        ),
+        'energia_autoconsumida': np.round(energia_autoconsumida, 2),
+        'ahorro_total_anual': np.round(ahorro_total_anual, 2),
+        'costo_instalacion': np.round(costo_instalacion, 2),
+        'periodo_retorno': np.round(periodo_retorno, 1),
+        'ahorro_25_anos': np.round(ahorro_25_anos, 2),
+        'factor_ubicacion': factor_ubicacion,
+        'factor_orientacion': np.round(factor_orientacion, 3),
+        'factor_inclinacion': np.round(factor_inclinacion, 3),
+    }
+
+    if incluir_datos_anuales:
+        # Degradación como potencia con broadcasting: (N, 1) x (1, 25)
+        anos = np.arange(1, ANOS_PROYECCION + 1)
+        factor_degradacion = (1 - parametros.degradacion_anual) ** (anos - 1)
+        flujos = np.empty((consumo_anual.shape[0], ANOS_PROYECCION + 1))
+        flujos[:, 0] = -costo_instalacion
+        flujos[:, 1:] = ahorro_total_anual[:, None] * factor_degradacion[None, :]
+        resultados['ahorro_acumulado'] = np.round(np.cumsum(flujos, axis=1), 2)
+
+    return {columna: valores.tolist() for columna, valores in resultados.items()}
+
+
+def _ahorro_tarifas_lote(parametros, ahorro_total_anual, consumo_anual, produccion_anual,
+                         ubicacion, categoria, repartos):
+    """Reemplaza en `ahorro_total_anual` el ahorro de los escenarios con tarifa (un grupo por provincia y categoría)"""
+    autoconsumo_porcentaje = parametros.autoconsumo_sin_bateria
+    for provincia, tipo in set(zip(ubicacion.tolist(), categoria.tolist())):
+        tarifa = parametros.tarifa(provincia, tipo)
+        if tarifa is None:
+            continue
+        filas = (ubicacion == provincia) & (categoria == tipo)
+        reparto_consumo, reparto_produccion = repartos.get((provincia, tipo), (REPARTO_DIAS, REPARTO_DIAS))
+        consumo_mensual = consumo_anual[filas, None] * np.asarray(reparto_consumo)
+        produccion_mensual = produccion_anual[filas, None] * np.asarray(reparto_produccion)
+        autoconsumo_mensual = np.minimum(produccion_mensual * autoconsumo_porcentaje, consumo_mensual)
+        ahorro_total_anual[filas] = ahorro_anual_lote(
+            tarifa, consumo_mensual, autoconsumo_mensual, produccion_mensual - autoconsumo_mensual
+        )
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Bandas de incertidumbre (P10/P50/P90) por Monte Carlo.
+
+Alrededor del resultado de una simulación se muestrean la irradiación (sesgo
+a largo plazo y variación interanual), la evolución de la tarifa, la
+degradación de los paneles y el costo de instalación. Cada bloque de
+muestras se evalúa como una matriz (muestras x 26 años) y el generador es
+sembrado, así que la misma semilla y el mismo número de muestras dan siempre
+las mismas bandas (los resultados se guardan en caché y en enlaces
+permanentes con esas entradas como clave).
+
+El tiempo de cálculo se acota con el número de muestras, no con el reloj:
+el límite por petición se fija en settings (SIMULADOR_MONTECARLO_MAX_MUESTRAS)
+y se valida con las entradas.
+
+Módulo puro, como `engine`: no importa Django.
+"""
+import numpy as np
+
+from .engine import ANOS_PROYECCION
+
+
+MUESTRAS_DEFECTO = 2000
+MUESTRAS_MAXIMAS = 20000
+TAMANO_BLOQUE = 500
+
+# Incertidumbres (desvío estándar) alrededor de la configuración activa
+DESVIO_IRRADIACION = 0.05           # sesgo del recurso solar a largo plazo
+DESVIO_IRRADIACION_ANUAL = 0.04     # variación de un año a otro
+ESCALADA_TARIFA_MEDIA = 0.0         # la configuración asume tarifa constante
+DESVIO_ESCALADA_TARIFA = 0.02
+DESVIO_DEGRADACION = 0.002
+DESVIO_COSTO_INSTALACION = 0.10
+
+PERCENTILES = (10, 50, 90)
+
+
+def _evaluar_bloque(generador, muestras, parametros, consumo_anual, energia_autoconsumida,
+                    ahorro_total_anual, costo_instalacion):
+    """Ahorro del año 1, período de retorno y ahorro acumulado a 25 años de un bloque"""
+    precio_kwh = parametros.precio_kwh
+
+    # Ahorro por autoconsumo (limitado por el consumo) y por compensación de excedentes
+    ahorro_autoconsumo = min(energia_autoconsumida, consumo_anual) * precio_kwh
+    ahorro_compensacion = ahorro_total_anual - ahorro_autoconsumo
+
+    sesgo = np.clip(generador.normal(1.0, DESVIO_IRRADIACION, (muestras, 1)), 0.5, 1.5)
+    interanual = np.clip(
+        generador.normal(1.0, DESVIO_IRRADIACION_ANUAL, (muestras, ANOS_PROYECCION)), 0.5, 1.5
+    )
+    escalada = generador.normal(ESCALADA_TARIFA_MEDIA, DESVIO_ESCALADA_TARIFA, (muestras, 1))
+    degradacion = np.clip(
+        generador.normal(parametros.degradacion_anual, DESVIO_DEGRADACION, (muestras, 1)), 0.0, None
+    )
+    costo = costo_instalacion * np.clip(
+        generador.normal(1.0, DESVIO_COSTO_INSTALACION, muestras), 0.5, 1.5
+    )
+
+    # Producción relativa de cada año: (muestras, 25)
+    anos = np.arange(ANOS_PROYECCION)[None, :]
+    produccion = sesgo * interanual * (1 - degradacion) ** anos
+    ahorro = (
+        np.minimum(energia_autoconsumida * produccion, consumo_anual) * precio_kwh
+        + ahorro_compensacion * produccion
+    ) * (1 + escalada) ** anos
+
+    flujos = np.empty((muestras, ANOS_PROYECCION + 1))
+    flujos[:, 0] = -costo
+    flujos[:, 1:] = ahorro
+    acumulado = np.cumsum(flujos, axis=1)
+
+    # Retorno: año en que el acumulado cruza cero (interpolado); inf si no se recupera
+    recuperado = acumulado >= 0
+    ano_cruce = np.argmax(recuperado, axis=1)
+    filas = np.arange(muestras)
+    anterior = acumulado[filas, np.maximum(ano_cruce - 1, 0)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraccion = np.where(ano_cruce > 0, -anterior / ahorro[filas, np.maximum(ano_cruce - 1, 0)], 0.0)
+    retorno = np.where(recuperado.any(axis=1), np.maximum(ano_cruce - 1, 0) + fraccion, np.inf)
+
+    return ahorro[:, 0], retorno, acumulado[:, ANOS_PROYECCION]
+
+
+def _percentiles(valores):
+    """P10/P50/P90 tomando muestras reales (None si el percentil no es finito)"""
+    cuantiles = np.percentile(valores, PERCENTILES, method='inverted_cdf')
+    return {
+        f'p{percentil}': round(float(valor), 2) if np.isfinite(valor) else None
+        for percentil, valor in zip(PERCENTILES, cuantiles)
+    }
+
+
+def bandas_incertidumbre(parametros, consumo_anual, energia_autoconsumida, ahorro_total_anual,
+                         costo_instalacion, muestras=MUESTRAS_DEFECTO, semilla=0):
+    """
+    P10/P50/P90 del ahorro anual, el período de retorno y el ahorro acumulado a 25 años.
+
+    Siempre se evalúan todas las `muestras` (acotadas a MUESTRAS_MAXIMAS): el
+    resultado depende solo de las entradas, la semilla y el número de muestras.
+    """
+    muestras = max(1, min(int(muestras), MUESTRAS_MAXIMAS))
+    generador = np.random.default_rng(semilla)
+
+    bloques = []
+    evaluadas = 0
+    while evaluadas < muestras:
+        tamano = min(TAMANO_BLOQUE, muestras - evaluadas)
+        bloques.append(_evaluar_bloque(
+            generador, tamano, parametros, consumo_anual, energia_autoconsumida,
+            ahorro_total_anual, costo_instalacion
+        ))
+        evaluadas += tamano
+
+    ahorro_anual, retorno, ahorro_25 = (np.concatenate(columna) for columna in zip(*bloques))
+    return {
+        'muestras': evaluadas,
+        'semilla': semilla,
+        'ahorro_total_anual': _percentiles(ahorro_anual),
+        'periodo_retorno': _percentiles(retorno),
+        'ahorro_acumulado_25': _percentiles(ahorro_25),
+    }
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Informes descargables (PDF y CSV) de una simulación.
+
+Cada informe se guarda en el storage de Django bajo un hash SHA-256 de las
+entradas normalizadas, la versión del snapshot de parámetros y el formato.
+Las descargas repetidas y los enlaces compartidos se sirven directamente
+desde el storage; el renderizador solo se ejecuta cuando el archivo no existe.
+Cambiar cualquier parámetro del simulador cambia la versión y, con ella, la
+ruta: nunca se sirve un informe calculado con parámetros viejos.
+
+El PDF se escribe con un generador mínimo propio (texto, líneas y
+rectángulos con las fuentes estándar Helvetica), sin dependencias externas.
+"""
+import csv
+import hashlib
+import io
+import json
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+# Subir al cambiar el contenido o el diseño de los informes (invalida los guardados)
+VERSION_INFORME = 1
+
+FORMATO_PDF = 'pdf'
+FORMATO_CSV = 'csv'
+TIPOS_CONTENIDO = {
+    FORMATO_PDF: 'application/pdf',
+    FORMATO_CSV: 'text/csv; charset=utf-8',
+}
+FORMATOS_INFORME = tuple(TIPOS_CONTENIDO)
+
+ESTADO_HIT = 'HIT'
+ESTADO_MISS = 'MISS'
+
+
+# ----------------------------------------------------------------------
+# Generador PDF mínimo
+# ----------------------------------------------------------------------
+
+ANCHO_A4, ALTO_A4 = 595, 842
+
+
+def _escapar_pdf(texto):
+    """Cadena literal PDF en WinAnsi (las tildes y la ñ del español entran en cp1252)"""
+    datos = str(texto).encode('cp1252', errors='replace')
+    return datos.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class DocumentoPDF:
+    """Documento PDF de páginas A4 con texto, líneas y rectángulos"""
+
+    def __init__(self):
+        self.paginas = []
+        self.nueva_pagina()
+
+    def nueva_pagina(self):
+        self.paginas.append([])
+
+    def _agregar(self, comando):
+        self.paginas[-1].append(comando if isinstance(comando, bytes) else comando.encode('ascii'))
+
+    def texto(self, x, y, texto, tamano=10, negrita=False, color=(0, 0, 0)):
+        fuente = 'F2' if negrita else 'F1'
+        self._agregar(f'{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg BT /{fuente} {tamano} Tf {x:.2f} {y:.2f} Td ')
+        self._agregar(b'(' + _escapar_pdf(texto) + b') Tj ET')
+
+    def texto_derecha(self, x, y, texto, tamano=10, negrita=False):
+        """Texto alineado a la derecha en x (ancho aproximado de Helvetica)"""
+        self.texto(x - len(str(texto)) * tamano * 0.5, y, texto, tamano, negrita)
+
+    def linea(self, x1, y1, x2, y2, grosor=0.5, color=(0.6, 0.6, 0.6)):
+        self._agregar(
+            f'{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} RG {grosor} w '
+            f'{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S'
+        )
+
+    def rectangulo(self, x, y, ancho, alto, color):
+        self._agregar(
+            f'{color[0]:.3f} {color[1]:.3f} {color[2]:.3f} rg {x:.2f} {y:.2f} {ancho:.2f} {alto:.2f} re f'
+        )
+
+    def to_bytes(self):
+        """Serializa el documento (objetos, tabla xref y trailer)"""
+        objetos = [
+            b'<< /Type /Catalog /Pages 2 0 R >>',
+            None,  # Pages: se completa cuando se conocen los números de página
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+            b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        ]
+        kids = []
+        for comandos in self.paginas:
+            contenido = b'\n'.join(comandos)
+            objetos.append(
+                b'<< /Length %d >>\nstream\n' % len(contenido) + contenido + b'\nendstream'
+            )
+            objetos.append(
+                b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>'
+                % (ANCHO_A4, ALTO_A4, len(objetos))
+            )
+            kids.append(b'%d 0 R' % len(objetos))
+        objetos[1] = b'<< /Type /Pages /Kids [' + b' '.join(kids) + b'] /Count %d >>' % len(kids)
+
+        salida = io.BytesIO()
+        salida.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        posiciones = []
+        for numero, objeto in enumerate(objetos, start=1):
+            posiciones.append(salida.tell())
+            salida.write(b'%d 0 obj\n' % numero + objeto + b'\nendobj\n')
+
+        inicio_xref = salida.tell()
+        salida.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objetos) + 1))
+        for posicion in posiciones:
+            salida.write(b'%010d 00000 n \n' % posicion)
+        salida.write(
+            b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+            % (len(objetos) + 1, inicio_xref)
+        )
+        return salida.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Contenido de los informes
+# ----------------------------------------------------------------------
+
+def _nombre_provincia(codigo):
+    from apps.core.models import FactorUbicacion
+    return dict(FactorUbicacion.PROVINCIAS_ARGENTINA).get(codigo, codigo)
+
+
+def _orientacion(entradas):
+    orientacion = entradas['orientacion']
+    return orientacion if isinstance(orientacion, str) else f"{orientacion:g}° (azimut)"
+
+
+def filas_resumen(entradas, resultados):
+    """Pares (etiqueta, valor) con los datos de la instalación y los resultados principales"""
+    filas = [
+        ('Ubicación', _nombre_provincia(entradas['ubicacion'])),
+        ('Consumo anual', f"{entradas['consumo_anual']:,.0f} kWh"),
+        ('Superficie disponible', f"{entradas['superficie']:,.1f} m²"),
+        ('Orientación', _orientacion(entradas)),
+        ('Inclinación', f"{entradas['inclinacion']:g}°"),
+        ('Modelo', resultados['modelo']),
+        ('Perfil de consumo', entradas['perfil_consumo']),
+    ]
+    latitud, longitud = entradas['coordenadas']
+    if latitud is not None:
+        filas.append(('Coordenadas', f"{latitud:.3f}, {longitud:.3f}"))
+    filas += [
+        ('Potencia instalada', f"{resultados['potencia_instalada']:,.2f} kW"),
+        ('Paneles', f"{resultados['num_paneles']}"),
+        ('Producción anual', f"{resultados['produccion_anual']:,.0f} kWh"),
+        ('Autoconsumo', f"{resultados['autoconsumo_porcentaje']:.1f} %"),
+        ('Ahorro anual', f"${resultados['ahorro_total_anual']:,.2f} USD"),
+        ('Costo de instalación', f"${resultados['costo_instalacion']:,.2f} USD"),
+        ('Período de retorno', f"{resultados['periodo_retorno']:.1f} años"),
+        ('Ahorro neto a 25 años', f"${resultados['ahorro_25_anos']:,.2f} USD"),
+    ]
+    return filas
+
+
+def generar_csv(entradas, resultados, version):
+    """Informe CSV: resumen, serie de ahorro acumulado y facturas mensuales si hay tarifa"""
+    salida = io.StringIO()
+    escritor = csv.writer(salida)
+    escritor.writerow(['Parámetro', 'Valor'])
+    escritor.writerows(filas_resumen(entradas, resultados))
+    escritor.writerow(['Versión de parámetros', version])
+
+    escritor.writerow([])
+    escritor.writerow(['Año', 'Ahorro acumulado (USD)'])
+    for dato in resultados['datos_anuales']:
+        escritor.writerow([dato['ano'], f"{dato['ahorro_acumulado']:.2f}"])
+
+    facturas = resultados.get('facturas')
+    if facturas:
+        escritor.writerow([])
+        escritor.writerow([
+            'Mes', 'Consumo (kWh)', 'Importado (kWh)', 'Excedente (kWh)',
+            'Factura sin solar (USD)', 'Factura con solar (USD)',
+        ])
+        for mes in facturas['meses']:
+            escritor.writerow([
+                mes['mes'], mes['consumo_kwh'], mes['importado_kwh'], mes['excedente_kwh'],
+                f"{mes['factura_sin_solar']:.2f}", f"{mes['factura_con_solar']:.2f}",
+            ])
+
+    # BOM para que las planillas reconozcan UTF-8 (tildes)
+    return salida.getvalue().encode('utf-8-sig')
+
+
+def _grafico_ahorro(documento, datos_anuales, x, y, ancho, alto):
+    """Barras del ahorro acumulado por año (verde positivo, rojo negativo)"""
+    valores = [dato['ahorro_acumulado'] for dato in datos_anuales]
+    maximo = max(max(valores), 0)
+    minimo = min(min(valores), 0)
+    rango = (maximo - minimo) or 1
+    cero = y + alto * (-minimo / rango)
+    paso = ancho / len(valores)
+
+    for indice, valor in enumerate(valores):
+        altura = alto * abs(valor) / rango
+        color = (0.18, 0.62, 0.33) if valor >= 0 else (0.80, 0.25, 0.22)
+        base = cero if valor >= 0 else cero - altura
+        documento.rectangulo(x + indice * paso + paso * 0.15, base, paso * 0.7, altura, color)
+        if indice % 5 == 0:
+            documento.texto(x + indice * paso + paso * 0.2, y - 12, str(indice), tamano=7)
+    documento.linea(x, cero, x + ancho, cero, grosor=0.8, color=(0.2, 0.2, 0.2))
+
+
+def generar_pdf(entradas, resultados, version):
+    """Informe PDF: resumen, gráfico y tabla de ahorro acumulado y facturas mensuales si hay tarifa"""
+    documento = DocumentoPDF()
+    margen = 50
+    y = ALTO_A4 - 60
+
+    documento.texto(margen, y, 'INGLAT - Simulación de instalación solar', tamano=16, negrita=True)
+    y -= 16
+    documento.texto(margen, y, f'Versión de parámetros {version}', tamano=8, color=(0.4, 0.4, 0.4))
+    y -= 24
+
+    for etiqueta, valor in filas_resumen(entradas, resultados):
+        documento.texto(margen, y, etiqueta, tamano=10)
+        documento.texto(margen + 170, y, valor, tamano=10, negrita=True)
+        y -= 14
+
+    y -= 16
+    documento.texto(margen, y, 'Ahorro acumulado (USD)', tamano=12, negrita=True)
+    y -= 130
+    _grafico_ahorro(documento, resultados['datos_anuales'], margen, y, ANCHO_A4 - 2 * margen, 110)
+    y -= 30
+
+    # Tabla de 26 años en dos columnas
+    filas = resultados['datos_anuales']
+    mitad = (len(filas) + 1) // 2
+    for columna, bloque in enumerate((filas[:mitad], filas[mitad:])):
+        x = margen + columna * 250
+        documento.texto(x, y, 'Año', tamano=9, negrita=True)
+        documento.texto_derecha(x + 180, y, 'Acumulado', tamano=9, negrita=True)
+        for fila, dato in enumerate(bloque, start=1):
+            documento.texto(x, y - fila * 12, str(dato['ano']), tamano=9)
+            documento.texto_derecha(x + 180, y - fila * 12, f"{dato['ahorro_acumulado']:,.2f}", tamano=9)
+
+    facturas = resultados.get('facturas')
+    if facturas:
+        documento.nueva_pagina()
+        y = ALTO_A4 - 60
+        documento.texto(margen, y, f"Facturas mensuales - {facturas['tarifa']}", tamano=14, negrita=True)
+        y -= 28
+        columnas = [
+            ('Mes', 'mes', 0), ('Consumo kWh', 'consumo_kwh', 130), ('Red kWh', 'importado_kwh', 210),
+            ('Excedente kWh', 'excedente_kwh', 300), ('Sin solar', 'factura_sin_solar', 390),
+            ('Con solar', 'factura_con_solar', 480),
+        ]
+        for titulo, _, x in columnas:
+            documento.texto_derecha(margen + x + 15, y, titulo, tamano=9, negrita=True)
+        for mes in facturas['meses']:
+            y -= 14
+            for _, campo, x in columnas:
+                documento.texto_derecha(margen + x + 15, y, f"{mes[campo]:,}", tamano=9)
+        y -= 24
+        documento.texto(margen, y, f"Total sin solar: ${facturas['total_sin_solar']:,.2f} USD", tamano=10)
+        documento.texto(margen, y - 14, f"Total con solar: ${facturas['total_con_solar']:,.2f} USD", tamano=10)
+        documento.texto(margen, y - 28, f"Ahorro anual: ${facturas['ahorro_anual']:,.2f} USD", tamano=10, negrita=True)
+
+    return documento.to_bytes()
+
+
+GENERADORES = {
+    FORMATO_PDF: generar_pdf,
+    FORMATO_CSV: generar_csv,
+}
+
+
+# ----------------------------------------------------------------------
+# Almacenamiento por hash de contenido
+# ----------------------------------------------------------------------
+
+def clave_informe(version, entradas, formato):
+    """Hash estable de las entradas normalizadas + versión de parámetros + formato"""
+    contenido = {
+        'informe': VERSION_INFORME,
+        'parametros': version,
+        'formato': formato,
+        'entradas': entradas,
+    }
+    serializado = json.dumps(contenido, sort_keys=True, default=list)
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+def ruta_informe(clave, formato):
+    """Ruta en el storage (dos niveles para no acumular miles de archivos en un directorio)"""
+    directorio = getattr(settings, 'SIMULADOR_INFORMES_DIR', 'simulador/informes')
+    return f"{directorio}/{clave[:2]}/{clave}.{formato}"
+
+
+def obtener_informe(clave, formato, renderizar, storage=None):
+    """
+    Ruta del informe en el storage y si ya existía (HIT) o se renderizó (MISS).
+
+    `renderizar` devuelve los bytes del informe o None si no hay resultado;
+    en ese caso se devuelve (None, MISS) y no se guarda nada.
+    """
+    storage = storage or default_storage
+    ruta = ruta_informe(clave, formato)
+    if storage.exists(ruta):
+        return ruta, ESTADO_HIT
+
+    contenido = renderizar()
+    if contenido is None:
+        return None, ESTADO_MISS
+
+    guardada = storage.save(ruta, ContentFile(contenido))
+    if guardada != ruta:
+        # Otro proceso lo guardó primero: el contenido es idéntico, se descarta la copia
+        storage.delete(guardada)
+    return ruta, ESTADO_MISS
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from apps.core.models import EventoSimulacion, ResumenDiarioSimulaciones
+from apps.simulador.analitica import DIRECTORIO_CUARENTENA, get_cola_eventos
+
+
+class Command(BaseCommand):
+    help = 'Simulador Solar - Generar los resúmenes diarios de simulaciones y reingresar el spool de eventos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=2,
+            help='Días hacia atrás a resumir, incluido hoy (por defecto 2)'
+        )
+        parser.add_argument(
+            '--desde',
+            help='Resumir desde esta fecha (AAAA-MM-DD) hasta hoy; reemplaza a --dias'
+        )
+        parser.add_argument(
+            '--recuperar-spool',
+            action='store_true',
+            help='Reingresar antes los eventos que quedaron en el spool por caídas de la base de datos'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Simulador Solar - Analítica')
+        self.stdout.write('=' * 50)
+
+        if options['recuperar_spool']:
+            cola = get_cola_eventos()
+            insertados = cola.recuperar_spool()
+            self.stdout.write(self.style.SUCCESS(f'✅ Spool: {insertados} eventos reingresados'))
+            restantes = list(cola.directorio_spool.glob('*.jsonl')) if cola.directorio_spool.is_dir() else []
+            if restantes:
+                self.stdout.write(self.style.WARNING(f'Quedan {len(restantes)} archivos en {cola.directorio_spool}'))
+            if cola.en_cuarentena:
+                self.stdout.write(self.style.WARNING(
+                    f'{cola.en_cuarentena} archivos con errores movidos a {cola.directorio_spool / DIRECTORIO_CUARENTENA}'
+                ))
+
+        hoy = timezone.localdate()
+        if options['desde']:
+            try:
+                desde = date.fromisoformat(options['desde'])
+            except ValueError:
+                raise CommandError(f'Fecha inválida: {options["desde"]}')
+        else:
+            if options['dias'] < 1:
+                raise CommandError('--dias debe ser al menos 1')
+            desde = hoy - timedelta(days=options['dias'] - 1)
+
+        resumenes = self.resumir(desde)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(resumenes)} resúmenes del {desde} al {hoy}'
+        ))
+        for resumen in resumenes:
+            self.stdout.write(
+                f'  {resumen.fecha} {resumen.ubicacion:<20} {resumen.rango_potencia:>5}: '
+                f'{resumen.simulaciones} simulaciones, retorno medio {resumen.retorno_medio:.1f} años'
+            )
+
+    def resumir(self, desde):
+        """Recalcula los resúmenes desde una fecha (idempotente: reemplaza los días del rango)"""
+        filas = (
+            EventoSimulacion.objects
+            .annotate(dia=TruncDate('fecha'))
+            .filter(dia__gte=desde)
+            .values('dia', 'ubicacion', 'rango_potencia')
+            .annotate(
+                simulaciones=Count('id'),
+                con_bateria=Count('id', filter=Q(incluye_bateria=True)),
+                potencia_media=Avg('potencia_instalada'),
+                consumo_medio=Avg('consumo_anual'),
+                ahorro_medio=Avg('ahorro_total_anual'),
+                retorno_medio=Avg('periodo_retorno'),
+                retorno_minimo=Min('periodo_retorno'),
+                retorno_maximo=Max('periodo_retorno'),
+            )
+            .order_by('dia', 'ubicacion', 'rango_potencia')
+        )
+        resumenes = [
+            ResumenDiarioSimulaciones(fecha=fila.pop('dia'), **fila)
+            for fila in filas
+        ]
+
+        with transaction.atomic():
+            ResumenDiarioSimulaciones.objects.filter(fecha__gte=desde).delete()
+            ResumenDiarioSimulaciones.objects.bulk_create(resumenes)
+        return resumenes
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulador.engine import simular, simular_lote
+from apps.simulador.snapshot import get_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Simulador Solar - Calcular una simulación o medir el rendimiento del núcleo de cálculo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--consumo',
+            type=float,
+            default=3600,
+            help='Consumo anual en kWh (default: 3600)'
+        )
+        parser.add_argument(
+            '--ubicacion',
+            type=str,
+            default='buenos_aires',
+            help='Código de provincia (default: buenos_aires)'
+        )
+        parser.add_argument(
+            '--orientacion',
+            type=str,
+            default='N',
+            help='Orientación del tejado (default: N)'
+        )
+        parser.add_argument(
+            '--inclinacion',
+            type=float,
+            default=30,
+            help='Inclinación del tejado en grados (default: 30)'
+        )
+        parser.add_argument(
+            '--superficie',
+            type=float,
+            default=40,
+            help='Superficie disponible en m² (default: 40)'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Imprimir el resultado completo en JSON'
+        )
+        parser.add_argument(
+            '--benchmark',
+            type=int,
+            default=0,
+            help='Repetir N simulaciones individuales y un lote de N escenarios midiendo tiempos'
+        )
+
+    def handle(self, *args, **options):
+        if options['consumo'] < 0 or options['superficie'] < 0:
+            raise CommandError('Consumo y superficie deben ser positivos')
+        if not 0 <= options['inclinacion'] <= 90:
+            raise CommandError('Inclinación debe estar entre 0 y 90 grados')
+
+        snapshot = get_snapshot()
+        parametros = snapshot.parametros
+        entrada = (
+            options['consumo'],
+            options['ubicacion'],
+            options['orientacion'],
+            options['inclinacion'],
+            options['superficie'],
+        )
+
+        if options['benchmark']:
+            self.ejecutar_benchmark(parametros, entrada, options['benchmark'])
+            return
+
+        resultado = simular(parametros, *entrada).to_dict()
+
+        if options['json']:
+            self.stdout.write(json.dumps(resultado, indent=2, ensure_ascii=False))
+            return
+
+        self.stdout.write('Simulador Solar - Resultado')
+        self.stdout.write('=' * 50)
+        self.stdout.write(f'Parámetros: versión {snapshot.version} (configuración v{snapshot.config.version})')
+        self.stdout.write(f'Potencia instalada: {resultado["potencia_instalada"]} kW ({resultado["num_paneles"]} paneles)')
+        self.stdout.write(f'Producción anual: {resultado["produccion_anual"]:,} kWh')
+        self.stdout.write(f'Ahorro anual: USD {resultado["ahorro_total_anual"]:,}')
+        self.stdout.write(f'Costo instalación: USD {resultado["costo_instalacion"]:,}')
+        self.stdout.write(f'Período de retorno: {resultado["periodo_retorno"]} años')
+        self.stdout.write(f'Ahorro a 25 años: USD {resultado["ahorro_25_anos"]:,}')
+
+    def ejecutar_benchmark(self, parametros, entrada, repeticiones):
+        """Mide el camino caliente del núcleo: individual y por lotes"""
+        self.stdout.write(f'Benchmark del núcleo de cálculo ({repeticiones} repeticiones)')
+        self.stdout.write('=' * 50)
+
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            simular(parametros, *entrada)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f'simular(): {duracion * 1000:.1f} ms total, '
+            f'{duracion / repeticiones * 1e6:.1f} µs por simulación'
+        )
+
+        consumo, ubicacion, orientacion, inclinacion, superficie = entrada
+        columnas = {
+            'consumo_anual': np.full(repeticiones, consumo),
+            'ubicacion': np.full(repeticiones, ubicacion),
+            'orientacion': np.full(repeticiones, orientacion),
+            'inclinacion': np.full(repeticiones, inclinacion),
+            'superficie': np.full(repeticiones, superficie),
+        }
+        inicio = time.perf_counter()
+        simular_lote(parametros, incluir_datos_anuales=True, **columnas)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f'simular_lote(): {duracion * 1000:.1f} ms para {repeticiones} escenarios, '
+            f'{duracion / repeticiones * 1e6:.2f} µs por escenario'
+        )
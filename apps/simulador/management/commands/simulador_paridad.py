@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import json
+import shutil
+import subprocess
+
+import numpy as np
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.views import EntradaInvalida, SimuladorSolarView
+from apps.simulador.parametros_cliente import paquete_parametros
+from apps.simulador.snapshot import get_snapshot
+
+
+# Ejecuta el núcleo del navegador con node: lee {paquete, casos, redondeos} por stdin y escribe los resultados
+SCRIPT_NODE = """
+const kernel = require(process.argv[1]);
+let entrada = '';
+process.stdin.on('data', parte => { entrada += parte; });
+process.stdin.on('end', () => {
+    const { paquete, casos, redondeos } = JSON.parse(entrada);
+    process.stdout.write(JSON.stringify({
+        resultados: casos.map(caso => kernel.simular(paquete, caso)),
+        redondeos: redondeos.map(([valor, decimales]) => kernel.redondear(valor, decimales)),
+    }));
+});
+"""
+
+
+class Command(BaseCommand):
+    help = 'Simulador Solar - Verificar que el núcleo del navegador (simulador-kernel.js) coincide con el servidor'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--casos',
+            type=int,
+            default=20000,
+            help='Número de entradas aleatorias (default: 20000)'
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=0,
+            help='Semilla del generador de entradas (default: 0)'
+        )
+        parser.add_argument(
+            '--mostrar',
+            type=int,
+            default=5,
+            help='Discrepancias a mostrar en detalle (default: 5)'
+        )
+
+    def handle(self, *args, **options):
+        node = shutil.which('node')
+        if node is None:
+            raise CommandError('Se necesita node en el PATH para ejecutar simulador-kernel.js')
+        kernel = finders.find('js/simulador-kernel.js')
+        if kernel is None:
+            raise CommandError('No se encontró js/simulador-kernel.js en los archivos estáticos')
+
+        self.stdout.write('Simulador Solar - Paridad navegador / servidor')
+        self.stdout.write('=' * 50)
+
+        snapshot = get_snapshot()
+        # Ida y vuelta por JSON, como lo recibe el navegador
+        paquete = json.loads(json.dumps(paquete_parametros(snapshot)))
+        casos = self.generar_casos(paquete, options['casos'], options['semilla'])
+        redondeos = self.generar_redondeos(options['casos'], options['semilla'])
+        self.stdout.write(f'Parámetros: versión {snapshot.version} (configuración v{snapshot.config.version})')
+        self.stdout.write(f'Casos: {len(casos):,} (semilla {options["semilla"]})')
+
+        proceso = subprocess.run(
+            [node, '-e', SCRIPT_NODE, kernel],
+            input=json.dumps({'paquete': paquete, 'casos': casos, 'redondeos': redondeos}),
+            capture_output=True, text=True,
+        )
+        if proceso.returncode != 0:
+            raise CommandError(f'Error al ejecutar el núcleo del navegador:\n{proceso.stderr}')
+        salida = json.loads(proceso.stdout)
+        resultados_cliente = salida['resultados']
+
+        # redondear() frente a round() de Python, incluidos falsos empates como 12.65 o 2.665
+        fallos_redondeo = [
+            (valor, decimales, cliente)
+            for (valor, decimales), cliente in zip(redondeos, salida['redondeos'])
+            if cliente != round(valor, decimales)
+        ]
+        self.stdout.write(f'Redondeos comprobados: {len(redondeos):,}')
+        for valor, decimales, cliente in fallos_redondeo[:options['mostrar']]:
+            self.stdout.write(self.style.WARNING(
+                f'  round({valor!r}, {decimales}): navegador {cliente!r} / servidor {round(valor, decimales)!r}'
+            ))
+
+        vista = SimuladorSolarView()
+        en_cliente = 0
+        discrepancias = []
+        for caso, cliente in zip(casos, resultados_cliente):
+            if cliente is None:
+                # El navegador delega en el servidor: nada que comparar
+                continue
+            en_cliente += 1
+            try:
+                servidor = vista.calcular_resultados(**vista.leer_entradas(caso)[0])
+            except EntradaInvalida as e:
+                servidor = {'error': str(e)}
+            diferencias = self.comparar(cliente, servidor)
+            if diferencias:
+                discrepancias.append((caso, diferencias))
+
+        self.stdout.write(f'Calculados en el navegador: {en_cliente:,}')
+        self.stdout.write(f'Delegados al servidor: {len(casos) - en_cliente:,}')
+
+        for caso, diferencias in discrepancias[:options['mostrar']]:
+            self.stdout.write(self.style.WARNING(f'  {json.dumps(caso)}'))
+            for campo, cliente, servidor in diferencias:
+                self.stdout.write(f'    {campo}: navegador {cliente!r} / servidor {servidor!r}')
+
+        if fallos_redondeo:
+            raise CommandError(f'❌ {len(fallos_redondeo):,} redondeos distintos de round() de Python')
+        if discrepancias:
+            raise CommandError(f'❌ {len(discrepancias):,} casos con resultados distintos')
+        self.stdout.write(self.style.SUCCESS('✅ Resultados idénticos en todos los casos calculados en el navegador'))
+
+    def generar_casos(self, paquete, total, semilla):
+        """Entradas del formulario al azar, incluidas algunas que el navegador debe delegar"""
+        rng = np.random.default_rng(semilla)
+        provincias = list(paquete['provincias']) + ['desconocida']
+        orientaciones = list(paquete['orientaciones']) + ['X']
+        inclinaciones = list(paquete['inclinaciones']) + [22.5, 90]
+
+        casos = []
+        for _ in range(total):
+            # Mezcla de valores típicos, extremos y con decimales (incluye empates de redondeo
+            # exactos y valores x.x5 / x.xx5 que solo lo parecen)
+            consumo = rng.choice([
+                rng.uniform(0, 100000), rng.integers(500, 20000), rng.integers(0, 400) + 0.5,
+                rng.integers(0, 40000) / 10 + 0.05, -10.0, 100001.0
+            ], p=[0.4, 0.4, 0.09, 0.09, 0.01, 0.01])
+            superficie = rng.choice([
+                rng.uniform(0, 200), rng.integers(0, 2000) / 4, rng.integers(0, 20000) / 100 + 0.005,
+                rng.uniform(0, 10000), 0.0
+            ], p=[0.4, 0.25, 0.15, 0.18, 0.02])
+            casos.append({
+                'consumo_anual': float(consumo),
+                'ubicacion': str(rng.choice(provincias, p=self._probabilidades(len(provincias)))),
+                'orientacion': str(rng.choice(orientaciones, p=self._probabilidades(len(orientaciones)))),
+                'inclinacion': float(rng.choice(inclinaciones, p=self._probabilidades(len(inclinaciones), 2))),
+                'superficie': float(superficie),
+                'perfil_consumo': str(rng.choice(paquete['perfiles_consumo'])),
+            })
+        return casos
+
+    @staticmethod
+    def generar_redondeos(total, semilla):
+        """[valor, decimales] para redondear(): empates exactos y valores x.x5 / x.xx5 que no lo son"""
+        rng = np.random.default_rng(semilla)
+        redondeos = []
+        for _ in range(total):
+            decimales = int(rng.integers(0, 4))
+            paso = 10.0 ** -decimales
+            base = int(rng.integers(-100000, 100000)) * paso
+            valor = rng.choice([
+                base + paso / 2,  # 12.65, 2.665...: empate solo en apariencia salvo si es exacto
+                int(rng.integers(-4000, 4000)) / 4,  # cuartos: empates exactos
+                rng.uniform(-1000, 1000),
+            ])
+            redondeos.append([float(valor), decimales])
+        return redondeos
+
+    @staticmethod
+    def _probabilidades(total, raros=1):
+        """Probabilidades uniformes salvo los últimos `raros` valores (2% cada uno)"""
+        comunes = total - raros
+        return [0.98 / comunes - 0.02 * (raros - 1) / comunes] * comunes + [0.02] * raros
+
+    @staticmethod
+    def comparar(cliente, servidor):
+        """Campos distintos entre ambos resultados: [(campo, navegador, servidor)]"""
+        campos = sorted(set(cliente) | set(servidor))
+        return [
+            (campo, cliente.get(campo), servidor.get(campo))
+            for campo in campos
+            if cliente.get(campo) != servidor.get(campo)
+        ]
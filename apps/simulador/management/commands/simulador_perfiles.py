@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.simulador.almacen_perfiles import (
+    AlmacenPerfiles, AlmacenPerfilesError, construir_almacen, series_desde_directorio,
+    RESOLUCION_CELDA
+)
+from apps.simulador.perfiles import (
+    series_sinteticas_provincias, ruta_perfiles, cargar_perfiles, PERFILES_CONSUMO
+)
+
+
+class Command(BaseCommand):
+    help = 'Simulador Solar - Construir, verificar o inspeccionar el almacén de perfiles horarios (8760 h)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generar',
+            action='store_true',
+            help='Construir el almacén con perfiles sintéticos de cielo claro por provincia'
+        )
+        parser.add_argument(
+            '--desde-csv',
+            type=str,
+            help='Construir el almacén desde un directorio de CSV (<provincia>.csv, celda_<lat>_<lon>.csv)'
+        )
+        parser.add_argument(
+            '--resolucion',
+            type=float,
+            default=RESOLUCION_CELDA,
+            help=f'Resolución en grados de la grilla lat/lon (default: {RESOLUCION_CELDA})'
+        )
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Verificar checksums del almacén (y de las fuentes si se indica --fuentes)'
+        )
+        parser.add_argument(
+            '--fuentes',
+            type=str,
+            help='Directorio de CSV fuente a comparar con los checksums del índice'
+        )
+        parser.add_argument(
+            '--salida',
+            type=str,
+            help='Ruta del archivo .npy (default: SIMULADOR_PERFILES_PATH)'
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['salida'] or ruta_perfiles()
+
+        self.stdout.write('Simulador Solar - Perfiles horarios')
+        self.stdout.write('=' * 50)
+
+        if options['generar'] or options['desde_csv']:
+            self.construir(ruta, options)
+            return
+
+        if options['verificar']:
+            self.verificar(ruta, options['fuentes'])
+            return
+
+        perfiles = cargar_perfiles()
+        self.stdout.write(f'Origen: {perfiles.origen}')
+        self.stdout.write(f'Provincias con perfil propio: {len(perfiles.provincias)}')
+        if perfiles.almacen is not None:
+            self.stdout.write(f'Celdas lat/lon: {len(perfiles.almacen.celdas)}')
+        for tipo in PERFILES_CONSUMO:
+            consumo = perfiles.perfil_consumo(tipo)
+            hora_pico = int(consumo[:24].argmax())
+            self.stdout.write(f'Perfil de consumo {tipo}: pico diario a las {hora_pico}:00')
+
+    def construir(self, ruta, options):
+        """Escribe el .npy y su índice desde CSV o desde el modelo sintético"""
+        if options['desde_csv']:
+            try:
+                series, fuentes = series_desde_directorio(options['desde_csv'])
+            except AlmacenPerfilesError as e:
+                raise CommandError(str(e))
+            if not series:
+                raise CommandError(f'No se encontraron CSV en {options["desde_csv"]}')
+        else:
+            series, fuentes = series_sinteticas_provincias(), {}
+
+        try:
+            indice = construir_almacen(ruta, series, resolucion=options['resolucion'], fuentes=fuentes)
+        except AlmacenPerfilesError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Almacén generado: {ruta} ({indice["filas"]} perfiles: '
+            f'{len(indice["provincias"])} provincias, {len(indice["celdas"])} celdas)'
+        ))
+        self.stdout.write(f'SHA-256: {indice["sha256"]}')
+        self.stdout.write('Reiniciar los workers para que abran el nuevo archivo.')
+
+    def verificar(self, ruta, fuentes):
+        """Comprueba la integridad del almacén"""
+        try:
+            almacen = AlmacenPerfiles(ruta)
+        except (AlmacenPerfilesError, OSError, ValueError) as e:
+            raise CommandError(f'No se pudo abrir el almacén: {e}')
+
+        errores = almacen.verificar(fuentes)
+        if errores:
+            for error in errores:
+                self.stdout.write(self.style.ERROR(f'❌ {error}'))
+            raise CommandError(f'{len(errores)} errores de integridad')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Almacén íntegro: {ruta}'))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from apps.core.models import FactorUbicacion
+from apps.simulador.ubicaciones import (
+    get_indice_provincias, resolver_ubicacion, ruta_provincias
+)
+
+
+class Command(BaseCommand):
+    help = 'Simulador Solar - Inspeccionar los límites provinciales y resolver coordenadas a provincia'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--punto',
+            nargs=2,
+            type=float,
+            metavar=('LATITUD', 'LONGITUD'),
+            help='Resolver la provincia de unas coordenadas'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Simulador Solar - Ubicaciones')
+        self.stdout.write('=' * 50)
+
+        indice = get_indice_provincias()
+        if indice is None:
+            self.stdout.write(
+                self.style.WARNING(f'Sin límites provinciales en {ruta_provincias()}: se usa la capital más cercana')
+            )
+        else:
+            self.stdout.write(f'Origen: {ruta_provincias()}')
+            self.stdout.write(f'Índice: {indice!r}')
+
+            # Códigos del GeoJSON que no tienen factor de irradiación
+            codigos = {codigo for codigo, _ in FactorUbicacion.PROVINCIAS_ARGENTINA}
+            desconocidos = sorted(set(indice.codigos) - codigos)
+            faltantes = sorted(codigos - set(indice.codigos))
+            if desconocidos:
+                self.stdout.write(self.style.WARNING(f'Provincias sin FactorUbicacion: {", ".join(desconocidos)}'))
+            if faltantes:
+                self.stdout.write(self.style.WARNING(f'Provincias sin polígono: {", ".join(faltantes)}'))
+
+        if options['punto']:
+            latitud, longitud = options['punto']
+            codigo, metodo = resolver_ubicacion(latitud, longitud)
+            self.stdout.write('-' * 50)
+            if codigo is None:
+                self.stdout.write(self.style.ERROR(f'❌ ({latitud}, {longitud}): fuera de Argentina'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ ({latitud}, {longitud}): {codigo} [{metodo}]'))
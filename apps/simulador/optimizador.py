@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Optimizador del tamaño de la instalación.
+
+En lugar de tomar min(potencia necesaria, potencia máxima del tejado), evalúa
+todos los tamaños posibles (de 1 panel al límite de la superficie) en una
+sola pasada vectorizada y elige el de mayor VAN o el de menor período de
+retorno. Las bandas de precio se resuelven con `searchsorted`
+(`engine.costo_por_kw_lote`) y, en el modelo horario, el autoconsumo de cada
+tamaño sale de una única ordenación de las 8760 horas, así que el costo es
+del orden de una simulación individual. Con tarifa escalonada, el ahorro de
+todos los tamaños sale de las facturas mensuales (`tarifas.ahorro_anual_lote`),
+igual que en la simulación individual.
+
+Módulo puro, como `engine`: no importa Django.
+"""
+import numpy as np
+
+from .engine import (
+    ANOS_PROYECCION, SUPERFICIE_POR_PANEL, MODELO_SIMPLIFICADO, MODELO_HORARIO,
+    Dimensionamiento, costo_por_kw_lote, _resultado
+)
+from .tarifas import (
+    DIAS_MES, INICIO_MES_HORAS, REPARTO_DIAS, ahorro_anual_lote, facturas_mensuales, sumar_por_mes
+)
+
+
+CRITERIO_VAN = 'van'
+CRITERIO_RETORNO = 'retorno'
+CRITERIOS = (CRITERIO_VAN, CRITERIO_RETORNO)
+
+# Tasa de descuento anual por defecto para el VAN
+TASA_DESCUENTO_DEFECTO = 0.05
+
+# Puntos de la curva VAN/tamaño incluidos en la respuesta (para graficar)
+PUNTOS_CURVA = 50
+
+
+def factor_valor_actual(degradacion_anual, tasa_descuento):
+    """Suma de los 25 flujos anuales descontados y degradados por unidad de ahorro del año 1"""
+    anos = np.arange(1, ANOS_PROYECCION + 1)
+    return float(np.sum((1 - degradacion_anual) ** (anos - 1) / (1 + tasa_descuento) ** anos))
+
+
+def autoconsumo_horario_lote(produccion_anual, perfil_irradiancia, consumo_horario):
+    """
+    Energía autoconsumida anual para K producciones con la misma forma horaria.
+
+    Para una escala s, sum_h min(s * p_h, c_h) vale s * sum(p_h con c_h/p_h >= s)
+    + sum(c_h con c_h/p_h < s): basta ordenar las horas por c_h/p_h una vez y
+    buscar cada escala con `searchsorted` sobre sumas acumuladas.
+    """
+    perfil = np.asarray(perfil_irradiancia, dtype=float)
+    consumo = np.asarray(consumo_horario, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cociente = np.where(perfil > 0, consumo / perfil, np.inf)
+
+    orden = np.argsort(cociente, kind='stable')
+    cociente = cociente[orden]
+    perfil_acumulado = np.concatenate([[0.0], np.cumsum(perfil[orden])])
+    consumo_acumulado = np.concatenate([[0.0], np.cumsum(consumo[orden])])
+
+    horas_cubiertas = np.searchsorted(cociente, produccion_anual, side='left')
+    return (
+        produccion_anual * (perfil_acumulado[-1] - perfil_acumulado[horas_cubiertas])
+        + consumo_acumulado[horas_cubiertas]
+    )
+
+
+def autoconsumo_mensual_lote(produccion_anual, perfil_irradiancia, consumo_horario):
+    """autoconsumo_horario_lote() mes a mes: (K, 12) con la energía autoconsumida de cada mes"""
+    perfil = np.asarray(perfil_irradiancia, dtype=float)
+    consumo = np.asarray(consumo_horario, dtype=float)
+    return np.stack([
+        autoconsumo_horario_lote(
+            produccion_anual, perfil[inicio:inicio + dias * 24], consumo[inicio:inicio + dias * 24]
+        )
+        for inicio, dias in zip(INICIO_MES_HORAS, DIAS_MES)
+    ], axis=-1)
+
+
+def optimizar(parametros, consumo_anual, ubicacion, orientacion, inclinacion, superficie,
+              criterio=CRITERIO_VAN, tasa_descuento=TASA_DESCUENTO_DEFECTO,
+              perfil_irradiancia=None, perfil_consumo=None, categoria=None, reparto_mensual=None):
+    """
+    Busca el número de paneles óptimo para la superficie disponible.
+
+    Con perfiles horarios el autoconsumo de cada tamaño se calcula hora a
+    hora; sin ellos se usa el porcentaje fijo del modelo simplificado.
+    Con tarifa para la provincia y la `categoria`, el ahorro de cada tamaño
+    sale de las facturas mensuales como en `engine.simular` (`reparto_mensual`
+    sólo se usa en el modelo simplificado).
+    Devuelve (ResultadoSimulacion del tamaño óptimo, resumen de la búsqueda)
+    o None si la superficie no admite ni un panel.
+    """
+    paneles_maximos = int(superficie / SUPERFICIE_POR_PANEL)
+    if paneles_maximos < 1:
+        return None
+
+    factor_ubicacion = parametros.factor_ubicacion(ubicacion)
+    factor_orientacion = parametros.factor_orientacion(orientacion, inclinacion, ubicacion)
+    factor_inclinacion = parametros.factor_inclinacion(inclinacion, ubicacion)
+    precio_kwh = parametros.precio_kwh
+    tarifa = parametros.tarifa(ubicacion, categoria)
+
+    # Candidatos: de 1 panel hasta el límite del tejado
+    num_paneles = np.arange(1, paneles_maximos + 1)
+    potencia = num_paneles * (parametros.potencia_panel / 1000)
+    produccion_anual = (
+        potencia * parametros.horas_sol_promedio * 365
+        * factor_ubicacion * factor_orientacion * factor_inclinacion
+    )
+
+    if perfil_irradiancia is not None and perfil_consumo is not None:
+        modelo = MODELO_HORARIO
+        consumo_horario = consumo_anual * np.asarray(perfil_consumo, dtype=float)
+        if tarifa is not None:
+            # Energía de cada mes (K, 12): las facturas se calculan mes a mes
+            autoconsumo_mensual = autoconsumo_mensual_lote(produccion_anual, perfil_irradiancia, consumo_horario)
+            energia_autoconsumida = autoconsumo_mensual.sum(axis=1)
+            consumo_mensual = sumar_por_mes(consumo_horario)
+            produccion_mensual = produccion_anual[:, None] * sumar_por_mes(perfil_irradiancia)
+        else:
+            energia_autoconsumida = autoconsumo_horario_lote(produccion_anual, perfil_irradiancia, consumo_horario)
+    else:
+        modelo = MODELO_SIMPLIFICADO
+        energia_autoconsumida = produccion_anual * parametros.autoconsumo_sin_bateria
+        if tarifa is not None:
+            reparto_consumo, reparto_produccion = reparto_mensual or (REPARTO_DIAS, REPARTO_DIAS)
+            consumo_mensual = consumo_anual * np.asarray(reparto_consumo)
+            produccion_mensual = produccion_anual[:, None] * np.asarray(reparto_produccion)
+            autoconsumo_mensual = np.minimum(
+                produccion_mensual * parametros.autoconsumo_sin_bateria, consumo_mensual
+            )
+
+    energia_excedente = produccion_anual - energia_autoconsumida
+    if tarifa is not None:
+        excedente_mensual = produccion_mensual - autoconsumo_mensual
+        ahorro_total_anual = ahorro_anual_lote(
+            tarifa, np.broadcast_to(consumo_mensual, autoconsumo_mensual.shape),
+            autoconsumo_mensual, excedente_mensual
+        )
+    else:
+        ahorro_total_anual = (
+            np.minimum(energia_autoconsumida, consumo_anual) * precio_kwh
+            + energia_excedente * precio_kwh * parametros.compensacion_excedentes
+        )
+    costo_instalacion = potencia * costo_por_kw_lote(parametros, potencia)
+
+    van = ahorro_total_anual * factor_valor_actual(parametros.degradacion_anual, tasa_descuento) - costo_instalacion
+    with np.errstate(divide='ignore', invalid='ignore'):
+        periodo_retorno = np.where(ahorro_total_anual > 0, costo_instalacion / ahorro_total_anual, np.inf)
+
+    if criterio == CRITERIO_RETORNO:
+        # Menor retorno; a igualdad, mayor VAN
+        optimo = int(np.lexsort((-van, periodo_retorno))[0])
+    else:
+        optimo = int(np.argmax(van))
+
+    dimension = Dimensionamiento(
+        factor_ubicacion=factor_ubicacion,
+        factor_orientacion=factor_orientacion,
+        factor_inclinacion=factor_inclinacion,
+        potencia_instalada=float(potencia[optimo]),
+        num_paneles=int(num_paneles[optimo]),
+        produccion_anual=float(produccion_anual[optimo]),
+    )
+    autoconsumida = float(energia_autoconsumida[optimo])
+    facturas = None
+    if tarifa is not None:
+        facturas = facturas_mensuales(
+            tarifa, consumo_mensual, autoconsumo_mensual[optimo], excedente_mensual[optimo]
+        )
+    resultado = _resultado(
+        parametros, dimension, consumo_anual, autoconsumida,
+        autoconsumida / dimension.produccion_anual if dimension.produccion_anual > 0 else 0.0,
+        modelo, facturas=facturas
+    )
+
+    puntos = np.unique(np.linspace(0, paneles_maximos - 1, min(PUNTOS_CURVA, paneles_maximos)).astype(int))
+    resumen = {
+        'criterio': criterio,
+        'tasa_descuento': tasa_descuento,
+        'candidatos': paneles_maximos,
+        'van': round(float(van[optimo]), 2),
+        'curva': [
+            {
+                'num_paneles': int(num_paneles[indice]),
+                'potencia': round(float(potencia[indice]), 2),
+                'van': round(float(van[indice]), 2),
+                'periodo_retorno': (
+                    round(float(periodo_retorno[indice]), 1)
+                    if np.isfinite(periodo_retorno[indice]) else None
+                ),
+            }
+            for indice in puntos
+        ],
+    }
+    return resultado, resumen
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Paquete de parámetros del simulador para el cálculo en el navegador.
+
+`static/js/simulador-kernel.js` reproduce el modelo simplificado con precio
+único (engine.dimensionar + engine._resultado) a partir de este paquete, así
+que la página muestra resultados al instante y solo hace el POST para guardar
+la simulación. Los factores de orientación e inclinación se resuelven aquí
+para las opciones del formulario (tabla, transposición o valor por defecto,
+igual que en el servidor): el navegador no necesita el modelo de transposición.
+
+El paquete se serializa una vez por versión del snapshot; la paridad entre
+ambos cálculos se verifica con `manage.py simulador_paridad`.
+"""
+import hashlib
+import json
+import threading
+
+from .engine import (
+    ANOS_PROYECCION, AZIMUT_ORIENTACIONES, COSTO_POR_KW_DEFECTO, SUPERFICIE_POR_PANEL
+)
+from .perfiles import COORDENADAS_PROVINCIAS, PERFILES_CONSUMO
+
+
+# Inclinaciones que ofrece el formulario del simulador (templates/core/simulador.html)
+INCLINACIONES_FORMULARIO = (0, 15, 30, 45, 60)
+ORIENTACIONES_FORMULARIO = tuple(AZIMUT_ORIENTACIONES)
+
+
+def paquete_parametros(snapshot):
+    """Parámetros que usa el núcleo del navegador (dict serializable)"""
+    parametros = snapshot.parametros
+    provincias = sorted(set(COORDENADAS_PROVINCIAS) | set(parametros.factores_ubicacion))
+
+    return {
+        'version': snapshot.version,
+        'version_config': snapshot.config.version,
+        'config': {
+            'horas_sol_promedio': parametros.horas_sol_promedio,
+            'potencia_panel': parametros.potencia_panel,
+            'precio_kwh': parametros.precio_kwh,
+            'autoconsumo_sin_bateria': parametros.autoconsumo_sin_bateria,
+            'compensacion_excedentes': parametros.compensacion_excedentes,
+            'degradacion_anual': parametros.degradacion_anual,
+        },
+        'constantes': {
+            'superficie_por_panel': SUPERFICIE_POR_PANEL,
+            'anos_proyeccion': ANOS_PROYECCION,
+            'costo_por_kw_defecto': COSTO_POR_KW_DEFECTO,
+        },
+        'inclinaciones': INCLINACIONES_FORMULARIO,
+        'orientaciones': ORIENTACIONES_FORMULARIO,
+        'perfiles_consumo': PERFILES_CONSUMO,
+        # Por provincia: factor de ubicación, factor por inclinación y por orientación x inclinación
+        'provincias': {
+            provincia: {
+                'ubicacion': parametros.factor_ubicacion(provincia),
+                'inclinacion': [
+                    parametros.factor_inclinacion(float(inclinacion), provincia)
+                    for inclinacion in INCLINACIONES_FORMULARIO
+                ],
+                'orientacion': [
+                    [
+                        parametros.factor_orientacion(orientacion, float(inclinacion), provincia)
+                        for inclinacion in INCLINACIONES_FORMULARIO
+                    ]
+                    for orientacion in ORIENTACIONES_FORMULARIO
+                ],
+            }
+            for provincia in provincias
+        },
+        # Bandas ordenadas por potencia mínima (misma búsqueda que engine.IndiceBandas)
+        'bandas_costo': [
+            [banda.potencia_min, banda.potencia_max or None, banda.costo_por_kw]
+            for banda in parametros.bandas_costo
+        ],
+        # Con tarifa escalonada el ahorro sale de las facturas: lo calcula el servidor
+        'tarifas': sorted([provincia, categoria] for provincia, categoria in parametros.tarifas),
+    }
+
+
+_lock = threading.Lock()
+_serializado = None
+
+
+def paquete_json(snapshot):
+    """(cuerpo JSON compacto, ETag fuerte) del paquete de un snapshot, serializado una sola vez"""
+    global _serializado
+    serializado = _serializado
+    if serializado is not None and serializado[0] == snapshot.version:
+        return serializado[1], serializado[2]
+
+    cuerpo = json.dumps(paquete_parametros(snapshot), separators=(',', ':')).encode('utf-8')
+    etag = f'"{hashlib.sha1(cuerpo).hexdigest()}"'
+    with _lock:
+        _serializado = (snapshot.version, cuerpo, etag)
+    return cuerpo, etag
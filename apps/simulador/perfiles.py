@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Perfiles horarios (8760 horas) de irradiancia y consumo para el simulador.
+
+Los perfiles de irradiancia por provincia (y por celda lat/lon) se leen del
+almacén binario mapeado en memoria de `almacen_perfiles`
+(`SIMULADOR_PERFILES_PATH`, construido con el comando `simulador_perfiles`).
+Si el archivo no existe se sintetizan con un modelo de cielo claro a partir de
+la latitud de la capital de cada provincia. En ambos casos se abren una sola
+vez por proceso y se reutilizan en cada simulación.
+
+Todos los perfiles están normalizados (suman 1): el simulador escala la forma
+con la producción y el consumo anuales.
+"""
+import logging
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from django.conf import settings
+
+from .almacen_perfiles import AlmacenPerfiles, AlmacenPerfilesError
+from .engine import HORAS_ANO, LATITUD_DEFECTO
+from .tarifas import sumar_por_mes
+
+
+logger = logging.getLogger(__name__)
+
+
+PERFIL_RESIDENCIAL = 'residencial'
+PERFIL_COMERCIAL = 'comercial'
+PERFILES_CONSUMO = (PERFIL_RESIDENCIAL, PERFIL_COMERCIAL)
+
+# Coordenadas (latitud, longitud) de la capital de cada provincia
+COORDENADAS_PROVINCIAS = {
+    'caba': (-34.60, -58.38),
+    'buenos_aires': (-34.92, -57.95),
+    'catamarca': (-28.47, -65.78),
+    'chaco': (-27.45, -58.99),
+    'chubut': (-43.30, -65.10),
+    'cordoba': (-31.42, -64.18),
+    'corrientes': (-27.47, -58.83),
+    'entre_rios': (-31.73, -60.53),
+    'formosa': (-26.18, -58.17),
+    'jujuy': (-24.19, -65.30),
+    'la_pampa': (-36.62, -64.29),
+    'la_rioja': (-29.41, -66.86),
+    'mendoza': (-32.89, -68.84),
+    'misiones': (-27.37, -55.90),
+    'neuquen': (-38.95, -68.06),
+    'rio_negro': (-40.81, -63.00),
+    'salta': (-24.79, -65.41),
+    'san_juan': (-31.54, -68.54),
+    'san_luis': (-33.30, -66.34),
+    'santa_cruz': (-51.62, -69.22),
+    'santa_fe': (-31.63, -60.70),
+    'santiago_del_estero': (-27.78, -64.26),
+    'tierra_del_fuego': (-54.80, -68.30),
+    'tucuman': (-26.82, -65.22),
+}
+
+# Curvas diarias de consumo (24 valores relativos, hora local)
+CURVA_RESIDENCIAL = np.array([
+    0.45, 0.40, 0.38, 0.37, 0.38, 0.45, 0.65, 0.85, 0.80, 0.70, 0.65, 0.68,
+    0.75, 0.72, 0.65, 0.62, 0.68, 0.85, 1.05, 1.25, 1.30, 1.20, 0.95, 0.65,
+])
+CURVA_COMERCIAL = np.array([
+    0.25, 0.22, 0.22, 0.22, 0.22, 0.25, 0.35, 0.60, 0.95, 1.10, 1.15, 1.15,
+    1.05, 1.10, 1.15, 1.15, 1.10, 1.00, 0.75, 0.50, 0.35, 0.30, 0.28, 0.26,
+])
+
+
+def _dias_y_horas():
+    """Día del año (1..365) y hora solar (centro del intervalo) de cada hora del año"""
+    horas = np.arange(HORAS_ANO)
+    return horas // 24 + 1, horas % 24 + 0.5
+
+
+def generar_perfil_irradiancia(latitud, semilla=0):
+    """
+    Perfil horario normalizado de irradiancia global con un modelo de cielo claro.
+
+    Usa la geometría solar (declinación y ángulo horario) y una atenuación
+    atmosférica por masa de aire, modulada por un índice de claridad diario
+    pseudoaleatorio pero reproducible para cada `semilla`.
+    """
+    dia, hora = _dias_y_horas()
+    lat = np.radians(latitud)
+    declinacion = np.radians(23.45) * np.sin(2 * np.pi * (284 + dia) / 365)
+    angulo_horario = np.radians(15.0 * (hora - 12))
+
+    cos_cenit = (
+        np.sin(lat) * np.sin(declinacion)
+        + np.cos(lat) * np.cos(declinacion) * np.cos(angulo_horario)
+    )
+    cos_cenit = np.clip(cos_cenit, 0.0, None)
+
+    irradiancia_extra = 1367 * (1 + 0.033 * np.cos(2 * np.pi * dia / 365))
+    with np.errstate(divide='ignore'):
+        masa_aire = np.where(cos_cenit > 0.01, 1 / np.maximum(cos_cenit, 0.01), np.inf)
+    irradiancia = irradiancia_extra * cos_cenit * 0.7 ** (masa_aire ** 0.678)
+
+    # Nubosidad: índice de claridad diario entre 0.35 y 1.0
+    generador = np.random.default_rng(semilla)
+    claridad = np.clip(generador.beta(5, 2, size=365) * 1.1, 0.35, 1.0)
+    irradiancia = irradiancia * np.repeat(claridad, 24)
+
+    total = irradiancia.sum()
+    return (irradiancia / total).astype(np.float32) if total > 0 else irradiancia.astype(np.float32)
+
+
+def generar_perfil_consumo(tipo=PERFIL_RESIDENCIAL):
+    """Perfil horario normalizado de consumo residencial o comercial"""
+    dia, _ = _dias_y_horas()
+    dia_semana = (dia - 1) % 7  # 0 = lunes
+    fin_de_semana = dia_semana >= 5
+
+    # Estacionalidad hemisferio sur: pico de climatización en enero y en julio
+    estacional = 1 + 0.20 * np.cos(2 * np.pi * (dia - 15) / 365) ** 2
+
+    if tipo == PERFIL_COMERCIAL:
+        curva = np.tile(CURVA_COMERCIAL, 365)
+        semana = np.where(fin_de_semana, 0.35, 1.0)
+    else:
+        curva = np.tile(CURVA_RESIDENCIAL, 365)
+        semana = np.where(fin_de_semana, 1.10, 1.0)
+
+    consumo = curva * semana * estacional
+    return (consumo / consumo.sum()).astype(np.float32)
+
+
+def semilla_provincia(provincia):
+    """Semilla estable (independiente del proceso) para la nubosidad de una provincia"""
+    return zlib.crc32(provincia.encode('utf-8'))
+
+
+def series_sinteticas_provincias():
+    """Series sintéticas para todas las provincias: lista de (código, perfil 8760)"""
+    return [
+        (codigo, generar_perfil_irradiancia(latitud, semilla_provincia(codigo)))
+        for codigo, (latitud, _) in sorted(COORDENADAS_PROVINCIAS.items())
+    ]
+
+
+class PerfilesHorarios:
+    """Perfiles de irradiancia por provincia/celda y curvas de consumo del proceso"""
+
+    __slots__ = ('provincias', 'irradiancia', 'almacen', 'consumo', 'irradiancia_defecto', 'origen')
+
+    def __init__(self, provincias, irradiancia, origen, almacen=None):
+        self.provincias = provincias
+        self.irradiancia = irradiancia
+        self.almacen = almacen
+        self.irradiancia_defecto = generar_perfil_irradiancia(LATITUD_DEFECTO)
+        self.consumo = {tipo: generar_perfil_consumo(tipo) for tipo in PERFILES_CONSUMO}
+        self.origen = origen
+
+    def perfil_irradiancia(self, provincia, latitud=None, longitud=None):
+        """Perfil de la celda lat/lon si existe, si no el de la provincia o el nacional"""
+        if self.almacen is not None and latitud is not None and longitud is not None:
+            perfil = self.almacen.perfil_coordenadas(latitud, longitud)
+            if perfil is not None:
+                return perfil
+
+        fila = self.provincias.get(provincia)
+        if fila is None:
+            return self.irradiancia_defecto
+        return self.irradiancia[fila]
+
+    def perfil_consumo(self, tipo):
+        return self.consumo[tipo]
+
+    def reparto_mensual(self, provincia, tipo, latitud=None, longitud=None):
+        """Fracción anual de consumo y de producción de cada mes (para las facturas mensuales)"""
+        return (
+            sumar_por_mes(self.consumo[tipo]),
+            sumar_por_mes(self.perfil_irradiancia(provincia, latitud, longitud)),
+        )
+
+
+def ruta_perfiles():
+    """Ruta del archivo .npy del almacén de perfiles de irradiancia"""
+    return Path(getattr(
+        settings, 'SIMULADOR_PERFILES_PATH',
+        Path(settings.BASE_DIR) / 'data' / 'simulador' / 'perfiles_horarios.npy'
+    ))
+
+
+def cargar_perfiles():
+    """Abre el almacén mapeado en memoria o, si no existe, genera los perfiles sintéticos"""
+    ruta = ruta_perfiles()
+    if ruta.exists():
+        try:
+            almacen = AlmacenPerfiles(ruta)
+            return PerfilesHorarios(
+                almacen.provincias, almacen.matriz, origen=str(ruta), almacen=almacen
+            )
+        except AlmacenPerfilesError as e:
+            logger.error(f'Almacén de perfiles inválido, usando perfiles sintéticos: {e}')
+
+    series = series_sinteticas_provincias()
+    provincias = {codigo: fila for fila, (codigo, _) in enumerate(series)}
+    irradiancia = np.vstack([perfil for _, perfil in series])
+    return PerfilesHorarios(provincias, irradiancia, origen='sintetico')
+
+
+_lock = threading.Lock()
+_perfiles = None
+
+
+def get_perfiles():
+    """Perfiles horarios del proceso (se cargan una sola vez)"""
+    global _perfiles
+    perfiles = _perfiles
+    if perfiles is not None:
+        return perfiles
+
+    with _lock:
+        if _perfiles is None:
+            _perfiles = cargar_perfiles()
+        return _perfiles
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Enlaces permanentes de simulaciones (/simulador/r/<id>/).
+
+Cada simulación se guarda como un registro compacto e inmutable: entradas
+normalizadas, versión del snapshot de parámetros y resultados en JSON. El
+ID es un hash corto de las entradas y la versión, así que la misma
+simulación siempre produce el mismo enlace y los duplicados se descartan
+en la base de datos (`ignore_conflicts`).
+
+Las escrituras no ocurren en la petición: la vista deja el registro en un
+buffer del proceso y un hilo en segundo plano lo inserta con `bulk_create`
+cada pocos segundos (o antes, si se llena un lote). Mientras un registro
+espera en el buffer, el enlace se sirve desde memoria en ese proceso; los
+demás procesos devuelven 404 hasta el siguiente vaciado. Si el buffer está
+lleno, la simulación no se guarda y no se ofrece enlace.
+"""
+import atexit
+import base64
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+from .segundo_plano import VaciadoPeriodico
+
+
+logger = logging.getLogger(__name__)
+
+LONGITUD_ID = 11
+
+RegistroSimulacion = namedtuple(
+    'RegistroSimulacion', ['id', 'entradas', 'version_parametros', 'resultados', 'version_config']
+)
+
+
+def id_simulacion(version, entradas):
+    """ID corto y estable (66 bits en base64 url-safe) de unas entradas y una versión de parámetros"""
+    serializado = json.dumps(
+        {'parametros': version, 'entradas': entradas}, sort_keys=True, default=list
+    )
+    digest = hashlib.sha256(serializado.encode('utf-8')).digest()
+    return base64.urlsafe_b64encode(digest).decode('ascii')[:LONGITUD_ID]
+
+
+def guardar_registros(registros):
+    """Inserta los registros en bloque; los IDs que ya existen se ignoran"""
+    from apps.core.models import SimulacionGuardada
+
+    SimulacionGuardada.objects.bulk_create(
+        [
+            SimulacionGuardada(
+                id=registro.id,
+                entradas=registro.entradas,
+                version_parametros=registro.version_parametros,
+                version_config=registro.version_config,
+                resultados=registro.resultados,
+            )
+            for registro in registros
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class BufferSimulaciones(VaciadoPeriodico):
+    """Buffer de registros pendientes con vaciado periódico en un hilo de fondo"""
+
+    nombre_hilo = 'simulador-permalinks'
+
+    def __init__(self, guardar=guardar_registros, intervalo=2.0, lote=500,
+                 max_pendientes=10000, max_recientes=20000):
+        super().__init__(intervalo)
+        self.guardar = guardar
+        self.lote = lote
+        self.max_pendientes = max_pendientes
+        self.max_recientes = max_recientes
+        self._pendientes = OrderedDict()
+        # IDs ya guardados por este proceso: evita reencolar resultados servidos desde la caché
+        self._recientes = OrderedDict()
+        self.guardados = self.descartados = self.errores = 0
+
+    def agregar(self, registro):
+        """
+        Encola un registro sin bloquear la petición. Devuelve False si se
+        descartó porque el buffer está lleno (el registro no se guardará).
+        """
+        with self._lock:
+            if registro.id in self._pendientes or registro.id in self._recientes:
+                return True
+            if len(self._pendientes) >= self.max_pendientes:
+                self.descartados += 1
+                return False
+            self._pendientes[registro.id] = registro
+            lleno = len(self._pendientes) >= self.lote
+            self._asegurar_hilo()
+        if lleno:
+            self.despertar()
+        return True
+
+    def pendiente(self, id_registro):
+        """Registro aún no guardado en la base de datos (o None)"""
+        with self._lock:
+            return self._pendientes.get(id_registro)
+
+    def vaciar(self):
+        """Guarda todos los pendientes; devuelve cuántos se insertaron"""
+        with self._lock:
+            if not self._pendientes:
+                return 0
+            registros = list(self._pendientes.values())
+
+        try:
+            self.guardar(registros)
+        except Exception as e:
+            # Quedan en el buffer y se reintentan en el próximo vaciado
+            logger.error(f'No se pudieron guardar {len(registros)} simulaciones: {e}')
+            with self._lock:
+                self.errores += 1
+            return 0
+
+        with self._lock:
+            for registro in registros:
+                self._pendientes.pop(registro.id, None)
+                self._recientes[registro.id] = None
+            while len(self._recientes) > self.max_recientes:
+                self._recientes.popitem(last=False)
+            self.guardados += len(registros)
+        return len(registros)
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'pendientes': len(self._pendientes),
+                'guardados': self.guardados,
+                'descartados': self.descartados,
+                'errores': self.errores,
+            }
+
+
+_lock = threading.Lock()
+_buffer = None
+
+
+def get_buffer_simulaciones():
+    """Buffer de simulaciones del proceso (se vacía también al terminar el proceso)"""
+    global _buffer
+    buffer = _buffer
+    if buffer is not None:
+        return buffer
+
+    with _lock:
+        if _buffer is None:
+            _buffer = BufferSimulaciones(
+                intervalo=getattr(settings, 'SIMULADOR_PERMALINKS_INTERVALO', 2.0),
+                lote=getattr(settings, 'SIMULADOR_PERMALINKS_LOTE', 500),
+                max_pendientes=getattr(settings, 'SIMULADOR_PERMALINKS_MAX_PENDIENTES', 10000),
+            )
+            atexit.register(_buffer.vaciar)
+        return _buffer
+
+
+def registrar_simulacion(version, entradas, resultados, version_config=None):
+    """Encola la simulación para guardarla y devuelve su ID (None si no se pudo encolar)"""
+    registro = RegistroSimulacion(
+        id_simulacion(version, entradas), entradas, version, resultados, version_config
+    )
+    if not get_buffer_simulaciones().agregar(registro):
+        # Sin registro el enlace daría 404 para siempre: mejor no ofrecerlo
+        return None
+    return registro.id
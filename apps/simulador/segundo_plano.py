@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Vaciado periódico en un hilo de fondo para los buffers de escritura del simulador.
+
+Las vistas encolan registros en memoria y responden sin tocar la base de
+datos; un hilo daemon por proceso llama a `vaciar()` cada `intervalo`
+segundos o antes si se pide con `despertar()` (por ejemplo, al llenarse
+un lote). El hilo se arranca al primer uso y se vuelve a arrancar en cada
+worker tras un fork.
+"""
+import logging
+import os
+import threading
+
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class VaciadoPeriodico:
+    """Base de los buffers con vaciado en segundo plano; las subclases implementan `vaciar()`"""
+
+    nombre_hilo = 'simulador-vaciado'
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._hilo = None
+        self._pid = None
+
+    def vaciar(self):
+        raise NotImplementedError
+
+    def despertar(self):
+        """Pide un vaciado inmediato"""
+        self._despertar.set()
+
+    def _asegurar_hilo(self):
+        """Arranca el hilo de vaciado si no está vivo en este proceso (llamar con `_lock` tomado)"""
+        if self._hilo is not None and self._hilo.is_alive() and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._hilo = threading.Thread(target=self._bucle, name=self.nombre_hilo, daemon=True)
+        self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+            try:
+                self.vaciar()
+            except Exception:
+                # Un error inesperado no puede matar el hilo: se reintenta en el próximo vaciado
+                logger.exception(f'Error en el vaciado de {self.nombre_hilo}')
+            finally:
+                # Conexión propia del hilo: no dejarla abierta entre vaciados
+                connection.close()
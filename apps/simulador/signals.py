@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Señales que invalidan el snapshot de parámetros del simulador
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from apps.core.models import (
+    SimuladorConfig, CostoInstalacion, FactorUbicacion,
+    FactorOrientacion, AnguloTejado, TarifaElectrica, EscalonTarifa
+)
+from .snapshot import invalidar_snapshot
+
+
+MODELOS_PARAMETROS = (
+    SimuladorConfig,
+    CostoInstalacion,
+    FactorUbicacion,
+    FactorOrientacion,
+    AnguloTejado,
+    TarifaElectrica,
+    EscalonTarifa,
+)
+
+
+def parametros_modificados(sender, **kwargs):
+    """Invalida el snapshot cuando se confirma un cambio en una tabla de parámetros"""
+    if kwargs.get('raw'):
+        # Carga de fixtures: no tocar el estado del proceso
+        return
+    transaction.on_commit(invalidar_snapshot)
+
+
+for modelo in MODELOS_PARAMETROS:
+    post_save.connect(
+        parametros_modificados, sender=modelo,
+        dispatch_uid=f'simulador_snapshot_save_{modelo._meta.model_name}'
+    )
+    post_delete.connect(
+        parametros_modificados, sender=modelo,
+        dispatch_uid=f'simulador_snapshot_delete_{modelo._meta.model_name}'
+    )
@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot inmutable en memoria de las tablas de parámetros del simulador solar.
+
+Las tablas SimuladorConfig, FactorUbicacion, FactorOrientacion, AnguloTejado,
+CostoInstalacion y TarifaElectrica cambian pocas veces al año, así que se cargan una sola vez por
+proceso y se sirven desde memoria. Las señales de `apps.simulador.signals`
+invalidan el snapshot cuando cualquiera de esos modelos se guarda o se elimina
+(incluido el admin); el siguiente acceso lo reconstruye y lo reemplaza de forma
+atómica (una sola asignación de referencia).
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .engine import BandaCosto, ParametrosSimulacion
+from .perfiles import COORDENADAS_PROVINCIAS
+from .transposicion import get_malla_transposicion
+
+
+logger = logging.getLogger(__name__)
+
+# Campos de SimuladorConfig que usa el simulador
+CAMPOS_CONFIG = (
+    'id',
+    'version',
+    'nombre',
+    'horas_sol_promedio',
+    'eficiencia_panel',
+    'potencia_panel',
+    'precio_kwh',
+    'consumo_coche_electrico',
+    'autoconsumo_con_bateria',
+    'autoconsumo_sin_bateria',
+    'compensacion_excedentes',
+    'degradacion_anual',
+)
+
+ConfigSimulador = namedtuple('ConfigSimulador', CAMPOS_CONFIG)
+
+
+class SimuladorSnapshot:
+    """Copia inmutable y versionada de las tablas de parámetros del simulador"""
+
+    __slots__ = (
+        'config',
+        'factores_ubicacion',
+        'factores_orientacion',
+        'factores_inclinacion',
+        'bandas_costo',
+        'bandas_potencia_min',
+        'tarifas',
+        'parametros',
+        'version',
+        'generacion',
+        'cargado_en',
+    )
+
+    def __init__(self, config, factores_ubicacion, factores_orientacion,
+                 factores_inclinacion, bandas_costo, tarifas=None, generacion=0):
+        factores_ubicacion = dict(factores_ubicacion)
+        factores_orientacion = dict(factores_orientacion)
+        factores_inclinacion = dict(factores_inclinacion)
+        bandas = tuple(sorted(bandas_costo, key=lambda banda: banda.potencia_min))
+        tarifas = dict(tarifas or {})
+        valores = {
+            'config': config,
+            'factores_ubicacion': MappingProxyType(factores_ubicacion),
+            'factores_orientacion': MappingProxyType(factores_orientacion),
+            'factores_inclinacion': MappingProxyType(factores_inclinacion),
+            'bandas_costo': bandas,
+            'bandas_potencia_min': tuple(banda.potencia_min for banda in bandas),
+            'tarifas': MappingProxyType(tarifas),
+            'parametros': ParametrosSimulacion(
+                horas_sol_promedio=config.horas_sol_promedio,
+                potencia_panel=config.potencia_panel,
+                precio_kwh=config.precio_kwh,
+                autoconsumo_sin_bateria=config.autoconsumo_sin_bateria,
+                autoconsumo_con_bateria=config.autoconsumo_con_bateria,
+                compensacion_excedentes=config.compensacion_excedentes,
+                degradacion_anual=config.degradacion_anual,
+                factores_ubicacion=factores_ubicacion,
+                factores_orientacion=factores_orientacion,
+                factores_inclinacion=factores_inclinacion,
+                bandas_costo=bandas,
+                latitudes={codigo: latitud for codigo, (latitud, _) in COORDENADAS_PROVINCIAS.items()},
+                transposicion=get_malla_transposicion(),
+                tarifas=tarifas,
+            ),
+            'generacion': generacion,
+            'cargado_en': time.monotonic(),
+        }
+        for nombre, valor in valores.items():
+            object.__setattr__(self, nombre, valor)
+        object.__setattr__(self, 'version', self._calcular_version())
+
+    def __setattr__(self, nombre, valor):
+        raise AttributeError("SimuladorSnapshot es inmutable")
+
+    def __delattr__(self, nombre):
+        raise AttributeError("SimuladorSnapshot es inmutable")
+
+    def __repr__(self):
+        return (
+            f"<SimuladorSnapshot version={self.version} config=v{self.config.version} "
+            f"generacion={self.generacion}>"
+        )
+
+    def _calcular_version(self):
+        """Hash estable del contenido: igual en todos los procesos para los mismos datos"""
+        contenido = {
+            'config': self.config._asdict(),
+            'ubicacion': sorted(self.factores_ubicacion.items()),
+            'orientacion': sorted(self.factores_orientacion.items()),
+            'inclinacion': sorted(self.factores_inclinacion.items()),
+            'costos': [list(banda) for banda in self.bandas_costo],
+            'tarifas': [
+                [list(clave), tarifa.nombre, tarifa.modo, tarifa.precio_excedente,
+                 tarifa.impuestos, [list(escalon) for escalon in tarifa.escalones]]
+                for clave, tarifa in sorted(self.tarifas.items())
+            ],
+        }
+        serializado = json.dumps(contenido, sort_keys=True, default=str)
+        return hashlib.sha1(serializado.encode('utf-8')).hexdigest()[:12]
+
+    def expirado(self, ttl):
+        """Indica si el snapshot superó su tiempo de vida (para otros procesos)"""
+        return ttl > 0 and (time.monotonic() - self.cargado_en) > ttl
+
+    # ------------------------------------------------------------------
+    # Búsquedas (delegan en el núcleo de cálculo)
+    # ------------------------------------------------------------------
+
+    def factor_ubicacion(self, provincia_code):
+        """Factor de irradiación de una provincia (ver FactorUbicacion.get_factor_provincia)"""
+        return self.parametros.factor_ubicacion(provincia_code)
+
+    def factor_orientacion(self, orientacion, inclinacion=None, provincia_code=None):
+        """Factor de eficiencia de una orientación (ver FactorOrientacion.get_factor_orientacion)"""
+        return self.parametros.factor_orientacion(orientacion, inclinacion, provincia_code)
+
+    def factor_inclinacion(self, inclinacion, provincia_code=None):
+        """Factor por inclinación: tabla AnguloTejado, modelo de transposición o cálculo por defecto"""
+        return self.parametros.factor_inclinacion(inclinacion, provincia_code)
+
+    def banda_costo(self, potencia_kw):
+        """Banda de costo para una potencia (ver CostoInstalacion.get_costo_para_potencia)"""
+        return self.parametros.banda_costo(potencia_kw)
+
+    def costo_por_kw(self, potencia_kw):
+        """Costo de instalación por kW para una potencia"""
+        return self.parametros.costo_por_kw(potencia_kw)
+
+    def tarifa(self, provincia_code, categoria):
+        """Tarifa escalonada de una provincia y categoría o None"""
+        return self.parametros.tarifa(provincia_code, categoria)
+
+
+# ----------------------------------------------------------------------
+# Carga e invalidación por proceso
+# ----------------------------------------------------------------------
+
+_lock = threading.RLock()
+_snapshot = None
+_generacion = 0
+
+
+def _ttl_snapshot():
+    """Segundos tras los que se recarga el snapshot aunque no haya señales locales"""
+    return getattr(settings, 'SIMULADOR_SNAPSHOT_TTL', 300)
+
+
+def cargar_snapshot(generacion=0):
+    """Construye un snapshot nuevo leyendo las tablas de parámetros de la base de datos"""
+    from apps.core.models import (
+        SimuladorConfig, CostoInstalacion, FactorUbicacion,
+        FactorOrientacion, AnguloTejado, TarifaElectrica
+    )
+
+    config_activa = SimuladorConfig.get_activa()
+    config = ConfigSimulador(*(getattr(config_activa, campo) for campo in CAMPOS_CONFIG))
+
+    factores_ubicacion = FactorUbicacion.objects.filter(activo=True).values_list(
+        'provincia', 'factor_irradiacion'
+    )
+    factores_orientacion = FactorOrientacion.objects.filter(activo=True).values_list(
+        'orientacion', 'factor_eficiencia'
+    )
+    factores_inclinacion = {
+        angulo.angulo: angulo.get_factor_inclinacion()
+        for angulo in AnguloTejado.objects.filter(activo=True)
+    }
+    bandas_costo = [
+        BandaCosto(*valores)
+        for valores in CostoInstalacion.objects.filter(activo=True).order_by('potencia_min').values_list(
+            'potencia_min', 'potencia_max', 'costo_por_kw', 'costo_bateria_por_kw'
+        )
+    ]
+
+    tarifas = {}
+    for tarifa in TarifaElectrica.objects.filter(activo=True).prefetch_related('escalones'):
+        compacta = tarifa.as_tarifa(tarifa.escalones.all())
+        if compacta is None:
+            logger.warning(f'Tarifa sin escalones ignorada: {tarifa}')
+            continue
+        tarifas[(tarifa.provincia, tarifa.categoria)] = compacta
+
+    snapshot = SimuladorSnapshot(
+        config=config,
+        factores_ubicacion=factores_ubicacion,
+        factores_orientacion=factores_orientacion,
+        factores_inclinacion=factores_inclinacion,
+        bandas_costo=bandas_costo,
+        tarifas=tarifas,
+        generacion=generacion,
+    )
+
+    # El admin rechaza bandas inválidas; datos previos o cargas directas se avisan aquí
+    for error in snapshot.parametros.indice_bandas.errores:
+        logger.warning(f'Bandas de CostoInstalacion inválidas: {error}')
+    return snapshot
+
+
+def get_snapshot():
+    """Devuelve el snapshot vigente, cargándolo si no existe o fue invalidado"""
+    global _snapshot, _generacion
+
+    snapshot = _snapshot
+    ttl = _ttl_snapshot()
+    if snapshot is not None and not snapshot.expirado(ttl):
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.expirado(ttl):
+            _generacion += 1
+            snapshot = cargar_snapshot(generacion=_generacion)
+            _snapshot = snapshot
+        return snapshot
+
+
+async def aget_snapshot():
+    """get_snapshot() para vistas async: solo pasa a un hilo cuando hay que leer la base de datos"""
+    snapshot = _snapshot
+    if snapshot is not None and not snapshot.expirado(_ttl_snapshot()):
+        return snapshot
+    return await sync_to_async(get_snapshot)()
+
+
+def invalidar_snapshot():
+    """Descarta el snapshot actual; el siguiente get_snapshot() lo reconstruye"""
+    global _snapshot
+    with _lock:
+        _snapshot = None
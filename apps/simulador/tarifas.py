@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Tarifas eléctricas escalonadas y facturas mensuales del simulador.
+
+Módulo puro (sin Django): el snapshot convierte cada TarifaElectrica activa
+en una `Tarifa` compacta, indexada por (provincia, categoría) dentro de
+ParametrosSimulacion, así que facturar no hace consultas.
+
+Dos modos de escalonamiento:
+
+- 'bloques': cada kWh del mes se paga al precio del bloque en el que cae
+  (los primeros N kWh a un precio, los siguientes a otro, ...).
+- 'categoria': el consumo total del mes define el escalón y todo el consumo
+  se paga al precio de ese escalón (categorías R1..R9 de las distribuidoras).
+
+En ambos casos el cargo fijo es el del escalón del consumo mensual. El
+escalón de cada mes se obtiene con una búsqueda ordenada vectorizada
+(`np.searchsorted`) y el cargo de energía en modo 'bloques' con los costos
+acumulados de cada bloque, precalculados al construir la tarifa.
+
+Con generación solar se factura la energía tomada de la red y la inyectada
+genera un crédito al precio de excedentes (balance neto, Ley 27.424). El
+crédito no puede bajar la factura de los cargos fijos; el sobrante pasa al
+mes siguiente y el que queda al final del año no se paga.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+
+MODO_BLOQUES = 'bloques'
+MODO_CATEGORIA = 'categoria'
+MODOS_TARIFA = (MODO_BLOQUES, MODO_CATEGORIA)
+
+# Horas de inicio de cada mes dentro de un año de 8760 horas
+DIAS_MES = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+INICIO_MES_HORAS = np.concatenate([[0], np.cumsum(DIAS_MES)[:-1]]) * 24
+REPARTO_DIAS = np.array(DIAS_MES, dtype=float) / sum(DIAS_MES)
+
+EscalonTarifa = namedtuple('EscalonTarifa', ['limite_kwh', 'precio_kwh', 'cargo_fijo'])
+
+
+def sumar_por_mes(serie_horaria):
+    """Suma de una serie de 8760 valores (o N x 8760) por mes: 12 (o N x 12) valores"""
+    return np.add.reduceat(np.asarray(serie_horaria, dtype=float), INICIO_MES_HORAS, axis=-1)
+
+
+class Tarifa:
+    """Tabla de escalones de una tarifa lista para facturar vectorizado"""
+
+    __slots__ = (
+        'nombre', 'modo', 'escalones', 'limites', 'precios', 'cargos_fijos',
+        'acumulado', 'inferiores', 'precio_excedente', 'impuestos',
+    )
+
+    def __init__(self, nombre, modo, escalones, precio_excedente, impuestos=0.0):
+        """
+        `escalones` es una lista de EscalonTarifa; el de `limite_kwh` None (o el
+        último) cubre todo el consumo por encima del anterior.
+        """
+        if modo not in MODOS_TARIFA:
+            raise ValueError(f"Modo de tarifa desconocido: {modo}")
+        if not escalones:
+            raise ValueError("La tarifa necesita al menos un escalón")
+
+        escalones = sorted(
+            escalones, key=lambda escalon: np.inf if escalon.limite_kwh is None else escalon.limite_kwh
+        )
+        self.nombre = nombre
+        self.modo = modo
+        self.escalones = tuple(escalones)
+        self.limites = np.array(
+            [np.inf if escalon.limite_kwh is None else escalon.limite_kwh for escalon in escalones],
+            dtype=float
+        )
+        # El último escalón siempre queda abierto
+        self.limites[-1] = np.inf
+        self.precios = np.array([escalon.precio_kwh for escalon in escalones], dtype=float)
+        self.cargos_fijos = np.array([escalon.cargo_fijo for escalon in escalones], dtype=float)
+
+        # Límite inferior y costo acumulado de los bloques anteriores a cada escalón
+        self.inferiores = np.concatenate([[0.0], self.limites[:-1]])
+        tramos = (self.limites[:-1] - self.inferiores[:-1]) * self.precios[:-1]
+        self.acumulado = np.concatenate([[0.0], np.cumsum(tramos)])
+
+        self.precio_excedente = precio_excedente
+        self.impuestos = impuestos
+
+    def __repr__(self):
+        return f"<Tarifa {self.nombre} modo={self.modo} escalones={len(self.escalones)}>"
+
+    def escalon(self, consumo):
+        """Índice del escalón de cada consumo mensual (un consumo igual al límite queda en ese escalón)"""
+        return np.searchsorted(self.limites, consumo, side='left')
+
+    def cargo_energia(self, consumo):
+        """Cargo de energía (sin impuestos) para consumos mensuales de cualquier forma"""
+        consumo = np.maximum(np.asarray(consumo, dtype=float), 0.0)
+        escalon = self.escalon(consumo)
+        if self.modo == MODO_CATEGORIA:
+            return consumo * self.precios[escalon]
+        return self.acumulado[escalon] + (consumo - self.inferiores[escalon]) * self.precios[escalon]
+
+    def cargo_fijo(self, consumo):
+        """Cargo fijo (sin impuestos) según el escalón del consumo mensual"""
+        consumo = np.maximum(np.asarray(consumo, dtype=float), 0.0)
+        return self.cargos_fijos[self.escalon(consumo)]
+
+    def factura(self, consumo):
+        """Factura mensual con impuestos para consumos de cualquier forma"""
+        return (self.cargo_energia(consumo) + self.cargo_fijo(consumo)) * (1 + self.impuestos)
+
+
+class FacturasMensuales:
+    """Facturas de los 12 meses con y sin instalación solar"""
+
+    __slots__ = (
+        'tarifa', 'consumo', 'importado', 'excedente',
+        'sin_solar', 'con_solar', 'credito_aplicado', 'credito_sobrante',
+    )
+
+    def __init__(self, **valores):
+        for campo in self.__slots__:
+            setattr(self, campo, valores[campo])
+
+    @property
+    def ahorro(self):
+        return self.sin_solar - self.con_solar
+
+    @property
+    def ahorro_anual(self):
+        return float(self.ahorro.sum())
+
+    def to_dict(self):
+        return {
+            'tarifa': self.tarifa,
+            'total_sin_solar': round(float(self.sin_solar.sum()), 2),
+            'total_con_solar': round(float(self.con_solar.sum()), 2),
+            'ahorro_anual': round(self.ahorro_anual, 2),
+            'credito_sobrante': round(self.credito_sobrante, 2),
+            'meses': [
+                {
+                    'mes': mes + 1,
+                    'consumo_kwh': round(float(self.consumo[mes]), 1),
+                    'importado_kwh': round(float(self.importado[mes]), 1),
+                    'excedente_kwh': round(float(self.excedente[mes]), 1),
+                    'factura_sin_solar': round(float(self.sin_solar[mes]), 2),
+                    'factura_con_solar': round(float(self.con_solar[mes]), 2),
+                    'credito_aplicado': round(float(self.credito_aplicado[mes]), 2),
+                }
+                for mes in range(12)
+            ],
+        }
+
+
+def facturas_mensuales(tarifa, consumo, autoconsumo, excedente):
+    """
+    Facturas de 12 meses a partir de la energía mensual (kWh).
+
+    `consumo` es la demanda del mes, `autoconsumo` la parte cubierta por la
+    instalación y `excedente` la energía inyectada a la red.
+    """
+    consumo = np.asarray(consumo, dtype=float)
+    importado = np.maximum(consumo - np.asarray(autoconsumo, dtype=float), 0.0)
+    excedente = np.maximum(np.asarray(excedente, dtype=float), 0.0)
+
+    sin_solar = tarifa.factura(consumo)
+    factura_red = tarifa.factura(importado)
+    credito_aplicado, saldo = _balance_neto(tarifa, importado, excedente, factura_red)
+
+    return FacturasMensuales(
+        tarifa=tarifa.nombre,
+        consumo=consumo,
+        importado=importado,
+        excedente=excedente,
+        sin_solar=sin_solar,
+        con_solar=factura_red - credito_aplicado,
+        credito_aplicado=credito_aplicado,
+        credito_sobrante=float(saldo),
+    )
+
+
+def ahorro_anual_lote(tarifa, consumo, autoconsumo, excedente):
+    """
+    Ahorro anual de N escenarios con la misma tarifa.
+
+    Entradas de forma (N, 12) con la energía mensual (kWh) de cada escenario;
+    devuelve N valores iguales a `facturas_mensuales(...).ahorro_anual` fila a fila.
+    """
+    consumo = np.asarray(consumo, dtype=float)
+    importado = np.maximum(consumo - np.asarray(autoconsumo, dtype=float), 0.0)
+    excedente = np.maximum(np.asarray(excedente, dtype=float), 0.0)
+
+    factura_red = tarifa.factura(importado)
+    credito_aplicado, _ = _balance_neto(tarifa, importado, excedente, factura_red)
+    return (tarifa.factura(consumo) - factura_red + credito_aplicado).sum(axis=-1)
+
+
+def _balance_neto(tarifa, importado, excedente, factura_red):
+    """
+    Crédito aplicado cada mes y saldo sobrante a fin de año.
+
+    El crédito se aplica hasta los cargos fijos y el resto pasa al mes
+    siguiente; el último eje es el de los 12 meses y los demás se recorren
+    vectorizados (un paso por mes).
+    """
+    minimo = tarifa.cargo_fijo(importado) * (1 + tarifa.impuestos)
+    disponible = np.maximum(factura_red - minimo, 0.0)
+    credito_generado = excedente * tarifa.precio_excedente
+
+    credito_aplicado = np.zeros_like(credito_generado)
+    saldo = np.zeros(credito_generado.shape[:-1])
+    for mes in range(12):
+        saldo = saldo + credito_generado[..., mes]
+        aplicado = np.minimum(saldo, disponible[..., mes])
+        credito_aplicado[..., mes] = aplicado
+        saldo = saldo - aplicado
+    return credito_aplicado, saldo
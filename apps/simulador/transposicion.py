@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Modelo de transposición: irradiación sobre el plano de los paneles.
+
+Para cada latitud se calculan las 8760 posiciones solares del año con NumPy
+(declinación, ángulo horario y vector solar en coordenadas este/norte/arriba),
+la irradiancia de cielo claro (Haurwitz) atenuada por la nubosidad media y su
+separación en directa y difusa (correlación de Erbs). La irradiación anual
+sobre un plano de inclinación β y azimut γ sigue el modelo isotrópico
+(Liu-Jordan):
+
+    POA = DNI · max(cos θ, 0) + DHI · (1 + cos β) / 2 + ρ · GHI · (1 - cos β) / 2
+
+donde cos θ es el producto escalar entre el vector solar y la normal del
+plano, así que todas las combinaciones (β, γ) de una latitud salen de un
+único producto de matrices (horas x 3) · (3 x planos).
+
+La malla (latitud x inclinación x azimut) se calcula una vez por proceso y
+cada consulta interpola entre sus nodos. Los factores son relativos al plano
+óptimo orientado al norte de cada latitud (1.0 = óptimo), igual que en las
+tablas AnguloTejado y FactorOrientacion.
+
+Módulo puro, como `engine`: no importa Django.
+"""
+import threading
+
+import numpy as np
+
+from .engine import HORAS_ANO
+
+
+# Nodos de la malla: latitudes de Argentina, inclinación y azimut (0° = Norte, sentido horario)
+LATITUDES = np.arange(-56.0, -19.0, 2.0)
+INCLINACIONES = np.arange(0.0, 91.0, 5.0)
+AZIMUTS = np.arange(0.0, 361.0, 15.0)
+
+ALBEDO = 0.2
+
+# Transmitancia media por nubosidad sobre el cielo claro
+CLARIDAD_MEDIA = 0.85
+
+CONSTANTE_SOLAR = 1367.0
+
+
+def vectores_solares(latitud):
+    """Componentes este/norte/arriba del vector solar y día del año de cada hora con sol"""
+    horas = np.arange(HORAS_ANO)
+    dia = horas // 24 + 1
+    lat = np.radians(latitud)
+    declinacion = np.radians(23.45) * np.sin(2 * np.pi * (284 + dia) / 365)
+    angulo_horario = np.radians(15.0 * (horas % 24 + 0.5 - 12))
+
+    este = -np.cos(declinacion) * np.sin(angulo_horario)
+    norte = np.cos(lat) * np.sin(declinacion) - np.sin(lat) * np.cos(declinacion) * np.cos(angulo_horario)
+    arriba = np.sin(lat) * np.sin(declinacion) + np.cos(lat) * np.cos(declinacion) * np.cos(angulo_horario)
+
+    con_sol = arriba > 0.01
+    return np.column_stack([este, norte, arriba])[con_sol], dia[con_sol]
+
+
+def componentes_irradiancia(arriba, dia):
+    """Irradiancia global, directa normal y difusa horizontal (W/m²) de cada hora"""
+    extraterrestre = CONSTANTE_SOLAR * (1 + 0.033 * np.cos(2 * np.pi * dia / 365))
+
+    # Cielo claro de Haurwitz atenuado por la nubosidad media
+    indice_claridad = CLARIDAD_MEDIA * (1098 / CONSTANTE_SOLAR) * np.exp(-0.059 / arriba)
+    global_horizontal = indice_claridad * extraterrestre * arriba
+
+    # Fracción difusa según Erbs et al. (1982)
+    fraccion_difusa = np.where(
+        indice_claridad <= 0.22,
+        1 - 0.09 * indice_claridad,
+        np.where(
+            indice_claridad <= 0.80,
+            0.9511 - 0.1604 * indice_claridad + 4.388 * indice_claridad ** 2
+            - 16.638 * indice_claridad ** 3 + 12.336 * indice_claridad ** 4,
+            0.165,
+        ),
+    )
+    difusa = fraccion_difusa * global_horizontal
+    directa_normal = (global_horizontal - difusa) / arriba
+    return global_horizontal, directa_normal, difusa
+
+
+def normales_planos(inclinaciones, azimuts):
+    """Normales (3 x planos) de todas las combinaciones inclinación x azimut"""
+    beta = np.radians(inclinaciones)[:, None]
+    gamma = np.radians(azimuts)[None, :]
+    return np.stack([
+        (np.sin(beta) * np.sin(gamma)).ravel(),
+        (np.sin(beta) * np.cos(gamma)).ravel(),
+        np.broadcast_to(np.cos(beta), (beta.size, gamma.size)).ravel(),
+    ])
+
+
+def irradiacion_planos(latitud, inclinaciones=INCLINACIONES, azimuts=AZIMUTS):
+    """Irradiación anual (kWh/m²) sobre cada plano: matriz inclinación x azimut"""
+    solares, dia = vectores_solares(latitud)
+    global_horizontal, directa_normal, difusa = componentes_irradiancia(solares[:, 2], dia)
+
+    normales = normales_planos(inclinaciones, azimuts)
+    cos_incidencia = np.maximum(solares @ normales, 0.0)
+    directa = directa_normal @ cos_incidencia
+
+    cos_beta = normales[2]
+    difusa_cielo = difusa.sum() * (1 + cos_beta) / 2
+    reflejada = ALBEDO * global_horizontal.sum() * (1 - cos_beta) / 2
+
+    total = (directa + difusa_cielo + reflejada) / 1000
+    return total.reshape(len(inclinaciones), len(azimuts))
+
+
+class MallaTransposicion:
+    """Irradiación relativa precalculada (latitud x inclinación x azimut) con interpolación trilineal"""
+
+    __slots__ = ('latitudes', 'inclinaciones', 'azimuts', 'relativa', '_relativa', '_ejes')
+
+    def __init__(self, latitudes=LATITUDES, inclinaciones=INCLINACIONES, azimuts=AZIMUTS):
+        self.latitudes = np.asarray(latitudes, dtype=float)
+        self.inclinaciones = np.asarray(inclinaciones, dtype=float)
+        self.azimuts = np.asarray(azimuts, dtype=float)
+
+        irradiacion = np.stack([
+            irradiacion_planos(latitud, self.inclinaciones, self.azimuts)
+            for latitud in self.latitudes
+        ])
+        # Relativa al mejor plano orientado al norte (azimut 0) de cada latitud
+        optimo = irradiacion[:, :, 0].max(axis=1)
+        self.relativa = irradiacion / optimo[:, None, None]
+
+        # Copias en listas para la interpolación escalar sin overhead de NumPy
+        self._relativa = self.relativa.tolist()
+        self._ejes = tuple(
+            (eje[0], eje[1] - eje[0], len(eje) - 1)
+            for eje in (self.latitudes, self.inclinaciones, self.azimuts)
+        )
+
+    def __repr__(self):
+        return f"<MallaTransposicion nodos={self.relativa.shape}>"
+
+    @staticmethod
+    def _posicion(valor, eje):
+        """Índice inferior y fracción de un valor sobre un eje regular (con recorte a los bordes)"""
+        inicio, paso, ultimo = eje
+        posicion = min(max((valor - inicio) / paso, 0.0), float(ultimo))
+        indice = min(int(posicion), ultimo - 1)
+        return indice, posicion - indice
+
+    def irradiacion_relativa(self, latitud, inclinacion, azimut):
+        """Irradiación del plano relativa al óptimo de la latitud (interpolación trilineal)"""
+        i, fi = self._posicion(latitud, self._ejes[0])
+        j, fj = self._posicion(inclinacion, self._ejes[1])
+        k, fk = self._posicion(azimut % 360, self._ejes[2])
+        valores = self._relativa
+
+        resultado = 0.0
+        for di, pi in ((0, 1 - fi), (1, fi)):
+            if not pi:
+                continue
+            for dj, pj in ((0, 1 - fj), (1, fj)):
+                if not pj:
+                    continue
+                fila = valores[i + di][j + dj]
+                resultado += pi * pj * (fila[k] * (1 - fk) + fila[k + 1] * fk)
+        return resultado
+
+    def factor_inclinacion(self, latitud, inclinacion):
+        """Irradiación del plano orientado al norte relativa al óptimo de la latitud"""
+        return self.irradiacion_relativa(latitud, inclinacion, 0)
+
+    def factor_orientacion(self, latitud, inclinacion, azimut):
+        """Irradiación con el azimut dado relativa a la del mismo plano orientado al norte"""
+        hacia_norte = self.irradiacion_relativa(latitud, inclinacion, 0)
+        if hacia_norte <= 0:
+            return 0.0
+        return self.irradiacion_relativa(latitud, inclinacion, azimut) / hacia_norte
+
+    def irradiacion_relativa_lote(self, latitud, inclinacion, azimut):
+        """Versión vectorizada de irradiacion_relativa"""
+        indices = []
+        for valores, eje in zip((latitud, inclinacion, np.mod(azimut, 360)), self._ejes):
+            inicio, paso, ultimo = eje
+            posicion = np.clip((np.asarray(valores, dtype=float) - inicio) / paso, 0.0, ultimo)
+            indice = np.minimum(posicion.astype(int), ultimo - 1)
+            indices.append((indice, posicion - indice))
+
+        (i, fi), (j, fj), (k, fk) = indices
+        resultado = np.zeros(np.broadcast(i, j, k).shape)
+        for di, pi in ((0, 1 - fi), (1, fi)):
+            for dj, pj in ((0, 1 - fj), (1, fj)):
+                for dk, pk in ((0, 1 - fk), (1, fk)):
+                    resultado += pi * pj * pk * self.relativa[i + di, j + dj, k + dk]
+        return resultado
+
+    def factor_inclinacion_lote(self, latitud, inclinacion):
+        """Versión vectorizada de factor_inclinacion"""
+        return self.irradiacion_relativa_lote(latitud, inclinacion, np.zeros_like(inclinacion))
+
+    def factor_orientacion_lote(self, latitud, inclinacion, azimut):
+        """Versión vectorizada de factor_orientacion"""
+        hacia_norte = self.factor_inclinacion_lote(latitud, inclinacion)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(
+                hacia_norte > 0,
+                self.irradiacion_relativa_lote(latitud, inclinacion, azimut) / hacia_norte,
+                0.0,
+            )
+
+
+_lock = threading.Lock()
+_malla = None
+
+
+def get_malla_transposicion():
+    """Malla del proceso (se calcula una sola vez, unos cientos de ms)"""
+    global _malla
+    malla = _malla
+    if malla is not None:
+        return malla
+
+    with _lock:
+        if _malla is None:
+            _malla = MallaTransposicion()
+        return _malla
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Resolución de coordenadas (latitud, longitud) a provincia.
+
+Los límites provinciales se leen de un GeoJSON local
+(`SIMULADOR_PROVINCIAS_PATH`, por ejemplo la capa de provincias del IGN con
+una propiedad `codigo` o `nombre` por provincia) y al arrancar se compilan en
+un índice de grilla regular:
+
+- para cada celda se guarda la provincia que contiene su centro, calculada
+  por barrido de filas (una búsqueda ordenada por fila y provincia);
+- las celdas que cruza algún borde guardan además las aristas que las tocan
+  (en formato CSR: desplazamientos + índices).
+
+Consultar un punto es O(1) en las celdas interiores. En las de borde se
+cuentan los cruces del segmento punto -> centro de la celda con las aristas
+de esa celda: un número impar de cruces con una provincia invierte la
+pertenencia del centro. No se recorre ningún polígono completo, así que la
+resolución tarda microsegundos.
+
+Si el GeoJSON no está instalado se usa la capital de provincia más cercana.
+"""
+import json
+import logging
+import math
+import threading
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+
+from django.conf import settings
+
+from .perfiles import COORDENADAS_PROVINCIAS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tamaño de celda de la grilla (grados)
+RESOLUCION_GRILLA = 0.1
+
+# Caja que contiene a la Argentina continental e insular (para el respaldo por capitales)
+LATITUD_MIN, LATITUD_MAX = -56.0, -21.0
+LONGITUD_MIN, LONGITUD_MAX = -74.5, -53.0
+
+METODO_POLIGONO = 'poligono'
+METODO_CAPITAL = 'capital_cercana'
+
+# Nombres oficiales que no coinciden con el código de FactorUbicacion
+ALIAS_PROVINCIAS = {
+    'ciudad_autonoma_de_buenos_aires': 'caba',
+    'capital_federal': 'caba',
+    'tierra_del_fuego_antartida_e_islas_del_atlantico_sur': 'tierra_del_fuego',
+}
+
+
+def codigo_provincia(nombre):
+    """Código de FactorUbicacion a partir del nombre de una provincia"""
+    texto = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    codigo = '_'.join(
+        ''.join(caracter if caracter.isalnum() else ' ' for caracter in texto.lower()).split()
+    )
+    return ALIAS_PROVINCIAS.get(codigo, codigo)
+
+
+def _cruza(ax, ay, bx, by, cx, cy, dx, dy):
+    """Indica si los segmentos AB y CD se cruzan (sin contar contactos colineales)"""
+    d1 = (dx - cx) * (ay - cy) - (dy - cy) * (ax - cx)
+    d2 = (dx - cx) * (by - cy) - (dy - cy) * (bx - cx)
+    d3 = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    d4 = (bx - ax) * (dy - ay) - (by - ay) * (dx - ax)
+    return ((d1 > 0) != (d2 > 0)) and ((d3 > 0) != (d4 > 0))
+
+
+class IndiceProvincias:
+    """Índice de grilla sobre los polígonos provinciales"""
+
+    __slots__ = (
+        'codigos', 'resolucion', 'longitud_min', 'latitud_min', 'columnas', 'filas',
+        'centros', 'inicio_aristas', 'aristas', 'segmentos',
+    )
+
+    def __init__(self, poligonos, resolucion=RESOLUCION_GRILLA):
+        """
+        `poligonos` es una lista de (código, anillos) y cada anillo una lista de
+        puntos (longitud, latitud). Huecos e islas se tratan igual: cuenta la
+        paridad de cruces por provincia.
+        """
+        self.codigos = tuple(codigo for codigo, _ in poligonos)
+        self.resolucion = resolucion
+
+        x1, y1, x2, y2, provincia = [], [], [], [], []
+        for posicion, (_, anillos) in enumerate(poligonos):
+            for anillo in anillos:
+                puntos = np.asarray(anillo, dtype=float)[:, :2]
+                if len(puntos) < 3:
+                    continue
+                siguientes = np.roll(puntos, -1, axis=0)
+                distintos = np.any(puntos != siguientes, axis=1)
+                x1.append(puntos[distintos, 0])
+                y1.append(puntos[distintos, 1])
+                x2.append(siguientes[distintos, 0])
+                y2.append(siguientes[distintos, 1])
+                provincia.append(np.full(distintos.sum(), posicion))
+
+        x1, y1, x2, y2 = (np.concatenate(valores) for valores in (x1, y1, x2, y2))
+        provincia = np.concatenate(provincia)
+
+        # Grilla alineada a la resolución con una celda de margen
+        self.longitud_min = math.floor(min(x1.min(), x2.min()) / resolucion) * resolucion - resolucion
+        self.latitud_min = math.floor(min(y1.min(), y2.min()) / resolucion) * resolucion - resolucion
+        self.columnas = int(math.ceil((max(x1.max(), x2.max()) - self.longitud_min) / resolucion)) + 2
+        self.filas = int(math.ceil((max(y1.max(), y2.max()) - self.latitud_min) / resolucion)) + 2
+
+        self.centros = self._clasificar_centros(x1, y1, x2, y2, provincia)
+        self.inicio_aristas, self.aristas = self._aristas_por_celda(x1, y1, x2, y2)
+
+        # Listas para la consulta escalar sin overhead de NumPy
+        self.segmentos = list(zip(x1.tolist(), y1.tolist(), x2.tolist(), y2.tolist(), provincia.tolist()))
+        self.centros = self.centros.ravel().tolist()
+        self.inicio_aristas = self.inicio_aristas.tolist()
+        self.aristas = self.aristas.tolist()
+
+    def __repr__(self):
+        return (
+            f"<IndiceProvincias provincias={len(self.codigos)} "
+            f"grilla={self.filas}x{self.columnas} aristas={len(self.segmentos)}>"
+        )
+
+    def _clasificar_centros(self, x1, y1, x2, y2, provincia):
+        """Provincia (o -1) que contiene el centro de cada celda, por barrido de filas"""
+        centros = np.full((self.filas, self.columnas), -1, dtype=np.int32)
+        centros_x = self.longitud_min + (np.arange(self.columnas) + 0.5) * self.resolucion
+
+        for fila in range(self.filas):
+            y = self.latitud_min + (fila + 0.5) * self.resolucion
+            cruzan = (y1 <= y) != (y2 <= y)
+            if not cruzan.any():
+                continue
+            ax, ay, bx, by = x1[cruzan], y1[cruzan], x2[cruzan], y2[cruzan]
+            cruces_x = ax + (y - ay) * (bx - ax) / (by - ay)
+            provincias = provincia[cruzan]
+            for posicion in np.unique(provincias):
+                cortes = np.sort(cruces_x[provincias == posicion])
+                # Dentro si hay un número impar de cortes a la izquierda del centro
+                dentro = np.searchsorted(cortes, centros_x) % 2 == 1
+                centros[fila, dentro] = posicion
+        return centros
+
+    def _aristas_por_celda(self, x1, y1, x2, y2):
+        """Aristas que tocan cada celda (CSR): caja de la arista recortada a la grilla"""
+        columna_min = np.floor((np.minimum(x1, x2) - self.longitud_min) / self.resolucion).astype(int)
+        columna_max = np.floor((np.maximum(x1, x2) - self.longitud_min) / self.resolucion).astype(int)
+        fila_min = np.floor((np.minimum(y1, y2) - self.latitud_min) / self.resolucion).astype(int)
+        fila_max = np.floor((np.maximum(y1, y2) - self.latitud_min) / self.resolucion).astype(int)
+
+        celdas, aristas = [], []
+        for arista in range(len(x1)):
+            for fila in range(fila_min[arista], fila_max[arista] + 1):
+                base = fila * self.columnas
+                for columna in range(columna_min[arista], columna_max[arista] + 1):
+                    celdas.append(base + columna)
+                    aristas.append(arista)
+
+        celdas = np.asarray(celdas, dtype=np.int64)
+        aristas = np.asarray(aristas, dtype=np.int32)
+        orden = np.argsort(celdas, kind='stable')
+        conteo = np.bincount(celdas, minlength=self.filas * self.columnas)
+        inicio = np.concatenate([[0], np.cumsum(conteo)])
+        return inicio, aristas[orden]
+
+    def resolver(self, latitud, longitud):
+        """Código de la provincia que contiene el punto o None"""
+        columna = int((longitud - self.longitud_min) // self.resolucion)
+        fila = int((latitud - self.latitud_min) // self.resolucion)
+        if not (0 <= columna < self.columnas and 0 <= fila < self.filas):
+            return None
+
+        celda = fila * self.columnas + columna
+        centro = self.centros[celda]
+        inicio, fin = self.inicio_aristas[celda], self.inicio_aristas[celda + 1]
+        if inicio == fin:
+            return self.codigos[centro] if centro >= 0 else None
+
+        # Paridad de cruces del segmento punto -> centro con las aristas de la celda
+        centro_x = self.longitud_min + (columna + 0.5) * self.resolucion
+        centro_y = self.latitud_min + (fila + 0.5) * self.resolucion
+        impares = set()
+        for arista in self.aristas[inicio:fin]:
+            ax, ay, bx, by, provincia = self.segmentos[arista]
+            if _cruza(longitud, latitud, centro_x, centro_y, ax, ay, bx, by):
+                impares ^= {provincia}
+
+        if centro >= 0 and centro not in impares:
+            return self.codigos[centro]
+        for provincia in impares:
+            if provincia != centro:
+                return self.codigos[provincia]
+        return None
+
+
+def poligonos_geojson(ruta):
+    """Lista de (código, anillos) de un GeoJSON de provincias (Polygon o MultiPolygon)"""
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+
+    poligonos = {}
+    for feature in datos.get('features', []):
+        propiedades = feature.get('properties') or {}
+        nombre = (
+            propiedades.get('codigo') or propiedades.get('nombre')
+            or propiedades.get('nam') or propiedades.get('name')
+        )
+        geometria = feature.get('geometry') or {}
+        if not nombre or geometria.get('type') not in ('Polygon', 'MultiPolygon'):
+            continue
+
+        if geometria['type'] == 'Polygon':
+            anillos = geometria['coordinates']
+        else:
+            anillos = [anillo for poligono in geometria['coordinates'] for anillo in poligono]
+        poligonos.setdefault(codigo_provincia(nombre), []).extend(anillos)
+    return sorted(poligonos.items())
+
+
+def capital_mas_cercana(latitud, longitud):
+    """Provincia de la capital más cercana, si el punto cae dentro de la caja de Argentina"""
+    if not (LATITUD_MIN <= latitud <= LATITUD_MAX and LONGITUD_MIN <= longitud <= LONGITUD_MAX):
+        return None
+    escala = math.cos(math.radians(latitud))
+    return min(
+        COORDENADAS_PROVINCIAS,
+        key=lambda codigo: (
+            (COORDENADAS_PROVINCIAS[codigo][0] - latitud) ** 2
+            + ((COORDENADAS_PROVINCIAS[codigo][1] - longitud) * escala) ** 2
+        ),
+    )
+
+
+def ruta_provincias():
+    """Ruta del GeoJSON de límites provinciales"""
+    return Path(getattr(
+        settings, 'SIMULADOR_PROVINCIAS_PATH',
+        Path(settings.BASE_DIR) / 'data' / 'simulador' / 'provincias.geojson'
+    ))
+
+
+def cargar_indice():
+    """Compila el índice de provincias o devuelve None si no hay GeoJSON válido"""
+    ruta = ruta_provincias()
+    if not ruta.exists():
+        logger.info(f'Sin límites provinciales en {ruta}: se usará la capital más cercana')
+        return None
+    try:
+        poligonos = poligonos_geojson(ruta)
+        return IndiceProvincias(poligonos) if poligonos else None
+    except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+        logger.error(f'GeoJSON de provincias inválido, se usará la capital más cercana: {e}')
+        return None
+
+
+_lock = threading.Lock()
+_cargado = False
+_indice = None
+
+
+def get_indice_provincias():
+    """Índice de provincias del proceso (se compila una sola vez; None sin GeoJSON)"""
+    global _cargado, _indice
+    if _cargado:
+        return _indice
+
+    with _lock:
+        if not _cargado:
+            _indice = cargar_indice()
+            _cargado = True
+        return _indice
+
+
+def resolver_ubicacion(latitud, longitud):
+    """(código de provincia, método) para unas coordenadas; (None, None) si no se resuelven"""
+    indice = get_indice_provincias()
+    if indice is not None:
+        codigo = indice.resolver(latitud, longitud)
+        return (codigo, METODO_POLIGONO) if codigo else (None, None)
+
+    codigo = capital_mas_cercana(latitud, longitud)
+    return (codigo, METODO_CAPITAL) if codigo else (None, None)
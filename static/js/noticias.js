@@ -1,6 +1,6 @@
 /**
  * NOTICIAS.JS - Sistema de Blog INGLAT
- * Funcionalidades: Filtrado dinámico, animaciones, interacciones
+ * Funcionalidades: Filtrado dinámico, scroll infinito, animaciones, interacciones
  */
 
 class NoticiasManager {
@@ -8,6 +8,7 @@ class NoticiasManager {
         this.initElements();
         this.bindEvents();
         this.initAnimations();
+        this.initScrollInfinito();
     }
 
     initElements() {
@@ -20,14 +21,23 @@ class NoticiasManager {
         this.noticiasGrid = document.getElementById('noticias-grid');
         this.loadingState = document.getElementById('loading-state');
         this.noticiasCount = document.getElementById('noticias-count');
+        this.botonMas = document.getElementById('noticias-mas');
         
-        // Estado de filtros
+        // Estado de filtros (el servidor ya renderizó la página con los de la URL)
         this.filtros = {
-            categoria: 'todas',
-            fecha: 'todas',
-            busqueda: ''
+            categoria: this.categoriaSelect ? this.categoriaSelect.value : 'todas',
+            fecha: this.fechaSelect ? this.fechaSelect.value : 'todas',
+            busqueda: this.searchInput ? this.searchInput.value.trim() : ''
         };
         
+        // Paginación por cursor: siguiente página y tarjetas cargadas
+        this.paginaUrl = this.noticiasGrid ? this.noticiasGrid.dataset.paginaUrl : null;
+        this.siguiente = this.noticiasGrid ? this.noticiasGrid.dataset.siguiente || null : null;
+        this.cargadas = this.noticiasGrid ? this.noticiasGrid.querySelectorAll('.noticia-card').length : 0;
+        this.cargandoPagina = false;
+        // Cambia con cada filtro: descarta páginas pedidas con los filtros anteriores
+        this.generacionFiltros = 0;
+        
         // Configuración
         this.debounceDelay = 500;
         this.animationDelay = 100;
@@ -67,8 +77,7 @@ class NoticiasManager {
         this.bindCardHoverEffects();
     }
 
-    bindCardHoverEffects() {
-        const cards = document.querySelectorAll('.noticia-card');
+    bindCardHoverEffects(cards = document.querySelectorAll('.noticia-card')) {
         cards.forEach(card => {
             card.addEventListener('mouseenter', () => {
                 this.animateCardHover(card, true);
@@ -115,24 +124,33 @@ class NoticiasManager {
         }
     }
 
+    parametrosFiltros() {
+        const params = new URLSearchParams();
+        // En la página de una categoría la categoría es fija
+        const categoria = this.filtros.categoria !== 'todas' ?
+            this.filtros.categoria : this.noticiasGrid.dataset.categoria;
+        if (categoria) {
+            params.append('categoria', categoria);
+        }
+        if (this.filtros.fecha !== 'todas') {
+            params.append('fecha', this.filtros.fecha);
+        }
+        if (this.filtros.busqueda) {
+            params.append('q', this.filtros.busqueda);
+        }
+        return params;
+    }
+
     async aplicarFiltros() {
         if (!this.noticiasGrid) return;
 
+        const generacion = ++this.generacionFiltros;
         try {
             // Mostrar loading
             this.showLoading(true);
 
             // Preparar parámetros
-            const params = new URLSearchParams();
-            if (this.filtros.categoria !== 'todas') {
-                params.append('categoria', this.filtros.categoria);
-            }
-            if (this.filtros.fecha !== 'todas') {
-                params.append('fecha', this.filtros.fecha);
-            }
-            if (this.filtros.busqueda) {
-                params.append('q', this.filtros.busqueda);
-            }
+            const params = this.parametrosFiltros();
 
             // Realizar petición AJAX
             const response = await fetch(`/noticias/filtrar/?${params.toString()}`, {
@@ -147,10 +165,14 @@ class NoticiasManager {
             }
 
             const data = await response.json();
+            if (generacion !== this.generacionFiltros) return;
             
-            // Actualizar contenido
+            // Actualizar contenido y cursor de la página siguiente
+            this.siguiente = data.siguiente || null;
+            this.cargadas = data.total;
             this.actualizarGrid(data.noticias);
             this.actualizarContador(data.total);
+            this.actualizarBotonMas();
 
         } catch (error) {
             console.error('Error aplicando filtros:', error);
@@ -235,7 +257,7 @@ class NoticiasManager {
                             </div>
                         </header>
                         <div class="card-body">
-                            <p class="card-descripcion">${noticia.descripcion_corta}</p>
+                            <p class="card-descripcion">${noticia.extracto}</p>
                         </div>
                         <footer class="card-footer">
                             <div class="card-autor">
@@ -283,7 +305,78 @@ class NoticiasManager {
     actualizarContador(total) {
         if (this.noticiasCount) {
             const texto = total === 1 ? 'noticia' : 'noticias';
-            this.noticiasCount.textContent = `${total} ${texto}`;
+            // Sin COUNT en el servidor: "+" indica que hay más páginas
+            this.noticiasCount.textContent = `${total}${this.siguiente ? '+' : ''} ${texto}`;
+        }
+    }
+
+    initScrollInfinito() {
+        if (!this.noticiasGrid || !this.paginaUrl || !this.botonMas) return;
+
+        // Sin JS el botón es un enlace a la página siguiente; con JS la carga aquí
+        this.botonMas.addEventListener('click', (event) => {
+            event.preventDefault();
+            this.cargarSiguientePagina();
+        });
+
+        if ('IntersectionObserver' in window) {
+            this.observerMas = new IntersectionObserver((entries) => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    this.cargarSiguientePagina();
+                }
+            }, { rootMargin: '400px 0px' });
+            this.observerMas.observe(this.botonMas);
+        }
+    }
+
+    async cargarSiguientePagina() {
+        if (!this.siguiente || this.cargandoPagina) return;
+
+        const generacion = this.generacionFiltros;
+        this.cargandoPagina = true;
+        try {
+            const params = this.parametrosFiltros();
+            params.append('cursor', this.siguiente);
+
+            const response = await fetch(`${this.paginaUrl}?${params.toString()}`, {
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            });
+            if (!response.ok) {
+                throw new Error('Error en la petición');
+            }
+
+            const data = await response.json();
+            if (generacion !== this.generacionFiltros) return;
+
+            // Tarjetas renderizadas por el servidor (misma plantilla que la primera página)
+            const plantilla = document.createElement('template');
+            plantilla.innerHTML = data.html;
+            const nuevas = Array.from(plantilla.content.querySelectorAll('.noticia-card'));
+            this.noticiasGrid.append(plantilla.content);
+            this.bindCardHoverEffects(nuevas);
+
+            this.siguiente = data.siguiente || null;
+            this.cargadas += data.cantidad;
+            this.actualizarContador(this.cargadas);
+
+            if (this.observerMas && this.siguiente) {
+                // Si el botón sigue a la vista (pantallas altas) se pide otra página
+                this.observerMas.unobserve(this.botonMas);
+                this.observerMas.observe(this.botonMas);
+            }
+        } catch (error) {
+            console.error('Error cargando más noticias:', error);
+        } finally {
+            this.cargandoPagina = false;
+            this.actualizarBotonMas();
+        }
+    }
+
+    actualizarBotonMas() {
+        if (this.botonMas) {
+            this.botonMas.hidden = !this.siguiente;
         }
     }
 
@@ -0,0 +1,199 @@
+/**
+ * Núcleo de cálculo del Simulador Solar en el navegador.
+ *
+ * Implementación de referencia del modelo simplificado con precio único de
+ * apps/simulador/engine.py (dimensionar + _resultado + to_dict), con el
+ * paquete de parámetros de /simulador/parametros/. Devuelve null para lo que
+ * solo calcula el servidor (tarifas escalonadas, modelo horario, batería,
+ * optimización, coordenadas, azimut libre u opciones fuera del formulario).
+ *
+ * Las operaciones siguen el mismo orden que en Python para obtener los mismos
+ * valores en coma flotante; la paridad se verifica con
+ * `python manage.py simulador_paridad`.
+ */
+(function (global) {
+    'use strict';
+
+    const CAMPOS_SOLO_SERVIDOR = [
+        'latitud', 'longitud', 'azimut', 'bateria', 'optimizar', 'incertidumbre'
+    ];
+
+    // round() de Python: redondeo correcto y empates exactos al par
+    function redondear(valor, decimales = 0) {
+        if (!Number.isFinite(valor) || Math.abs(valor) >= 1e21) {
+            return valor;
+        }
+        // Desarrollo decimal exacto del double: 12.65 es en realidad
+        // 12.6499999..., que no es un empate aunque toFixed(2) termine en 5
+        const exacto = Math.abs(valor).toFixed(100);
+        const cola = exacto.slice(exacto.indexOf('.') + 1 + decimales);
+        if (/^50*$/.test(cola)) {
+            // Empate exacto: toFixed() se aleja del cero, Python elige el dígito par
+            const extendido = valor.toFixed(decimales + 1);
+            const truncado = extendido.slice(0, decimales ? -1 : -2);
+            const ultimo = Number(truncado.replace('.', '').slice(-1));
+            if (ultimo % 2 === 0) {
+                return Number(truncado);
+            }
+        }
+        return Number(valor.toFixed(decimales));
+    }
+
+    function bisectLeft(valores, x) {
+        let bajo = 0;
+        let alto = valores.length;
+        while (bajo < alto) {
+            const medio = (bajo + alto) >> 1;
+            if (valores[medio] < x) bajo = medio + 1; else alto = medio;
+        }
+        return bajo;
+    }
+
+    function bisectRight(valores, x) {
+        let bajo = 0;
+        let alto = valores.length;
+        while (bajo < alto) {
+            const medio = (bajo + alto) >> 1;
+            if (x < valores[medio]) alto = medio; else bajo = medio + 1;
+        }
+        return bajo;
+    }
+
+    // Costo por kW: primera banda que encaja (engine.IndiceBandas.buscar), si no la primera
+    function costoPorKw(paquete, potencia) {
+        const bandas = paquete.bandas_costo;
+        if (!bandas.length) {
+            return paquete.constantes.costo_por_kw_defecto;
+        }
+        const minimos = bandas.map(banda => banda[0]);
+        for (const posicion of [bisectLeft(minimos, potencia) - 1, bisectRight(minimos, potencia) - 1]) {
+            if (posicion >= 0) {
+                const [minimo, maximo] = bandas[posicion];
+                if (minimo <= potencia && potencia <= (maximo === null ? Infinity : maximo)) {
+                    return bandas[posicion][2];
+                }
+            }
+        }
+        return bandas[0][2];
+    }
+
+    function numero(valor, defecto) {
+        if (valor === null || valor === '') {
+            return null;
+        }
+        const resultado = Number(valor === undefined ? defecto : valor);
+        return Number.isFinite(resultado) ? resultado : null;
+    }
+
+    // Misma validación y normalización que SimuladorSolarView.leer_entradas (null: lo decide el servidor)
+    function normalizar(paquete, datos) {
+        if (CAMPOS_SOLO_SERVIDOR.some(campo => ![undefined, null, '', false].includes(datos[campo]))) {
+            return null;
+        }
+        if ((datos.modo || 'simplificado') !== 'simplificado') {
+            return null;
+        }
+
+        const consumo = numero(datos.consumo_anual, 0);
+        const superficie = numero(datos.superficie, 0);
+        const inclinacion = numero(datos.inclinacion, 30);
+        if (consumo === null || consumo < 0 || consumo > 100000 ||
+            superficie === null || superficie < 0 || superficie > 10000 ||
+            inclinacion === null || inclinacion < 0 || inclinacion > 90) {
+            return null;
+        }
+
+        const ubicacion = String(datos.ubicacion || '').trim();
+        const perfil = String(datos.perfil_consumo || 'residencial').trim();
+        const provincia = paquete.provincias[ubicacion];
+        const columna = paquete.inclinaciones.indexOf(redondear(inclinacion, 1));
+        const fila = paquete.orientaciones.indexOf(String(datos.orientacion || 'N').trim());
+        const conTarifa = paquete.tarifas.some(([codigo, categoria]) => codigo === ubicacion && categoria === perfil);
+        if (!provincia || columna < 0 || fila < 0 || conTarifa || !paquete.perfiles_consumo.includes(perfil)) {
+            return null;
+        }
+
+        return {
+            consumo_anual: redondear(consumo),
+            superficie: redondear(superficie, 1),
+            factor_ubicacion: provincia.ubicacion,
+            factor_orientacion: provincia.orientacion[fila][columna],
+            factor_inclinacion: provincia.inclinacion[columna],
+        };
+    }
+
+    /**
+     * Resultados con el formato de la respuesta del servidor o null si el caso
+     * no lo cubre el modelo del navegador.
+     */
+    function simular(paquete, datos) {
+        const entradas = normalizar(paquete, datos);
+        if (!entradas) {
+            return null;
+        }
+
+        const config = paquete.config;
+        const constantes = paquete.constantes;
+        const horasSol = config.horas_sol_promedio;
+        const potenciaPanel = config.potencia_panel;
+        const { consumo_anual: consumoAnual, superficie } = entradas;
+        const { factor_ubicacion: fu, factor_orientacion: fo, factor_inclinacion: fi } = entradas;
+
+        // engine.dimensionar
+        const produccionDiariaRequerida = consumoAnual / 365;
+        const potenciaNecesaria = produccionDiariaRequerida / (horasSol * fu * fo * fi);
+        const panelesMaximos = Math.trunc(superficie / constantes.superficie_por_panel);
+        const potenciaMaximaSuperficie = panelesMaximos * (potenciaPanel / 1000);
+        const potenciaInstalada = Math.min(potenciaNecesaria, potenciaMaximaSuperficie);
+        const numPaneles = Math.trunc(potenciaInstalada * 1000 / potenciaPanel);
+        const produccionAnual = potenciaInstalada * horasSol * 365 * fu * fo * fi;
+
+        // engine.simular + engine._resultado con precio único
+        const autoconsumoPorcentaje = config.autoconsumo_sin_bateria;
+        const energiaAutoconsumida = produccionAnual * autoconsumoPorcentaje;
+        const energiaExcedente = produccionAnual - energiaAutoconsumida;
+        const ahorroAutoconsumo = Math.min(energiaAutoconsumida, consumoAnual) * config.precio_kwh;
+        const compensacion = energiaExcedente * config.precio_kwh * config.compensacion_excedentes;
+        const ahorroTotalAnual = ahorroAutoconsumo + compensacion;
+
+        const costoInstalacion = potenciaInstalada * costoPorKw(paquete, potenciaInstalada);
+        const periodoRetorno = ahorroTotalAnual > 0 ? costoInstalacion / ahorroTotalAnual : 0;
+        const ahorro25Anos = ahorroTotalAnual * constantes.anos_proyeccion - costoInstalacion;
+
+        const ahorroAcumulado = [-costoInstalacion];
+        for (let ano = 1; ano <= constantes.anos_proyeccion; ano++) {
+            const factorDegradacion = (1 - config.degradacion_anual) ** (ano - 1);
+            ahorroAcumulado.push(ahorroAcumulado[ahorroAcumulado.length - 1] + ahorroTotalAnual * factorDegradacion);
+        }
+
+        // ResultadoSimulacion.to_dict
+        return {
+            potencia_instalada: redondear(potenciaInstalada, 2),
+            num_paneles: numPaneles,
+            superficie_necesaria: redondear(numPaneles * constantes.superficie_por_panel, 2),
+            produccion_anual: redondear(produccionAnual, 2),
+            autoconsumo_porcentaje: redondear(autoconsumoPorcentaje * 100, 1),
+            energia_autoconsumida: redondear(energiaAutoconsumida, 2),
+            ahorro_total_anual: redondear(ahorroTotalAnual, 2),
+            costo_instalacion: redondear(costoInstalacion, 2),
+            periodo_retorno: redondear(periodoRetorno, 1),
+            ahorro_25_anos: redondear(ahorro25Anos, 2),
+            datos_anuales: ahorroAcumulado.map((ahorro, ano) => ({ ano: ano, ahorro_acumulado: redondear(ahorro, 2) })),
+            incluye_bateria: false,
+            costo_bateria: 0,
+            factor_ubicacion: fu,
+            factor_orientacion: redondear(fo, 3),
+            factor_inclinacion: redondear(fi, 3),
+            factor_complejidad_tejado: 1.0,
+            modelo: 'simplificado',
+        };
+    }
+
+    const SimuladorKernel = { simular: simular, redondear: redondear };
+
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = SimuladorKernel;
+    } else {
+        global.SimuladorKernel = SimuladorKernel;
+    }
+})(typeof window !== 'undefined' ? window : this);
@@ -48,6 +48,57 @@ class SimuladorSolar {
         this.bindEvents();
         this.updateNavigation();
         this.initializeFormElements();
+        this.loadSavedSimulation();
+        this.loadParameterBundle();
+    }
+    
+    loadParameterBundle() {
+        // Parámetros del simulador para calcular en el navegador (el POST solo guarda la simulación)
+        const url = document.getElementById('simulador-form').dataset.parametrosUrl;
+        if (!url || !window.SimuladorKernel) return;
+        
+        fetch(url)
+            .then(response => response.ok ? response.json() : null)
+            .then(parametros => { this.parametros = parametros; })
+            .catch(() => { this.parametros = null; });
+    }
+    
+    calculateLocally(formData) {
+        if (!this.parametros || !window.SimuladorKernel) return null;
+        try {
+            return window.SimuladorKernel.simular(this.parametros, formData);
+        } catch (error) {
+            console.error('Error en el cálculo local:', error);
+            return null;
+        }
+    }
+    
+    showResults(resultados, formData) {
+        this.displayResults(resultados, formData);
+        // Ir al paso de resultados
+        this.currentStep = 3;
+        this.updateStepDisplay();
+        this.updateNavigation();
+    }
+    
+    loadSavedSimulation() {
+        // Enlace permanente (/simulador/r/<id>/): resultados guardados en la página
+        const saved = document.getElementById('simulacion-guardada');
+        if (!saved) return;
+        
+        const simulacion = JSON.parse(saved.textContent);
+        this.permalink = window.location.pathname;
+        this.displayResults(simulacion.resultados, simulacion.entradas);
+        this.currentStep = 3;
+        this.updateStepDisplay();
+        this.updateNavigation();
+    }
+    
+    copyPermalink() {
+        const url = new URL(this.permalink, window.location.origin).href;
+        navigator.clipboard.writeText(url)
+            .then(() => this.showNotification('Enlace copiado: compártelo para mostrar esta simulación.', 'success'))
+            .catch(() => this.showNotification(url, 'info'));
     }
     
     bindEvents() {
@@ -480,9 +531,16 @@ class SimuladorSolar {
         btnLoader.style.display = 'flex';
         submitBtn.disabled = true;
         
+        const formData = this.collectFormData();
+        
+        // Resultado instantáneo en el navegador; el servidor lo confirma y devuelve el enlace
+        const local = this.calculateLocally(formData);
+        if (local) {
+            this.permalink = null;
+            this.showResults(local, formData);
+        }
+        
         try {
-            const formData = this.collectFormData();
-            
             const response = await fetch('/simulador/', {
                 method: 'POST',
                 headers: {
@@ -494,18 +552,21 @@ class SimuladorSolar {
             const data = await response.json();
             
             if (data.success) {
-                this.displayResults(data.resultados, formData);
-                // Ir al paso de resultados
-                this.currentStep = 3;
-                this.updateStepDisplay();
-                this.updateNavigation();
+                // Si ya se mostró el resultado local y el usuario empezó otra simulación, no volver atrás
+                if (!local || this.currentStep === 3) {
+                    this.permalink = data.permalink;
+                    this.showResults(data.resultados, formData);
+                }
             } else {
                 this.displayError(data.error || 'Error desconocido en el cálculo');
             }
             
         } catch (error) {
             console.error('Error:', error);
-            this.displayError('Error de conexión. Por favor, inténtalo de nuevo.');
+            // Con resultado local se mantiene en pantalla (solo falta el enlace para compartir)
+            if (!local) {
+                this.displayError('Error de conexión. Por favor, inténtalo de nuevo.');
+            }
         } finally {
             // Ocultar loading
             btnText.style.display = 'inline';
@@ -615,6 +676,10 @@ class SimuladorSolar {
                                 💬 Contactar por WhatsApp
                             </a>
                         </div>
+                        ${this.permalink ? `
+                        <button type="button" class="btn btn--secondary" onclick="window.simulador.copyPermalink()" style="margin-top: var(--space-4);">
+                            🔗 Copiar enlace para compartir
+                        </button>` : ''}
                         <button type="button" class="btn btn--secondary" onclick="window.simulador.resetSimulator()" style="margin-top: var(--space-4);">
                             🔄 Nueva Simulación
                         </button>
@@ -725,6 +790,7 @@ class SimuladorSolar {
     resetSimulator() {
         // Resetear al primer paso
         this.currentStep = 1;
+        this.permalink = null;
         
         // Limpiar formulario
         document.getElementById('simulador-form').reset();